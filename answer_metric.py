@@ -0,0 +1,84 @@
+"""
+Answer Metric: validate_answer, One Example or a Whole Column at a Time
+
+Problems 2 and 6 score predictions with:
+
+    def validate_answer(example, pred, trace=None):
+        expected = example.answer.lower()
+        actual = pred.answer.lower()
+        return expected in actual or actual in expected
+
+An optimizer calls this thousands of times per compile, lowercasing the
+same expected answers every time. AnswerMetric lowercases a trainset's
+answers once and scores whole lists of predictions in one call:
+
+    metric = AnswerMetric(trainset)
+    metric(example, pred)                 # drop-in for validate_answer
+    metric.score_batch(predictions)       # [True, False, ...], aligned with trainset
+    metric.accuracy(predictions)          # 0.75
+
+Batches are scored with a plain list comprehension over the
+pre-lowercased answers, with the same results as validate_answer.
+"""
+
+
+def validate_answer(example, pred, trace=None):
+    """Metric: answer should contain expected answer (or the other way round)"""
+    expected = example.answer.lower()
+    actual = pred.answer.lower()
+    return expected in actual or actual in expected
+
+
+def answer_text(pred, field="answer"):
+    """The answer string of a prediction, or the value itself if it's a string"""
+    return pred if isinstance(pred, str) else getattr(pred, field)
+
+
+def validate_answers(expected, predicted, lowered=False):
+    """
+    validate_answer over two aligned columns of strings.
+
+    With lowered=True, `expected` is taken as already lowercased.
+    Returns a list of bools.
+    """
+    if len(expected) != len(predicted):
+        raise ValueError(f"{len(expected)} expected answers but {len(predicted)} predictions")
+    if not lowered:
+        expected = [e.lower() for e in expected]
+    return [e in p or p in e for e, p in zip(expected, (p.lower() for p in predicted))]
+
+
+class AnswerMetric:
+    """
+    validate_answer for one trainset, with the expected answers lowercased once.
+
+    Works as a regular DSPy metric (examples outside the trainset are
+    handled too) and scores whole columns of predictions at once.
+    """
+
+    def __init__(self, trainset, field="answer"):
+        self.trainset = list(trainset)
+        self.field = field
+        self.expected = [getattr(example, field).lower() for example in self.trainset]
+        self._position = {id(example): i for i, example in enumerate(self.trainset)}
+
+    def __call__(self, example, pred, trace=None):
+        position = self._position.get(id(example))
+        expected = self.expected[position] if position is not None else getattr(example, self.field).lower()
+        actual = answer_text(pred, self.field).lower()
+        return expected in actual or actual in expected
+
+    def score_batch(self, predictions, positions=None):
+        """
+        Score predictions against the trainset (or the trainset rows at `positions`).
+
+        predictions are Prediction objects or answer strings.
+        """
+        expected = self.expected if positions is None else [self.expected[i] for i in positions]
+        predicted = [answer_text(pred, self.field) for pred in predictions]
+        return validate_answers(expected, predicted, lowered=True)
+
+    def accuracy(self, predictions, positions=None):
+        """Share of predictions that pass"""
+        scores = self.score_batch(predictions, positions)
+        return sum(scores) / len(scores) if scores else 0.0
@@ -0,0 +1,251 @@
+"""
+Checkpointed, Resumable Optimization
+
+`optimizer.compile(student=QA, trainset=examples)` is all-or-nothing: if
+a multi-hour search dies at 90%, every paid LM call is lost.
+resumable_compile() makes it restartable:
+
+    optimized = resumable_compile(optimizer, QA(), trainset, "mipro_run.ckpt")
+    # ... crash, Ctrl+C, lost connection ...
+    optimized = resumable_compile(optimizer, QA(), trainset, "mipro_run.ckpt", resume=True)
+
+Two files make up a checkpoint:
+
+- `<path>.calls`: every completed LM call, journaled the moment it
+  returns (a RecordingLM log - see recording_lm.py)
+- `<path>`: the run's state - the RNG state it started with, progress
+  counters and, once done, the compiled program - as gzipped JSON,
+  rewritten atomically at most every `interval` seconds
+
+On resume the random number generators are restored - the random
+module, numpy's global generator (when numpy is loaded) and the
+optimizer's own `seed`/`rng` - so the optimizer proposes the same
+candidates, bootstraps the same traces and scores them in the same order
+- and every call it already made is answered from the journal instead
+of the API. It catches up in seconds, then continues where it died.
+A finished run just loads the saved program.
+
+A run in which every prediction failed (no API key, a dead endpoint,
+replies that never parse) raises instead of being saved as done, so
+resuming after the fix continues the run rather than loading a program
+with nothing learned.
+
+Searches in this repository that keep their own state (e.g.
+PromptBandit in problem 3) can use Checkpoint directly.
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import threading
+
+from lazy_dspy import dspy
+
+try:
+    from recording_lm import RecordingLM
+    from dspy.utils.callback import BaseCallback
+except ImportError:  # dspy not installed, or older than 2.6
+    RecordingLM = BaseCallback = object
+
+DEFAULT_INTERVAL = 60.0
+
+
+def rng_state(rng=random):
+    """JSON-friendly state of a random.Random (or the random module)"""
+    version, internal, gauss = rng.getstate()
+    return [version, list(internal), gauss]
+
+
+def set_rng_state(state, rng=random):
+    """Restore a state from rng_state()"""
+    version, internal, gauss = state
+    rng.setstate((version, tuple(internal), gauss))
+
+
+def capture_rngs(optimizer=None):
+    """
+    States of every generator a compile can draw from: the random module,
+    numpy's global generator (only if numpy is already loaded) and the
+    optimizer's `seed` and `rng` attributes (e.g. MIPROv2, GRPO).
+    """
+    states = {"random": rng_state(), "numpy": None, "seed": None, "optimizer": None}
+    numpy = sys.modules.get("numpy")
+    if numpy is not None:
+        name, keys, position, has_gauss, cached = numpy.random.get_state()
+        states["numpy"] = [name, keys.tolist(), position, has_gauss, cached]
+    seed = getattr(optimizer, "seed", None)
+    if isinstance(seed, int):
+        states["seed"] = seed
+    rng = getattr(optimizer, "rng", None)
+    if isinstance(rng, random.Random):
+        states["optimizer"] = rng_state(rng)
+    return states
+
+
+def restore_rngs(states, optimizer=None):
+    """Put back the states from capture_rngs()"""
+    set_rng_state(states["random"])
+    if states["numpy"] is not None:
+        import numpy
+        name, keys, position, has_gauss, cached = states["numpy"]
+        numpy.random.set_state((name, numpy.array(keys, dtype=numpy.uint32), position, has_gauss, cached))
+    if states["seed"] is not None:
+        optimizer.seed = states["seed"]
+    if states["optimizer"] is not None and isinstance(getattr(optimizer, "rng", None), random.Random):
+        set_rng_state(states["optimizer"], optimizer.rng)
+
+
+class Checkpoint:
+    """
+    A state dict saved to a gzipped JSON file, at most every `interval` seconds.
+
+    Writes go to a temporary file that replaces the old checkpoint, so a
+    crash mid-write leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, path, interval=DEFAULT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.saves = 0
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def calls_path(self):
+        """Journal of completed LM calls for this checkpoint"""
+        return self.path + ".calls"
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """The saved state, or None"""
+        if not self.exists():
+            return None
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, state, force=False):
+        """Write state if `interval` seconds passed since the last write (or force); returns whether it wrote"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_save < self.interval:
+                return False
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            temporary = f"{self.path}.tmp{os.getpid()}"
+            with gzip.open(temporary, "wt", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"), default=str)
+            os.replace(temporary, self.path)
+            self._last_save = now
+            self.saves += 1
+            return True
+
+    def remove(self):
+        """Delete the checkpoint and its call journal"""
+        for path in (self.path, self.calls_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class JournaledLM(RecordingLM):
+    """
+    RecordingLM that also refreshes a checkpoint's progress after each new call.
+
+    Copies (lm.copy(temperature=1.0) for teachers and bootstrap rounds)
+    journal into the same log and checkpoint.
+    """
+
+    def __init__(self, checkpoint, state, lm):
+        super().__init__(checkpoint.calls_path, lm, mode="auto")
+        self.checkpoint = checkpoint
+        self.state = state
+
+    def _record(self, key, outputs):
+        super()._record(key, outputs)
+        self.state["calls"] = self.recorded
+        self.state["updated"] = time.time()
+        self.checkpoint.save(self.state)
+
+
+class PredictionOutcomes(BaseCallback):
+    """DSPy callback counting predictions that parsed and ones that failed (LM error or unparseable reply)"""
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def _failure(self, exception):
+        with self._lock:
+            self.failed += 1
+            self.last_error = f"{type(exception).__name__}: {exception}"
+
+    def on_lm_end(self, call_id, outputs, exception=None):
+        if exception is not None:
+            self._failure(exception)
+
+    def on_adapter_parse_end(self, call_id, outputs, exception=None):
+        if exception is not None:
+            self._failure(exception)
+        else:
+            with self._lock:
+                self.succeeded += 1
+
+
+def resumable_compile(optimizer, student, trainset, path, resume=False, interval=DEFAULT_INTERVAL,
+                      lm=None, **compile_kwargs):
+    """
+    optimizer.compile(student, trainset=trainset, ...) with a checkpoint at `path`.
+
+    resume=False starts over (an existing checkpoint is deleted);
+    resume=True continues from it, re-issuing no completed LM call.
+    lm defaults to the configured dspy LM.
+
+    Raises RuntimeError, and leaves the run resumable, if predictions
+    were attempted and every one of them failed.
+    """
+    lm = lm or dspy.settings.lm
+    if lm is None:
+        raise ValueError("no LM to compile with: pass lm= or call dspy.configure(lm=...)")
+    checkpoint = Checkpoint(path, interval)
+    state = checkpoint.load() if resume else None
+    if not resume:
+        checkpoint.remove()
+
+    if state is not None and state.get("done"):
+        program = student.deepcopy()
+        program.load_state(state["program"])
+        return program
+
+    if state is None:
+        state = {"rng": capture_rngs(optimizer), "started": time.time(), "calls": 0, "done": False}
+        checkpoint.save(state, force=True)
+    else:
+        restore_rngs(state["rng"], optimizer)
+
+    journal = JournaledLM(checkpoint, state, lm)
+    outcomes = PredictionOutcomes()
+    callbacks = list(dspy.settings.get("callbacks") or []) + [outcomes]
+    try:
+        with dspy.context(lm=journal, callbacks=callbacks):
+            compiled = optimizer.compile(student, trainset=trainset, **compile_kwargs)
+    finally:
+        state["replayed"] = journal.hits
+        state["failed_predictions"] = outcomes.failed
+        checkpoint.save(state, force=True)
+
+    if outcomes.failed and not outcomes.succeeded:
+        raise RuntimeError(
+            f"All {outcomes.failed} predictions failed during compile (last: {outcomes.last_error}); "
+            f"the run was not marked done - fix the LM and call again with resume=True"
+        )
+
+    state["done"] = True
+    state["program"] = compiled.dump_state()
+    checkpoint.save(state, force=True)
+    return compiled
@@ -0,0 +1,147 @@
+"""
+Early-Stopping Candidate Evaluation
+
+Optimizers (problems 3 and 6) score every candidate program on every
+example before comparing. Once a candidate is far enough behind, the
+rest of its examples can't change the outcome - those calls are wasted.
+
+EarlyStoppingEvaluator scores candidates one example at a time and
+stops a candidate as soon as it can no longer beat the best finished
+candidate by `margin`:
+
+- exact (default): even a perfect score on every remaining example
+  would leave it behind. Never changes which candidate wins.
+- confidence=0.95: its Hoeffding upper confidence bound is behind.
+  Stops much earlier. The bound is re-checked after every example, so
+  check n uses 5% / (n(n+1)); those add up to 5% over all checks. With
+  the devset in random order, a stopped candidate would have finished
+  ahead of the best with probability at most 5% (per candidate, so at
+  most 5% × the number of stopped candidates for the whole run).
+
+    evaluator = EarlyStoppingEvaluator(devset, validate_answer, confidence=0.95)
+    best = evaluator.evaluate_all({"v1": qa_v1, "v2": qa_v2, "v3": qa_v3})
+    evaluator.print_stats()   # completed / skipped calls per candidate
+
+Metric scores must be in [0, 1] (True/False counts as 1/0).
+"""
+
+import math
+
+
+class CandidateStats:
+    """Running score and call counts of one candidate"""
+
+    __slots__ = ("name", "total", "completed", "skipped", "stopped")
+
+    def __init__(self, name):
+        self.name = name
+        self.total = 0.0
+        self.completed = 0
+        self.skipped = 0
+        self.stopped = False
+
+    @property
+    def score(self):
+        """Mean over the examples evaluated so far"""
+        return self.total / self.completed if self.completed else 0.0
+
+    def as_dict(self):
+        return {"name": self.name, "score": self.score, "completed": self.completed,
+                "skipped": self.skipped, "stopped": self.stopped}
+
+
+class EarlyStoppingEvaluator:
+    """
+    Scores candidates on devset, stopping hopeless ones early.
+
+    margin: a candidate must be able to beat the best by more than this
+    confidence: None for the exact bound, or e.g. 0.95 for a Hoeffding bound
+    min_examples: examples every candidate gets before it may be stopped
+    """
+
+    def __init__(self, devset, metric, margin=0.0, confidence=None, min_examples=5):
+        if confidence is not None and not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        self.devset = list(devset)
+        self.metric = metric
+        self.margin = margin
+        self.confidence = confidence
+        self.min_examples = min_examples
+        self.stats = {}
+        self.best = None
+
+    @property
+    def best_score(self):
+        return self.stats[self.best].score if self.best is not None else None
+
+    def upper_bound(self, stats):
+        """Best final score this candidate could still reach"""
+        total = len(self.devset)
+        remaining = total - stats.completed
+        exact = (stats.total + remaining) / total
+        if self.confidence is None or not stats.completed:
+            return exact
+        # Anytime-valid: check n spends delta / (n(n+1)) of the error budget
+        n = stats.completed
+        delta = (1 - self.confidence) / (n * (n + 1))
+        slack = math.sqrt(math.log(1 / delta) / (2 * n))
+        return min(exact, stats.score + slack)
+
+    def hopeless(self, stats):
+        if self.best is None or stats.completed < self.min_examples:
+            return False
+        return self.upper_bound(stats) <= self.best_score + self.margin
+
+    def run_one(self, program, example):
+        """Score program on one example"""
+        inputs = example.inputs() if hasattr(example, "inputs") else example
+        pred = program(**inputs)
+        return float(self.metric(example, pred))
+
+    def evaluate(self, name, program):
+        """Score one candidate (stopping early if it can't win); returns its CandidateStats"""
+        stats = self.stats[name] = CandidateStats(name)
+        for position, example in enumerate(self.devset):
+            if self.hopeless(stats):
+                stats.stopped = True
+                stats.skipped = len(self.devset) - position
+                break
+            stats.total += self.run_one(program, example)
+            stats.completed += 1
+        if not stats.stopped and (self.best is None or stats.score > self.best_score):
+            self.best = name
+        return stats
+
+    def evaluate_all(self, candidates):
+        """Score {name: program} candidates in order; returns the best name"""
+        for name, program in candidates.items():
+            self.evaluate(name, program)
+        return self.best
+
+    @property
+    def calls(self):
+        return sum(s.completed for s in self.stats.values())
+
+    @property
+    def skipped(self):
+        return sum(s.skipped for s in self.stats.values())
+
+    def summary(self):
+        """Per-candidate stats and totals, as a dict"""
+        return {
+            "best": self.best,
+            "calls": self.calls,
+            "skipped": self.skipped,
+            "candidates": [s.as_dict() for s in self.stats.values()],
+        }
+
+    def print_stats(self):
+        """Print a table of per-candidate calls"""
+        print(f"{'Candidate':<24} {'Score':>6} {'Done':>6} {'Skipped':>8}")
+        print("-" * 47)
+        for s in self.stats.values():
+            flag = " (best)" if s.name == self.best else " (stopped)" if s.stopped else ""
+            print(f"{str(s.name)[:24]:<24} {s.score:>6.3f} {s.completed:>6} {s.skipped:>8}{flag}")
+        total = self.calls + self.skipped
+        if total:
+            print(f"Calls: {self.calls} of {total} ({self.skipped / total:.0%} skipped)")
@@ -0,0 +1,212 @@
+"""
+Evaluation Memo for Optimizer Runs
+
+MIPRO/COPRO-style searches (problems 3 and 6) score the same prompt on
+the same example again and again: in later rounds, when candidates
+repeat, and after every restart. The memo stores each evaluation on
+disk, keyed by a hash of what decides the result:
+
+    (rendered prompt, model, sampling params)
+
+and keeps both the raw prediction and every metric score computed for
+it. A repeated evaluation costs a SQLite lookup instead of an LM call,
+so a restarted optimization replays everything it already did.
+
+    memo = EvalMemo()
+    score = memo.evaluate(qa, example, validate_answer)   # LM call the first time only
+    memo.stats()                                          # entries, hits, misses
+
+Old entries are evicted least-recently-used past the size limits
+(sqlite_store.py). Location and limits can be changed with environment variables:
+
+    EVAL_MEMO_PATH       (default: ~/.cache/dspy_problems/eval_memo.sqlite)
+    EVAL_MEMO_MAX_ITEMS  (default: 100000)
+    EVAL_MEMO_MAX_MB     (default: 200)
+    EVAL_MEMO_TTL        seconds, 0 = never expire (default: 0)
+
+Inspect or clear it with:
+
+    python eval_memo.py stats
+    python eval_memo.py clear
+"""
+
+import os
+import sys
+import json
+import types
+import hashlib
+
+from lazy_dspy import dspy
+from sqlite_store import SQLiteStore, main
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "dspy_problems", "eval_memo.sqlite")
+DEFAULT_MAX_ITEMS = 100_000
+DEFAULT_MAX_MB = 200
+
+
+def _hash(payload):
+    text = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def memo_key(prompt, model, params):
+    """Stable hash of a rendered prompt (text or chat messages), model and params"""
+    return _hash({"prompt": prompt, "model": model, "params": params})
+
+
+def _code_fingerprint(code):
+    """Bytecode, constants and names of a code object (nested functions included), stable across runs"""
+    constants = []
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            constants.append(_code_fingerprint(constant))
+        elif isinstance(constant, frozenset):
+            constants.append(sorted(map(repr, constant)))
+        else:
+            constants.append(repr(constant))
+    return [code.co_code.hex(), constants, list(code.co_names)]
+
+
+def _value_fingerprint(value, seen):
+    """
+    Stable, JSON-friendly description of a value a metric depends on.
+
+    Functions are described by their code, defaults and closure; other
+    objects by their public attributes. Raises TypeError for values with
+    no stable description (locks, sockets, ...).
+    """
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return repr(value)
+    if id(value) in seen:
+        return "<cycle>"
+    seen = seen | {id(value)}
+    if isinstance(value, (list, tuple)):
+        return [_value_fingerprint(item, seen) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(json.dumps(_value_fingerprint(item, seen)) for item in value)
+    if isinstance(value, dict):
+        return sorted([_value_fingerprint(k, seen), _value_fingerprint(v, seen)] for k, v in value.items())
+    if isinstance(value, (type, types.ModuleType, types.BuiltinFunctionType)):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', value.__name__)}"
+    if isinstance(value, types.MethodType):
+        return [_value_fingerprint(value.__func__, seen), _value_fingerprint(value.__self__, seen)]
+    if isinstance(value, types.FunctionType):
+        cells = []
+        for cell in value.__closure__ or ():
+            try:
+                cells.append(_value_fingerprint(cell.cell_contents, seen))
+            except ValueError:  # a cell not bound yet
+                cells.append("<empty>")
+        return [_code_fingerprint(value.__code__), _value_fingerprint(value.__defaults__, seen),
+                _value_fingerprint(value.__kwdefaults__, seen), cells]
+    if hasattr(value, "toDict"):  # dspy.Example, dspy.Prediction
+        return _value_fingerprint(value.toDict(), seen)
+    state = getattr(value, "__dict__", None)
+    if state is None:
+        raise TypeError(f"no stable fingerprint for a {type(value).__name__}")
+    # Underscore attributes are caches (e.g. positions keyed by id()), not configuration
+    public = {k: v for k, v in state.items() if not k.startswith("_")}
+    call = getattr(type(value), "__call__", None)
+    code = _code_fingerprint(call.__code__) if hasattr(call, "__code__") else None
+    return [_value_fingerprint(type(value), seen), code, _value_fingerprint(public, seen)]
+
+
+def metric_fingerprint(metric):
+    """
+    Hash of what a metric computes: its code plus the values it closes over.
+
+    Covers closure cells, default arguments, a bound method's instance and
+    a callable object's public attributes, so mk(0) and mk(5) differ.
+    Module globals are not included. Raises TypeError when part of the
+    state has no stable description; name the metric yourself then
+    (EvalMemo.evaluate(..., metric_key=...)).
+    """
+    return _hash(_value_fingerprint(metric, frozenset()))[:12]
+
+
+def metric_id(metric, example, metric_key=None):
+    """
+    Which metric scored against which expected outputs.
+
+    The id names the metric and hashes its code and state (see
+    metric_fingerprint), so two lambdas, two versions of one function or
+    two closures over different values never share scores. metric_key
+    replaces the hash, for metrics whose state can't be hashed.
+    """
+    labels = example.labels().toDict() if hasattr(example, "labels") else {}
+    name = f"{getattr(metric, '__module__', '')}.{getattr(metric, '__qualname__', type(metric).__name__)}"
+    key = metric_key if metric_key is not None else metric_fingerprint(metric)
+    return f"{name}@{key}:{_hash(labels)[:16]}"
+
+
+def render_prompt(predictor, inputs):
+    """The messages a Predict would send for these inputs, demos included"""
+    adapter = dspy.settings.adapter or dspy.ChatAdapter()
+    return adapter.format(predictor.signature, predictor.demos, inputs)
+
+
+class EvalMemo(SQLiteStore):
+    """
+    Size-bounded, LRU-evicted store of predictions and metric scores in SQLite.
+
+    Each entry is {"prediction": {...}, "scores": {metric id: score}}.
+    Safe to share between threads; several processes can share one file.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_items=DEFAULT_MAX_ITEMS, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 ttl=0):
+        super().__init__(path, ttl=ttl, max_items=max_items, max_bytes=max_bytes)
+        self._fingerprints = {}  # id(metric) -> (metric, fingerprint); a metric's state is hashed once
+
+    def _metric_key(self, metric):
+        if isinstance(metric, types.MethodType):  # a new object on every attribute access
+            return metric_fingerprint(metric)
+        cached = self._fingerprints.get(id(metric))
+        if cached is None or cached[0] is not metric:
+            cached = self._fingerprints[id(metric)] = (metric, metric_fingerprint(metric))
+        return cached[1]
+
+    def evaluate(self, predictor, example, metric, lm=None, metric_key=None):
+        """
+        metric(example, predictor(**example.inputs())), memoized.
+
+        predictor is a dspy.Predict (or anything with signature and demos);
+        lm defaults to predictor.lm, then the configured one, and is the LM
+        the prediction is made with. metric_key names the metric instead
+        of hashing it (see metric_id); the hash is computed once per metric
+        object, so change a metric's settings by making a new one.
+        """
+        lm = lm or getattr(predictor, "lm", None) or dspy.settings.lm
+        inputs = example.inputs().toDict()
+        key = memo_key(render_prompt(predictor, inputs), getattr(lm, "model", None), getattr(lm, "kwargs", {}))
+        scored_by = metric_id(metric, example, metric_key if metric_key is not None else self._metric_key(metric))
+
+        stored = self.get(key)
+        if stored is not None:
+            if scored_by in stored["scores"]:
+                return stored["scores"][scored_by]
+            score = metric(example, dspy.Prediction(**stored["prediction"]))
+            self.update(key, lambda entry: {**entry, "scores": {**entry["scores"], scored_by: score}})
+            return score
+
+        # The LM the key was built from, not whatever the predictor would pick
+        pred = predictor(**inputs, lm=lm)
+        score = metric(example, pred)
+        self.put(key, {"prediction": pred.toDict(), "scores": {scored_by: score}})
+        return score
+
+
+_default_memo = None
+
+
+def default_memo():
+    """The shared memo, configured from the EVAL_MEMO_* environment variables"""
+    global _default_memo
+    if _default_memo is None:
+        _default_memo = EvalMemo.from_env("EVAL_MEMO", DEFAULT_PATH, max_items=DEFAULT_MAX_ITEMS,
+                                          max_mb=DEFAULT_MAX_MB)
+    return _default_memo
+
+
+if __name__ == "__main__":
+    sys.exit(main(default_memo()))
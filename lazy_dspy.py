@@ -0,0 +1,111 @@
+"""
+Lazy DSPy Import
+
+Importing dspy pulls in litellm, openai, pydantic and friends, which is
+most of a solution script's startup time. Most scripts only print text,
+so they import dspy from here instead:
+
+    from lazy_dspy import dspy, DSPY_AVAILABLE
+
+`dspy` is a stand-in that imports the real module the first time an
+attribute is used (dspy.Signature, dspy.Predict, ...). DSPY_AVAILABLE
+tells whether dspy is installed without importing it, and turns false
+once an import has failed. Code about to build DSPy objects should ask
+`dspy.available()`, which does the real import, so a broken install
+falls back instead of crashing:
+
+    if not dspy.available():
+        ...  # show the code instead of running it
+"""
+
+import importlib
+import importlib.util
+
+
+def is_installed(name):
+    """Check whether a module can be found, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_error"] = None
+
+    def _load(self):
+        if self._module is None:
+            if self._error is not None:
+                raise self._error
+            try:
+                self.__dict__["_module"] = importlib.import_module(self._name)
+            except ImportError as e:
+                self.__dict__["_error"] = e
+                raise
+        return self._module
+
+    def available(self):
+        """Import the module if needed; False if that fails (not installed, or a broken install)"""
+        try:
+            self._load()
+        except ImportError:
+            return False
+        return True
+
+    @property
+    def is_loaded(self):
+        """True once the real module has been imported"""
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def failed(self):
+        """True once an import has been tried and failed"""
+        return self._error is not None
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded else "import failed" if self.failed else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Return a LazyModule for `name` (e.g. "dspy.clients")"""
+    return LazyModule(name)
+
+
+class ImportFlag:
+    """
+    True if a module is installed and hasn't failed to import.
+
+    Checking it never imports anything: it's is_installed() until the
+    LazyModule tries the import, then whether that worked.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.installed = is_installed(module._name)
+
+    def __bool__(self):
+        return self.module.is_loaded or (self.installed and not self.module.failed)
+
+    def __repr__(self):
+        return repr(bool(self))
+
+
+dspy = lazy_import("dspy")
+DSPY_AVAILABLE = ImportFlag(dspy)
+clients = lazy_import("dspy.clients")
+teleprompt = lazy_import("dspy.teleprompt")
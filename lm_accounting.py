@@ -0,0 +1,226 @@
+"""
+LM Call Accounting: Tokens, Latency and Cost
+
+The docs say optimizers cost "~$1-10 per 100 calls" and that DSPy makes
+"fewer API calls" - UsageTracker measures it. It is a DSPy callback
+that records every LM call with its prompt and completion tokens,
+latency and estimated cost, tagged with:
+
+- module: the innermost DSPy module running (e.g. Predict, ChainOfThought)
+- signature: the signature being formatted (e.g. QA)
+- round: whatever label you set, e.g. the optimizer round
+
+    tracker = UsageTracker()
+    dspy.configure(lm=lm, callbacks=[tracker])
+
+    with tracker.round("bootstrap"):
+        optimized = optimizer.compile(student=QA, trainset=trainset)
+
+    tracker.print_summary()             # table per module / signature / round
+    tracker.save("usage.json")          # every call plus the summary
+
+Token counts come from the provider's usage report in the LM history;
+cost from litellm's response cost, else from PRICES (USD per 1M tokens),
+else it's left at 0. Requires DSPy 2.6+ callbacks.
+"""
+
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# USD per 1M tokens (prompt, completion); used when litellm reports no cost
+PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "claude-3-haiku-20240307": (0.25, 1.25),
+    "claude-3-5-sonnet-20241022": (3.00, 15.00),
+}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, prices=PRICES):
+    """Cost in USD from the price table, or 0.0 for unknown models"""
+    name = (model or "").split("/")[-1]
+    prompt_price, completion_price = prices.get(name, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _usage_of(entry):
+    usage = entry.get("usage") or {}
+    if not isinstance(usage, dict):
+        usage = dict(usage)
+    return int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
+
+
+class UsageTracker:
+    """
+    DSPy callback that accounts for every LM call.
+
+    Safe with threaded evaluation: module and signature tags are kept
+    per thread; the round label is shared.
+    """
+
+    def __init__(self, prices=PRICES):
+        self.prices = prices
+        self.calls = []
+        self.current_round = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pending = {}
+
+    # -- tags ---------------------------------------------------------
+
+    @contextmanager
+    def round(self, label):
+        """Tag calls made inside the block with `label`"""
+        previous, self.current_round = self.current_round, label
+        try:
+            yield
+        finally:
+            self.current_round = previous
+
+    def _modules(self):
+        if not hasattr(self._local, "modules"):
+            self._local.modules = []
+        return self._local.modules
+
+    # -- DSPy callback hooks ------------------------------------------
+
+    def on_module_start(self, call_id, instance, inputs):
+        self._modules().append(type(instance).__name__)
+
+    def on_module_end(self, call_id, outputs, exception=None):
+        modules = self._modules()
+        if modules:
+            modules.pop()
+        if not modules:
+            self._local.signature = None
+
+    def on_adapter_format_start(self, call_id, instance, inputs):
+        signature = inputs.get("signature")
+        self._local.signature = getattr(signature, "__name__", None) or str(signature)
+
+    def on_adapter_format_end(self, call_id, outputs, exception=None):
+        pass
+
+    def on_adapter_parse_start(self, call_id, instance, inputs):
+        pass
+
+    def on_adapter_parse_end(self, call_id, outputs, exception=None):
+        pass
+
+    def on_lm_start(self, call_id, instance, inputs):
+        modules = self._modules()
+        self._pending[call_id] = {
+            "lm": instance,
+            "history_length": len(getattr(instance, "history", []) or []),
+            "start": time.perf_counter(),
+            "module": modules[-1] if modules else None,
+            "signature": getattr(self._local, "signature", None),
+            "round": self.current_round,
+        }
+
+    def on_lm_end(self, call_id, outputs, exception=None):
+        pending = self._pending.pop(call_id, None)
+        if pending is None:
+            return
+        latency = time.perf_counter() - pending["start"]
+        lm = pending.pop("lm")
+        model = getattr(lm, "model", None)
+        entry = self._history_entry(lm, pending.pop("history_length"), outputs)
+        prompt_tokens, completion_tokens = _usage_of(entry) if entry else (0, 0)
+        cost = entry.get("cost") if entry else None
+        if cost is None:
+            cost = estimate_cost(model, prompt_tokens, completion_tokens, self.prices)
+        pending.pop("start")
+        record = dict(
+            pending,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_s=latency,
+            cost=float(cost or 0.0),
+            cached=bool(entry and getattr(entry.get("response"), "cache_hit", False)),
+            error=type(exception).__name__ if exception else None,
+        )
+        with self._lock:
+            self.calls.append(record)
+
+    def on_tool_start(self, call_id, instance, inputs):
+        pass
+
+    def on_tool_end(self, call_id, outputs, exception=None):
+        pass
+
+    def on_evaluate_start(self, call_id, instance, inputs):
+        pass
+
+    def on_evaluate_end(self, call_id, outputs, exception=None):
+        pass
+
+    def _history_entry(self, lm, history_length, outputs):
+        """This call's entry in lm.history (the newest new one with its outputs, else the newest)"""
+        new_entries = (getattr(lm, "history", None) or [])[history_length:]
+        for entry in reversed(new_entries):
+            if entry.get("outputs") == outputs:
+                return entry
+        return new_entries[-1] if new_entries else None
+
+    # -- reports ------------------------------------------------------
+
+    def summary(self, by=("module", "signature", "round")):
+        """Totals per tag combination, as a list of dicts"""
+        groups = {}
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            key = tuple(call[tag] for tag in by)
+            group = groups.setdefault(key, dict(zip(by, key), calls=0, errors=0, prompt_tokens=0,
+                                                completion_tokens=0, cost=0.0, latency_s=0.0))
+            group["calls"] += 1
+            group["errors"] += call["error"] is not None
+            group["prompt_tokens"] += call["prompt_tokens"]
+            group["completion_tokens"] += call["completion_tokens"]
+            group["cost"] += call["cost"]
+            group["latency_s"] += call["latency_s"]
+        for group in groups.values():
+            group["mean_latency_s"] = group["latency_s"] / group["calls"]
+            group["tokens_per_s"] = (group["completion_tokens"] / group["latency_s"]) if group["latency_s"] else 0.0
+        return list(groups.values())
+
+    def totals(self):
+        with self._lock:
+            calls = list(self.calls)
+        return {
+            "calls": len(calls),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+            "cost": sum(c["cost"] for c in calls),
+            "latency_s": sum(c["latency_s"] for c in calls),
+        }
+
+    def print_summary(self):
+        """Print one line per module / signature / round, then the totals"""
+        print(f"{'Module':<16} {'Signature':<16} {'Round':<12} {'Calls':>6} {'Prompt':>9} "
+              f"{'Completion':>10} {'Cost $':>9} {'Latency':>8}")
+        print("-" * 92)
+        for g in self.summary():
+            print(f"{str(g['module'])[:16]:<16} {str(g['signature'])[:16]:<16} {str(g['round'])[:12]:<12} "
+                  f"{g['calls']:>6} {g['prompt_tokens']:>9} {g['completion_tokens']:>10} "
+                  f"{g['cost']:>9.4f} {g['mean_latency_s'] * 1000:>6.0f}ms")
+        t = self.totals()
+        print("-" * 92)
+        print(f"{'Total':<46} {t['calls']:>6} {t['prompt_tokens']:>9} {t['completion_tokens']:>10} "
+              f"{t['cost']:>9.4f}")
+
+    def save(self, path):
+        """Write every call, the summary and the totals as JSON"""
+        with self._lock:
+            calls = list(self.calls)
+        with open(path, "w") as f:
+            json.dump({"totals": self.totals(), "summary": self.summary(), "calls": calls}, f, indent=2, default=str)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
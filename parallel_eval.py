@@ -0,0 +1,252 @@
+"""
+Parallel Candidate Evaluation
+
+Compiling with BootstrapFewShot or MIPRO (problems 2, 3 and 6) scores
+candidates on examples one pair at a time, so compile time is the sum
+of every LM call's latency. ParallelEvaluator runs the
+(candidate, example) pairs concurrently:
+
+- LM calls go to a thread pool (they wait on the network, not the CPU)
+- metrics optionally go to a process pool, for metrics heavy enough
+  to be worth a process (the GIL would serialize them in threads)
+- each provider gets its own token-bucket rate limit
+- calls that fail with a transient error (network, timeout, rate limit,
+  server error) are retried with exponential backoff and full jitter;
+  any other exception is a bug and fails the pair at once
+- scores come back in candidate and example order, however the calls
+  finish
+- each pair runs in a copy of the caller's context, so a surrounding
+  `with dspy.context(lm=...)` reaches the pool threads
+
+    evaluator = ParallelEvaluator(threads=16, rate_limits={"openai": 20})
+    result = evaluator.evaluate({"v1": qa_v1, "v2": qa_v2}, devset, validate_answer)
+    result.scores["v1"]      # one score per devset example, in order (None where the call failed)
+    result.mean("v2"), result.failure_rate("v2"), result.best, result.errors
+
+With threads=N, wall time drops roughly N-fold until the rate limit or
+the provider becomes the bottleneck.
+"""
+
+import sys
+import time
+import random
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from lazy_dspy import dspy
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, bursts up to `burst`"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call may go out"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Errors worth retrying from the LM client libraries, by module. DSPy 3.4+
+# wraps provider errors in its own (the ones its is_retryable_lm_error()
+# accepts); litellm's subclass openai's, but add ServiceUnavailableError
+TRANSIENT_ERROR_NAMES = {
+    "dspy.utils.exceptions": ("LMRateLimitError", "LMTimeoutError", "LMServerError", "LMTransportError",
+                              "LMLockTimeoutError"),
+    "openai": ("RateLimitError", "APIConnectionError", "InternalServerError"),
+    "litellm": ("RateLimitError", "APIConnectionError", "Timeout", "ServiceUnavailableError", "InternalServerError"),
+}
+
+
+def transient_errors():
+    """
+    Exception types a retry may fix: connection errors, timeouts, and the
+    rate-limit / server errors of whichever LM clients are already imported
+    (looked up in sys.modules, so this never imports them).
+    """
+    errors = [ConnectionError, TimeoutError]
+    for module_name, names in TRANSIENT_ERROR_NAMES.items():
+        module = sys.modules.get(module_name)
+        if module is not None:
+            errors.extend(getattr(module, name) for name in names if hasattr(module, name))
+    return tuple(errors)
+
+
+def backoff_delay(attempt, base_delay=0.5, max_delay=30.0, rng=random):
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, base * 2^attempt)]"""
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def call_with_retries(fn, retries=3, base_delay=0.5, max_delay=30.0, retry_on=None, before_call=None):
+    """fn(), retried up to `retries` times on the given exceptions (default: transient_errors())"""
+    for attempt in range(retries + 1):
+        if before_call is not None:
+            before_call()
+        try:
+            return fn()
+        except Exception as e:
+            # Looked up only now: the first call is what imports the LM client
+            retryable = transient_errors() if retry_on is None else retry_on
+            if attempt == retries or not isinstance(e, retryable):
+                raise
+            time.sleep(backoff_delay(attempt, base_delay, max_delay))
+
+
+def provider_of(program):
+    """Provider prefix of the LM a program uses, e.g. "openai" for "openai/gpt-4o-mini" """
+    lm = getattr(program, "lm", None)
+    if lm is None and dspy.is_loaded:
+        lm = dspy.settings.lm
+    model = getattr(lm, "model", None) or "default"
+    return model.split("/", 1)[0] if "/" in model else "default"
+
+
+def _run_metric(metric, example, pred):
+    # Module-level so a process pool can pickle it
+    return float(metric(example, pred))
+
+
+class EvaluationResult:
+    """
+    Ordered scores of every candidate, plus the pairs that failed.
+
+    A failed pair's score is None in `scores`. For ranking it counts as 0:
+    mean() is over every pair, so a candidate that fails 9 of 10 examples
+    can't win on the one it answered. failure_rate() reports the failures
+    separately.
+    """
+
+    def __init__(self, scores, errors, wall_s):
+        self.scores = scores
+        self.errors = errors
+        self.wall_s = wall_s
+
+    def scored(self, name):
+        """The scores of the pairs that didn't fail"""
+        return [score for score in self.scores[name] if score is not None]
+
+    def mean(self, name):
+        """Mean score over every pair, failed ones counting 0; None without any pairs"""
+        scores = self.scores[name]
+        return sum(self.scored(name)) / len(scores) if scores else None
+
+    def failure_rate(self, name):
+        """Share of the candidate's pairs that failed"""
+        scores = self.scores[name]
+        return (len(scores) - len(self.scored(name))) / len(scores) if scores else 0.0
+
+    @property
+    def best(self):
+        """The candidate with the highest mean; None if no pair was scored"""
+        names = [name for name in self.scores if self.scored(name)]
+        return max(self.scores, key=self.mean) if names else None
+
+    @property
+    def calls(self):
+        return sum(len(s) for s in self.scores.values())
+
+
+class ParallelEvaluator:
+    """
+    Scores {name: program} candidates on a dev set concurrently.
+
+    threads: concurrent LM calls
+    processes: metric worker processes (0 = score metrics in the calling thread);
+               the metric, examples and predictions must then be picklable
+    rate_limits: {provider: calls per second}, e.g. {"openai": 20}
+    retries: extra attempts per failed call; a pair that still fails scores None
+             and is listed in result.errors
+    retry_on: exception types to retry (default: transient_errors(), looked up
+              when a call fails, by which time the LM client is imported)
+    """
+
+    def __init__(self, threads=8, processes=0, rate_limits=None, retries=3, base_delay=0.5,
+                 max_delay=30.0, retry_on=None, provider=provider_of):
+        self.threads = threads
+        self.processes = processes
+        self.limiters = {name: RateLimiter(rate) for name, rate in (rate_limits or {}).items()}
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.provider = provider
+
+    def predict(self, program, example):
+        """One prediction, rate-limited and retried"""
+        inputs = example.inputs() if hasattr(example, "inputs") else example
+        limiter = self.limiters.get(self.provider(program))
+        return call_with_retries(
+            lambda: program(**inputs),
+            retries=self.retries,
+            base_delay=self.base_delay,
+            max_delay=self.max_delay,
+            retry_on=self.retry_on,
+            before_call=limiter.acquire if limiter else None,
+        )
+
+    def evaluate(self, candidates, devset, metric):
+        """Score every candidate on every example; returns an EvaluationResult"""
+        start = time.perf_counter()
+        devset = list(devset)
+        names = list(candidates)
+        scores = {name: [None] * len(devset) for name in names}
+        errors = []
+        metric_pool = ProcessPoolExecutor(self.processes) if self.processes else None
+
+        def score_pair(name, position):
+            example = devset[position]
+            pred = self.predict(candidates[name], example)
+            if metric_pool is not None:
+                return metric_pool.submit(_run_metric, metric, example, pred)
+            return _run_metric(metric, example, pred)
+
+        try:
+            with ThreadPoolExecutor(self.threads) as pool:
+                # A fresh copy per pair: dspy.context() overrides live in context
+                # variables, which pool threads don't inherit
+                pending = {
+                    pool.submit(contextvars.copy_context().run, score_pair, name, position): (name, position)
+                    for name in names
+                    for position in range(len(devset))
+                }
+                for future, (name, position) in pending.items():
+                    try:
+                        value = future.result()
+                        if metric_pool is not None:
+                            value = value.result()
+                        scores[name][position] = value
+                    except Exception as e:
+                        errors.append((name, position, e))
+        finally:
+            if metric_pool is not None:
+                metric_pool.shutdown()
+        return EvaluationResult(scores, errors, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    # Offline demo: candidates that "call an LM" by sleeping 50ms
+    def make_candidate(accuracy):
+        def program(question):
+            time.sleep(0.05)
+            return {"correct": random.Random(f"{accuracy}/{question}").random() < accuracy}
+        return program
+
+    devset = [{"question": f"Q{i}"} for i in range(40)]
+    candidates = {f"acc={a}": make_candidate(a) for a in (0.6, 0.8, 0.7)}
+    for threads in (1, 8, 32):
+        result = ParallelEvaluator(threads=threads).evaluate(candidates, devset, lambda ex, pred: pred["correct"])
+        print(f"threads={threads:>2}: {result.calls} calls in {result.wall_s:.2f}s, best {result.best}")
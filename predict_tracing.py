@@ -0,0 +1,288 @@
+"""
+Tracing a Prediction: Format, Call and Parse Timings
+
+`qa(question="What is AI?")` builds a prompt from the signature, formats
+it for the model, calls the API and parses the reply. Tracer records a
+span for each of those steps, so you can see how much of a request is
+spent in DSPy on your machine and how much waiting for the model:
+
+    module    the whole Predict / ChainOfThought / ... call
+    format    the adapter turning signature, demos and inputs into
+              messages (signature rendering happens inside it)
+    lm_call   the LM call, network and provider included
+    parse     the adapter turning the reply back into fields
+
+Tracing is opt-in. Either set DSPY_TRACE and call tracer_from_env():
+
+    DSPY_TRACE=trace.json python INTERACTIVE_DEMO.py
+
+or wrap code yourself:
+
+    with tracing("trace.json") as tracer:
+        qa(question="What is AI?")
+    tracer.print_breakdown()
+
+Traces are written in Chrome trace format (open in chrome://tracing or
+https://ui.perfetto.dev), or as OTLP-JSON for OpenTelemetry tools when
+the file name ends in .otlp.json (or format="otlp"). Requires DSPy 2.6+
+callbacks.
+"""
+
+import os
+import json
+import time
+import atexit
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from lazy_dspy import dspy
+
+SPAN_NAMES = {
+    "module": "module",
+    "adapter_format": "format",
+    "lm": "lm_call",
+    "adapter_parse": "parse",
+}
+
+
+class Span:
+    """One timed step of a prediction"""
+
+    __slots__ = ("span_id", "parent_id", "trace_id", "name", "label", "thread", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, span_id, parent_id, trace_id, name, label, thread, start_ns, attributes):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.trace_id = trace_id
+        self.name = name
+        self.label = label
+        self.thread = thread
+        self.start_ns = start_ns
+        self.end_ns = None
+        self.attributes = attributes
+
+    @property
+    def duration_ns(self):
+        return (self.end_ns or self.start_ns) - self.start_ns
+
+
+class Tracer:
+    """
+    DSPy callback that records module, format, lm_call and parse spans.
+
+    The stack of open spans lives in a context variable, so spans nest per
+    thread and per asyncio task: threaded evaluation and concurrent
+    `acall` predictions each give one clean tree per prediction.
+    """
+
+    def __init__(self, path=None, format=None):
+        self.path = path
+        self.format = format or ("otlp" if path and path.endswith(".otlp.json") else "chrome")
+        self.spans = []
+        self._ids = itertools.count(1)
+        self._open = {}
+        self._lock = threading.Lock()
+        self._stack = contextvars.ContextVar(f"predict_tracing_stack_{id(self)}", default=())
+        # Wall-clock time of perf_counter_ns() == 0, so spans get precise durations and real timestamps
+        self._epoch_ns = time.time_ns() - time.perf_counter_ns()
+
+    def _start(self, kind, call_id, instance, attributes):
+        stack = self._stack.get()
+        parent = stack[-1] if stack else None
+        # os.urandom, not random: tracing must not move the seeded global stream
+        trace_id = parent.trace_id if parent else int.from_bytes(os.urandom(16), "big")
+        label = type(instance).__name__ if kind == "module" else SPAN_NAMES[kind]
+        span = Span(next(self._ids), parent.span_id if parent else None, trace_id, SPAN_NAMES[kind], label,
+                    threading.get_ident(), self._epoch_ns + time.perf_counter_ns(), attributes)
+        self._stack.set(stack + (span,))
+        self._open[call_id] = span
+
+    def _end(self, call_id, exception):
+        span = self._open.pop(call_id, None)
+        if span is None:
+            return
+        span.end_ns = self._epoch_ns + time.perf_counter_ns()
+        if exception is not None:
+            span.attributes["error"] = type(exception).__name__
+        stack = self._stack.get()
+        if span in stack:
+            self._stack.set(stack[:stack.index(span)])
+        with self._lock:
+            self.spans.append(span)
+
+    # -- DSPy callback hooks ------------------------------------------
+
+    def on_module_start(self, call_id, instance, inputs):
+        self._start("module", call_id, instance, {})
+
+    def on_module_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_adapter_format_start(self, call_id, instance, inputs):
+        signature = inputs.get("signature")
+        self._start("adapter_format", call_id, instance, {
+            "adapter": type(instance).__name__,
+            "signature": getattr(signature, "__name__", None) or str(signature),
+            "demos": len(inputs.get("demos") or []),
+        })
+
+    def on_adapter_format_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_lm_start(self, call_id, instance, inputs):
+        self._start("lm", call_id, instance, {"model": str(getattr(instance, "model", ""))})
+
+    def on_lm_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_adapter_parse_start(self, call_id, instance, inputs):
+        self._start("adapter_parse", call_id, instance, {"adapter": type(instance).__name__})
+
+    def on_adapter_parse_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_tool_start(self, call_id, instance, inputs):
+        pass
+
+    def on_tool_end(self, call_id, outputs, exception=None):
+        pass
+
+    def on_evaluate_start(self, call_id, instance, inputs):
+        pass
+
+    def on_evaluate_end(self, call_id, outputs, exception=None):
+        pass
+
+    # -- reports ------------------------------------------------------
+
+    def breakdown(self):
+        """Milliseconds and counts per step, plus the client-side overhead of traced predictions"""
+        with self._lock:
+            spans = list(self.spans)
+        totals = {name: 0.0 for name in SPAN_NAMES.values()}
+        counts = {name: 0 for name in SPAN_NAMES.values()}
+        for span in spans:
+            if span.name == "module" and span.parent_id is not None:
+                continue  # nested modules are already inside their parent's time
+            totals[span.name] += span.duration_ns / 1e6
+            counts[span.name] += 1
+        lm_in_modules = sum(s.duration_ns for s in spans if s.name == "lm_call" and s.parent_id is not None) / 1e6
+        return {"ms": totals, "counts": counts, "client_overhead_ms": max(totals["module"] - lm_in_modules, 0.0)}
+
+    def print_breakdown(self):
+        """Print where the time of all traced predictions went"""
+        result = self.breakdown()
+        total = result["ms"]["module"]
+        print(f"{'Step':<10} {'Count':>6} {'Total':>10} {'Share':>7}")
+        print("-" * 36)
+        for name in ("module", "format", "lm_call", "parse"):
+            ms = result["ms"][name]
+            share = f"{ms / total:.0%}" if total and name != "module" else ""
+            print(f"{name:<10} {result['counts'][name]:>6} {ms:>8.1f}ms {share:>7}")
+        print(f"Client-side overhead (everything but lm_call): {result['client_overhead_ms']:.1f}ms")
+
+    def chrome_trace(self):
+        """Spans as a Chrome trace (complete "X" events, microseconds)"""
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events = [{
+            "name": span.label,
+            "cat": span.name,
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": span.duration_ns / 1000,
+            "pid": pid,
+            "tid": span.thread,
+            "args": dict(span.attributes, span_id=span.span_id, parent_id=span.parent_id),
+        } for span in spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp_trace(self):
+        """Spans as OTLP-JSON (one resourceSpans batch)"""
+        with self._lock:
+            spans = list(self.spans)
+
+        def attribute(key, value):
+            # bool before int: True is an int in Python, but a boolValue in OTLP
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        otlp_spans = []
+        for span in spans:
+            attributes = [attribute("dspy.step", span.name)]
+            attributes += [attribute(f"dspy.{k}", v) for k, v in span.attributes.items()]
+            otlp_span = {
+                "traceId": f"{span.trace_id:032x}",
+                "spanId": f"{span.span_id:016x}",
+                "name": span.label,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                "attributes": attributes,
+                "status": {"code": 2} if "error" in span.attributes else {},
+            }
+            if span.parent_id is not None:
+                otlp_span["parentSpanId"] = f"{span.parent_id:016x}"
+            otlp_spans.append(otlp_span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", "dspy")]},
+            "scopeSpans": [{"scope": {"name": "predict_tracing"}, "spans": otlp_spans}],
+        }]}
+
+    def save(self, path=None):
+        """Write the trace file (Chrome or OTLP-JSON); returns its path"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("no trace file given")
+        trace = self.otlp_trace() if self.format == "otlp" else self.chrome_trace()
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        return path
+
+
+def install(tracer):
+    """Add tracer to the configured DSPy callbacks"""
+    callbacks = list(dspy.settings.get("callbacks") or [])
+    if tracer not in callbacks:
+        dspy.configure(callbacks=callbacks + [tracer])
+    return tracer
+
+
+def uninstall(tracer):
+    """Remove tracer from the configured DSPy callbacks"""
+    callbacks = [c for c in (dspy.settings.get("callbacks") or []) if c is not tracer]
+    dspy.configure(callbacks=callbacks)
+
+
+@contextmanager
+def tracing(path=None, format=None):
+    """Trace DSPy calls inside the block, then write the trace file (if a path is given)"""
+    tracer = install(Tracer(path, format))
+    try:
+        yield tracer
+    finally:
+        uninstall(tracer)
+        if path:
+            tracer.save()
+
+
+def tracer_from_env():
+    """
+    A Tracer installed into DSPy if DSPY_TRACE is set, else None.
+
+    The trace file is written when the process exits.
+    """
+    path = os.getenv("DSPY_TRACE")
+    if not path:
+        return None
+    tracer = install(Tracer(path, os.getenv("DSPY_TRACE_FORMAT")))
+    atexit.register(tracer.save)
+    return tracer
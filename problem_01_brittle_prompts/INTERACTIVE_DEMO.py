@@ -5,9 +5,16 @@ Run this to see exactly what DSPy does at each step.
 """
 
 import os
+import sys
 import dspy
 from dspy.clients import LM
 
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recording_lm import lm_from_env
+from predict_tracing import tracer_from_env
+
 def demo_step_by_step():
     """Interactive demonstration of DSPy concepts"""
     
@@ -45,11 +52,17 @@ class QA(dspy.Signature):
     print("-" * 70)
     
     has_key = os.getenv("OPENAI_API_KEY")
+    # DSPY_LM_RECORDING=<log> records real answers, or replays them without a key
+    replay_lm = None if has_key else lm_from_env()
     if has_key:
         print("✅ API key found! Using real model.")
-        lm = LM(model="openai/gpt-3.5-turbo")
+        lm = lm_from_env(LM(model="openai/gpt-3.5-turbo"))
         dspy.configure(lm=lm)
         print(f"   Model: openai/gpt-3.5-turbo")
+    elif replay_lm is not None:
+        print("✅ Replaying recorded model outputs (no API key needed).")
+        dspy.configure(lm=replay_lm)
+        print(f"   Recording: {replay_lm.path}")
     else:
         print("⚠️  No API key. Using mock mode.")
         print("   (Set OPENAI_API_KEY for real execution)")
@@ -59,6 +72,9 @@ class QA(dspy.Signature):
                 return "AI stands for Artificial Intelligence. It's the simulation of human intelligence by machines."
         dspy.configure(lm=MockLM())
     
+    # DSPY_TRACE=<file> times each step of every prediction (see Step 5)
+    tracer = tracer_from_env()
+    
     print()
     print("💡 Key point: Same code works with ANY model!")
     print("   - OpenAI: LM(model='openai/gpt-3.5-turbo')")
@@ -95,12 +111,12 @@ print(result.answer)
     """)
     print()
     
-    if has_key:
+    if has_key or replay_lm is not None:
         print("🔄 Calling the model...")
         result = qa(question="What is AI?")
         print()
         print("📥 Result:")
-        print(f"   Question: {result.question}")
+        print(f"   Question: What is AI?")
         print(f"   Answer: {result.answer}")
     else:
         print("📥 Result (mock):")
@@ -138,6 +154,15 @@ You didn't have to:
     """)
     print()
     
+    if tracer is not None and tracer.spans:
+        print("⏱️  Where the time went (DSPY_TRACE):")
+        tracer.print_breakdown()
+        print(f"   Full trace: {tracer.path} (written on exit; open in https://ui.perfetto.dev)")
+        print()
+    else:
+        print("💡 Run with DSPY_TRACE=trace.json to time each of these steps.")
+        print()
+    
     # Step 6: Compare with traditional
     print("📊 STEP 6: Comparison")
     print("-" * 70)
@@ -0,0 +1,89 @@
+"""
+Async QA Predictions
+
+`qa(question=...)` blocks until the model answers, so one process sends
+one request at a time. These helpers keep many requests in flight:
+
+    answer = await apredict(qa, question="What is AI?")
+    answers = await gather_predictions(qa, questions, concurrency=16)
+    answers = predict_many(qa, questions)   # same, from sync code
+
+DSPy modules with `acall` (DSPy 2.6+) go through litellm's async client;
+older ones run in a thread. All async calls share one keep-alive HTTP
+connection pool.
+"""
+
+import asyncio
+
+
+# Event loop the shared async client belongs to (httpx clients can't move between loops)
+_client_loop = None
+
+
+def use_pooled_async_client(max_connections=64):
+    """
+    Share one keep-alive async HTTP client between all async LM calls
+    on the running event loop.
+    """
+    global _client_loop
+    try:
+        import httpx
+        import litellm
+    except ImportError:
+        return
+    loop = asyncio.get_running_loop()
+    if _client_loop is loop:
+        return
+    litellm.aclient_session = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    )
+    _client_loop = loop
+
+
+async def close_pooled_async_client():
+    """Close the shared client (call before the event loop ends)"""
+    global _client_loop
+    try:
+        import litellm
+    except ImportError:
+        return
+    client = getattr(litellm, "aclient_session", None)
+    if client is not None and _client_loop is asyncio.get_running_loop():
+        await client.aclose()
+        litellm.aclient_session = None
+        _client_loop = None
+
+
+async def apredict(module, **inputs):
+    """Await one prediction from a DSPy module (e.g. dspy.Predict(QA))"""
+    if hasattr(module, "acall"):
+        return await module.acall(**inputs)
+    return await asyncio.to_thread(module, **inputs)
+
+
+async def gather_predictions(module, questions, concurrency=16, return_exceptions=True):
+    """
+    Answer many questions with at most `concurrency` requests in flight.
+
+    Results come back in the order of `questions`. With return_exceptions
+    a failed request gives its exception instead of cancelling the rest.
+    """
+    use_pooled_async_client(max(concurrency, 1))
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(question):
+        async with limit:
+            return await apredict(module, question=question)
+
+    return await asyncio.gather(*(one(q) for q in questions), return_exceptions=return_exceptions)
+
+
+def predict_many(module, questions, concurrency=16):
+    """Sync wrapper around gather_predictions() for scripts"""
+    async def run():
+        try:
+            return await gather_predictions(module, questions, concurrency)
+        finally:
+            await close_pooled_async_client()
+
+    return asyncio.run(run())
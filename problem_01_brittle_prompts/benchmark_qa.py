@@ -0,0 +1,169 @@
+"""
+QA Benchmark Against the Stub LM Server
+
+Measures the client side of a DSPy QA call - prompt building, HTTP,
+parsing - without network access or API costs. The problem 1 QA
+predictor is run against stub_lm_server.py at several concurrency
+levels, and each level reports latency percentiles and requests/second.
+
+    python benchmark_qa.py
+    python benchmark_qa.py --levels 1,8,32 --requests 500 --latency lognormal --mean-ms 100
+    python benchmark_qa.py --url http://127.0.0.1:8765/v1   # use a stub that's already running
+
+Without DSPy installed, the benchmark falls back to plain HTTP requests
+(--raw), which shows the stub's own overhead.
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from stub_lm_server import start_stub_server, add_stub_arguments, stub_config
+from async_qa import apredict, use_pooled_async_client, close_pooled_async_client
+from compare_approaches import make_qa_signature, percentile, dspy, clients
+
+
+def make_predictor(url):
+    """The problem 1 QA predictor, talking to the stub (no DSPy cache, no retries)"""
+    lm = clients.LM(model="openai/stub", api_base=url, api_key="stub", cache=False, num_retries=0)
+    qa = dspy.Predict(make_qa_signature())
+    qa.lm = lm
+    return qa
+
+
+async def run_level_dspy(qa, questions, concurrency):
+    """Answer all questions with at most `concurrency` in flight; return (latencies, errors)"""
+    use_pooled_async_client(concurrency)
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(question):
+        nonlocal errors
+        async with limit:
+            start = time.perf_counter()
+            try:
+                await apredict(qa, question=question)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    try:
+        await asyncio.gather(*(one(q) for q in questions))
+    finally:
+        await close_pooled_async_client()
+    return latencies, errors
+
+
+def run_level_raw(url, questions, concurrency):
+    """Same as run_level_dspy() with bare HTTP requests, one keep-alive connection per thread"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") + "/chat/completions"
+    local = threading.local()
+    lock = threading.Lock()
+    latencies = []
+    errors = 0
+
+    def one(question):
+        nonlocal errors
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection(parts.hostname, parts.port)
+        body = json.dumps({"model": "stub", "messages": [{"role": "user", "content": question}]})
+        start = time.perf_counter()
+        try:
+            local.conn.request("POST", path, body, {"Content-Type": "application/json"})
+            response = local.conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            local.conn.close()
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, questions))
+    return latencies, errors
+
+
+def benchmark(url, levels, requests, raw=False):
+    """Run every concurrency level; return one result dict per level"""
+    qa = None if raw else make_predictor(url)
+    results = []
+    for concurrency in levels:
+        # Different questions, so nothing is answered from a cache
+        questions = [f"Benchmark question {concurrency}-{i}?" for i in range(requests)]
+        start = time.perf_counter()
+        if raw:
+            latencies, errors = run_level_raw(url, questions, concurrency)
+        else:
+            latencies, errors = asyncio.run(run_level_dspy(qa, questions, concurrency))
+        wall = time.perf_counter() - start
+        results.append({
+            "concurrency": concurrency,
+            "requests": requests,
+            "errors": errors,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "rps": len(latencies) / wall if wall else 0.0,
+        })
+    return results
+
+
+def print_results(results):
+    """Print the per-level table"""
+    print(f"{'Concurrency':>11} {'Requests':>9} {'Errors':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>9}")
+    print("-" * 69)
+    for r in results:
+        print(f"{r['concurrency']:>11} {r['requests']:>9} {r['errors']:>7} "
+              f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms {r['rps']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the QA predictor against a stub LM server")
+    parser.add_argument("--levels", default="1,4,16,64", help="comma-separated concurrency levels (default: 1,4,16,64)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per level (default: 200)")
+    parser.add_argument("--url", help="base URL of a running stub (default: start one in-process)")
+    parser.add_argument("--raw", action="store_true", help="plain HTTP requests instead of DSPy")
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    raw = args.raw or not dspy.available()
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_stub_server(**stub_config(args))
+
+    print("=" * 70)
+    print("⏱️  QA BENCHMARK: client stack against a local stub LM")
+    print("=" * 70)
+    print(f"Server: {url}")
+    print(f"Client: {'plain HTTP' if raw else 'dspy.Predict(QA)'}")
+    if raw and not args.raw:
+        print("⚠️  DSPy not installed - measuring plain HTTP requests instead")
+    if server is not None:
+        print(f"Stub: {args.latency} latency, mean {args.mean_ms:g}ms, error rate {args.error_rate:g}")
+    print()
+
+    try:
+        print_results(benchmark(url, levels, args.requests, raw))
+    finally:
+        if server is not None:
+            server.shutdown()
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,24 @@ Test with your own prompts and see the difference!
 
 import os
 import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    import dspy
-    from dspy.clients import LM
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+# dspy and dspy.clients are only imported when dspy_approach() needs them
+from lazy_dspy import dspy, clients, DSPY_AVAILABLE
+from lm_cache import default_cache, cache_key, render_signature
+from async_qa import apredict, use_pooled_async_client, close_pooled_async_client
+
+if not DSPY_AVAILABLE:
     print("⚠️  DSPy not installed. Install with: pip install dspy-ai")
 
 
@@ -51,6 +59,86 @@ Answer:"""
     }
 
 
+def make_qa_signature():
+    """Define the QA signature (needs dspy, so it's built on first use)"""
+    class QA(dspy.Signature):
+        """Answer questions accurately."""
+        question = dspy.InputField()
+        answer = dspy.OutputField()
+    return QA
+
+
+def use_pooled_http_client(max_connections=32):
+    """
+    Let every OpenAI-compatible call share one keep-alive HTTP client,
+    so repeated questions reuse connections instead of opening new ones.
+    """
+    try:
+        import httpx
+        import litellm
+    except ImportError:
+        return
+    if getattr(litellm, "client_session", None) is None:
+        litellm.client_session = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+
+class QASession:
+    """
+    Everything dspy_approach() needs, built once per process.
+    
+    Holds the QA signature, the configured LM and the Predict instance,
+    so a question only pays for the model call itself.
+    """
+    
+    def __init__(self):
+        self.signature = make_qa_signature()
+        
+        if os.getenv("OPENAI_API_KEY"):
+            self.lm = clients.LM(model="openai/gpt-3.5-turbo")
+        else:
+            self.lm = clients.LM(model="anthropic/claude-3-haiku-20240307")
+        use_pooled_http_client()
+        
+        self.qa = dspy.Predict(self.signature)
+        # Bound to the predictor instead of dspy.configure(), which may only
+        # be called from one thread
+        self.qa.lm = self.lm
+        self.signature_text = render_signature(self.signature)
+    
+    def cache_key(self, question):
+        """Key of this question in the response cache"""
+        return cache_key(self.lm.model, self.signature_text, {"question": question}, self.lm.kwargs)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide QASession, created on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = QASession()
+    return _session
+
+
+def dspy_answer(question, answer, cached=False):
+    """Result dict for a DSPy answer"""
+    result = {
+        "answer": answer,
+        "question": question,
+        "method": "dspy",
+        "model": "configured"
+    }
+    if cached:
+        result["cached"] = True
+    return result
+
+
 def dspy_approach(question):
     """
     DSPy approach: Declarative signatures
@@ -61,34 +149,25 @@ def dspy_approach(question):
             "method": "dspy"
         }
     
-    # Define signature
-    class QA(dspy.Signature):
-        """Answer questions accurately."""
-        question = dspy.InputField()
-        answer = dspy.OutputField()
-    
     # Configure model
     has_key = os.getenv("OPENAI_API_KEY") or os.getenv("ANTHROPIC_API_KEY")
     
     if has_key:
         try:
-            if os.getenv("OPENAI_API_KEY"):
-                lm = LM(model="openai/gpt-3.5-turbo")
-            elif os.getenv("ANTHROPIC_API_KEY"):
-                lm = LM(model="anthropic/claude-3-haiku-20240307")
+            session = get_session()
             
-            dspy.configure(lm=lm)
-            qa = dspy.Predict(QA)
+            # Same model, signature, question and settings → answer from disk
+            cache = default_cache()
+            key = session.cache_key(question)
+            cached = cache.get(key)
+            if cached is not None:
+                return dspy_answer(question, cached["answer"], cached=True)
             
             # Get result
-            result = qa(question=question)
+            result = session.qa(question=question)
+            cache.put(key, {"answer": result.answer})
             
-            return {
-                "answer": result.answer,
-                "question": result.question,
-                "method": "dspy",
-                "model": "configured"
-            }
+            return dspy_answer(question, result.answer)
         except Exception as e:
             return {
                 "error": str(e),
@@ -102,6 +181,35 @@ def dspy_approach(question):
         }
 
 
+async def dspy_approach_async(question):
+    """
+    DSPy approach, awaiting the model instead of blocking
+    
+    Lets one process keep many questions in flight (see batch mode --async).
+    """
+    has_key = os.getenv("OPENAI_API_KEY") or os.getenv("ANTHROPIC_API_KEY")
+    if not DSPY_AVAILABLE or not has_key:
+        # Only the "can't run" results; no model call involved
+        return dspy_approach(question)
+    
+    try:
+        session = get_session()
+        cache = default_cache()
+        key = session.cache_key(question)
+        cached = cache.get(key)
+        if cached is not None:
+            return dspy_answer(question, cached["answer"], cached=True)
+        
+        result = await apredict(session.qa, question=question)
+        cache.put(key, {"answer": result.answer})
+        return dspy_answer(question, result.answer)
+    except Exception as e:
+        return {
+            "error": str(e),
+            "method": "dspy"
+        }
+
+
 def compare_approaches(question, test_traditional=True, test_dspy=True):
     """
     Compare traditional and DSPy approaches side by side
@@ -170,7 +278,10 @@ qa = dspy.Predict(QA)
 result = qa(question="Your question here")
             """)
         else:
-            print("✅ Answer Generated:")
+            if dspy_result.get("cached"):
+                print("✅ Answer Generated (from cache, no API call):")
+            else:
+                print("✅ Answer Generated:")
             print("-" * 80)
             print(f"Question: {dspy_result['question']}")
             print(f"Answer: {dspy_result['answer']}")
@@ -255,14 +366,207 @@ def interactive_mode():
         print()
 
 
-if __name__ == "__main__":
-    import sys
+# How a JSON value read from a questions file is named in a skip warning
+JSON_TYPE_NAMES = {int: "number", float: "number", list: "array", bool: "boolean", type(None): "null"}
+
+
+def read_questions(path, skipped=None):
+    """
+    Stream questions from a JSONL file, one at a time.
+    
+    Each line is {"question": "..."}, a JSON string, or plain text. Other
+    JSON values (numbers, arrays, true/false/null) and objects without a
+    "question" string are skipped with a warning naming their line;
+    (line number, reason) is appended to `skipped` if given.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                item = line
+            if isinstance(item, str):
+                yield item
+                continue
+            if isinstance(item, dict) and isinstance(item.get("question"), str):
+                yield item["question"]
+                continue
+            if isinstance(item, dict):
+                reason = "no \"question\" string"
+            else:
+                reason = f"a JSON {JSON_TYPE_NAMES[type(item)]}, not an object or string"
+            print(f"⚠️  {path}:{line_number}: {reason}, skipping", file=sys.stderr)
+            if skipped is not None:
+                skipped.append((line_number, reason))
+
+
+def compare_one(index, question):
+    """Run both approaches on one question, timing each"""
+    start = time.perf_counter()
+    traditional = traditional_approach(question)
+    traditional_s = time.perf_counter() - start
     
-    if len(sys.argv) > 1:
+    start = time.perf_counter()
+    dspy_result = dspy_approach(question)
+    dspy_s = time.perf_counter() - start
+    
+    return batch_record(index, question, traditional, dspy_result, traditional_s, dspy_s)
+
+
+async def compare_one_async(index, question):
+    """compare_one() with the async DSPy path"""
+    start = time.perf_counter()
+    traditional = traditional_approach(question)
+    traditional_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    dspy_result = await dspy_approach_async(question)
+    dspy_s = time.perf_counter() - start
+    
+    return batch_record(index, question, traditional, dspy_result, traditional_s, dspy_s)
+
+
+def batch_record(index, question, traditional, dspy_result, traditional_s, dspy_s):
+    """One line of the batch results file"""
+    return {
+        "index": index,
+        "question": question,
+        "traditional": traditional,
+        "dspy": dspy_result,
+        "latency_s": {"traditional": round(traditional_s, 6), "dspy": round(dspy_s, 6)},
+    }
+
+
+def run_batch_threaded(questions, concurrency, write_record):
+    """Compare questions on a thread pool, passing records to write_record in order"""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = deque()
+        for index, question in enumerate(questions):
+            if len(in_flight) >= concurrency:
+                write_record(in_flight.popleft().result())
+            in_flight.append(pool.submit(compare_one, index, question))
+        while in_flight:
+            write_record(in_flight.popleft().result())
+
+
+async def run_batch_async(questions, concurrency, write_record):
+    """Compare questions as asyncio tasks, passing records to write_record in order"""
+    use_pooled_async_client(concurrency)
+    try:
+        in_flight = deque()
+        for index, question in enumerate(questions):
+            if len(in_flight) >= concurrency:
+                write_record(await in_flight.popleft())
+            in_flight.append(asyncio.ensure_future(compare_one_async(index, question)))
+        while in_flight:
+            write_record(await in_flight.popleft())
+    finally:
+        await close_pooled_async_client()
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of a list of numbers, nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def batch_mode(path, output_path, concurrency=16, use_async=False):
+    """
+    Compare both approaches over every question in a JSONL file.
+    
+    Questions are read lazily and at most `concurrency` are in flight at
+    once, so memory stays flat for large files. With use_async the DSPy
+    calls are awaited on one event loop instead of using threads.
+    Results are written as JSONL in input order; a latency/throughput
+    summary is printed at the end.
+    """
+    print("=" * 80)
+    print("📦 BATCH COMPARISON MODE")
+    print("=" * 80)
+    print(f"Questions: {path}")
+    print(f"Results: {output_path}")
+    print(f"Concurrency: {concurrency} ({'async' if use_async else 'threads'})")
+    print()
+    
+    latencies = []
+    skipped = []
+    cached = errors = 0
+    start = time.perf_counter()
+    
+    with open(output_path, "w", encoding="utf-8") as out:
+        def write_record(record):
+            nonlocal cached, errors
+            out.write(json.dumps(record) + "\n")
+            latencies.append(record["latency_s"]["dspy"])
+            cached += bool(record["dspy"].get("cached"))
+            errors += "error" in record["dspy"]
+            if len(latencies) % 100 == 0:
+                print(f"  ... {len(latencies)} questions done")
+        
+        questions = read_questions(path, skipped)
+        if use_async:
+            asyncio.run(run_batch_async(questions, concurrency, write_record))
+        else:
+            run_batch_threaded(questions, concurrency, write_record)
+    
+    elapsed = time.perf_counter() - start
+    total = len(latencies)
+    
+    print()
+    print("📊 Batch Summary")
+    print("-" * 80)
+    print(f"  Questions: {total}")
+    print(f"  Wall time: {elapsed:.2f}s")
+    print(f"  Throughput: {total / elapsed if elapsed else 0:.1f} questions/s")
+    print(f"  DSPy latency p50: {percentile(latencies, 50) * 1000:.1f}ms")
+    print(f"  DSPy latency p95: {percentile(latencies, 95) * 1000:.1f}ms")
+    print(f"  DSPy latency max: {max(latencies, default=0) * 1000:.1f}ms")
+    print(f"  Answered from cache: {cached}")
+    print(f"  Errors: {errors}")
+    if skipped:
+        print(f"  Skipped lines: {len(skipped)} (first: line {skipped[0][0]})")
+    print()
+    
+    return {
+        "questions": total,
+        "wall_s": elapsed,
+        "throughput": total / elapsed if elapsed else 0,
+        "cached": cached,
+        "errors": errors,
+        "skipped_lines": [line_number for line_number, _ in skipped],
+    }
+
+
+def parse_args(argv=None):
+    """Command line: a question, --batch FILE, or nothing for interactive mode"""
+    parser = argparse.ArgumentParser(description="Compare the traditional and DSPy approaches")
+    parser.add_argument("question", nargs="*", help="question to compare (interactive mode if omitted)")
+    parser.add_argument("--batch", metavar="FILE", help="compare every question in a file, one per line (JSONL)")
+    parser.add_argument("--concurrency", type=int, default=16, help="batch: questions in flight at once (default: 16)")
+    parser.add_argument("--output", metavar="FILE", help="batch: results JSONL (default: <batch>.results.jsonl)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="batch: await DSPy calls on one event loop")
+    args = parser.parse_args(argv)
+    if args.batch is not None and args.question:
+        parser.error("give either a question or --batch FILE, not both")
+    if args.batch is not None and args.output is None:
+        args.output = os.path.splitext(args.batch)[0] + ".results.jsonl"
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.batch is not None:
+        # Batch mode: every question in a file
+        batch_mode(args.batch, args.output, max(1, args.concurrency), args.use_async)
+    elif args.question:
         # Command line mode: test specific question
-        question = " ".join(sys.argv[1:])
-        compare_approaches(question)
+        compare_approaches(" ".join(args.question))
     else:
         # Interactive mode
         interactive_mode()
-
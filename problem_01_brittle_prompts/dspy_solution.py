@@ -8,11 +8,17 @@ This demonstrates how DSPy solves the brittle prompt problem:
 - Centralized and maintainable
 """
 
-try:
-    import dspy
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# dspy is only imported once a Signature, Predict, ... is actually built
+from lazy_dspy import dspy, DSPY_AVAILABLE
+from recording_lm import lm_from_env
+
+if not DSPY_AVAILABLE:
     print("⚠️  DSPy not installed. Install with: pip install dspy-ai")
     print("   This example will show the structure but won't run.")
 
@@ -32,6 +38,7 @@ def dspy_qa_solution():
     4. Maintainable - centralized signatures
     """
     
+    # dspy itself is only imported below, once there is a model to run it on
     if not DSPY_AVAILABLE:
         print("\n" + "=" * 70)
         print("DSPY SOLUTION: Declarative Signatures")
@@ -65,12 +72,7 @@ print(result.answer)
     print("=" * 70)
     print()
     
-    # Step 1: Define signature declaratively
-    class QA(dspy.Signature):
-        """Answer questions accurately."""
-        question = dspy.InputField()
-        answer = dspy.OutputField()
-    
+    # Step 1: Define signature declaratively (built below, once there is a model)
     print("✅ Step 1: Define signature (declarative)")
     print("   - Define WHAT you want (question → answer)")
     print("   - Framework handles HOW (prompt generation)")
@@ -83,16 +85,27 @@ print(result.answer)
     print()
     
     # Try to use real LM if available
-    import os
     has_api_key = os.getenv("OPENAI_API_KEY") or os.getenv("ANTHROPIC_API_KEY")
+    # Without a key, DSPY_LM_RECORDING can replay real outputs recorded earlier
+    wants_model = has_api_key or os.getenv("DSPY_LM_RECORDING")
     
-    if has_api_key:
+    # The real import: a broken install skips the calls instead of crashing
+    if wants_model and dspy.available():
+        class QA(dspy.Signature):
+            """Answer questions accurately."""
+            question = dspy.InputField()
+            answer = dspy.OutputField()
+        
         try:
             from dspy.clients import LM
             if os.getenv("OPENAI_API_KEY"):
-                lm = LM(model="openai/gpt-3.5-turbo")
+                lm = lm_from_env(LM(model="openai/gpt-3.5-turbo"))
             elif os.getenv("ANTHROPIC_API_KEY"):
-                lm = LM(model="anthropic/claude-3-haiku-20240307")
+                lm = lm_from_env(LM(model="anthropic/claude-3-haiku-20240307"))
+            else:
+                lm = lm_from_env()
+                print(f"✅ Replaying recorded model outputs from {lm.path}")
+                print()
             dspy.configure(lm=lm)
             qa = dspy.Predict(QA)
             
@@ -102,18 +115,40 @@ print(result.answer)
             result = qa(question="What is AI?")
             print(f"Question: What is AI?")
             print(f"Answer: {result.answer}")
+            print()
+            
+            # Step 4: Keep several requests in flight at once - three more calls,
+            # so only in a recorded run (DSPY_LM_RECORDING)
+            if os.getenv("DSPY_LM_RECORDING"):
+                from async_qa import predict_many
+                print("✅ Step 4: Many questions at once (async)")
+                print("-" * 70)
+                questions = ["What is ML?", "What is NLP?", "What is DL?"]
+                for question, result in zip(questions, predict_many(qa, questions, concurrency=3)):
+                    answer = f"(failed: {result})" if isinstance(result, Exception) else result.answer
+                    print(f"Question: {question}")
+                    print(f"Answer: {answer}")
+            else:
+                print("💡 Many questions at once: results = predict_many(qa, questions, concurrency=16)")
         except Exception as e:
             print("⚠️  Error configuring LM:", str(e))
             print("   (This is expected if API keys are invalid)")
     else:
-        print("⚠️  No API keys found. Skipping actual execution.")
-        print("   Set OPENAI_API_KEY or ANTHROPIC_API_KEY for real testing.")
+        if wants_model:
+            print("⚠️  DSPy failed to import. Skipping actual execution.")
+        else:
+            print("⚠️  No API keys found. Skipping actual execution.")
+        print("   Set OPENAI_API_KEY or ANTHROPIC_API_KEY for real testing,")
+        print("   or DSPY_LM_RECORDING=<log> to replay a recorded run.")
         print()
         print("✅ Step 3: Use it (same code, any model)")
         print("-" * 70)
         print("   With API keys, you would run:")
         print("   result = qa(question='What is AI?')")
         print("   print(result.answer)")
+        print()
+        print("   Or many questions at once (async, bounded concurrency):")
+        print("   results = predict_many(qa, questions, concurrency=16)")
     print()
     
     print("✅ Benefits:")
@@ -0,0 +1,88 @@
+"""
+Persistent LM Response Cache
+
+compare_approaches.py asks the model the same questions over and over
+(interactive sessions, repeated command-line runs). This cache keeps
+completions on disk in a small SQLite file, keyed by everything that
+decides the answer:
+
+    (model, rendered signature, inputs, sampling params)
+
+so a repeated question is answered from disk instead of a paid API call.
+Old entries are evicted least-recently-used once the cache grows past
+its entry/size limits, and entries expire after a TTL (sqlite_store.py
+at the repository root).
+
+The cache file is shared by every process that uses it. Location and
+limits can be changed with environment variables:
+
+    LM_CACHE_PATH       (default: ~/.cache/dspy_problems/lm_cache.sqlite)
+    LM_CACHE_TTL        seconds, 0 = never expire (default: 7 days)
+    LM_CACHE_MAX_ITEMS  (default: 10000)
+    LM_CACHE_MAX_MB     (default: 50)
+
+Inspect or clear it with:
+
+    python lm_cache.py stats
+    python lm_cache.py clear
+"""
+
+import os
+import sys
+import json
+import hashlib
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlite_store import SQLiteStore, main
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "dspy_problems", "lm_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ITEMS = 10_000
+DEFAULT_MAX_MB = 50
+
+
+def render_signature(signature):
+    """Text form of a dspy Signature: its instructions and fields"""
+    instructions = getattr(signature, "instructions", "") or ""
+    fields = getattr(signature, "signature", None) or signature.__name__
+    return f"{instructions}\n{fields}"
+
+
+def cache_key(model, signature_text, inputs, params):
+    """Stable hash of everything that decides a completion"""
+    payload = json.dumps(
+        {"model": model, "signature": signature_text, "inputs": inputs, "params": params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LMCache(SQLiteStore):
+    """
+    Size-bounded, LRU-evicted, TTL-expiring cache of LM results in SQLite.
+
+    Values are any JSON-serializable object. Safe to share between
+    threads; several processes can share one file.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_items=DEFAULT_MAX_ITEMS,
+                 max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        super().__init__(path, ttl=ttl, max_items=max_items, max_bytes=max_bytes)
+
+
+_default_cache = None
+
+
+def default_cache():
+    """The shared cache, configured from the LM_CACHE_* environment variables"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LMCache.from_env("LM_CACHE", DEFAULT_PATH, DEFAULT_TTL, DEFAULT_MAX_ITEMS, DEFAULT_MAX_MB)
+    return _default_cache
+
+
+if __name__ == "__main__":
+    sys.exit(main(default_cache()))
@@ -0,0 +1,213 @@
+"""
+Local Stub LM Server
+
+A tiny OpenAI-compatible chat completions server for offline testing and
+benchmarking. It answers in DSPy's chat format, so `dspy.Predict(QA)`
+works against it unchanged, and it can simulate a real provider:
+
+- latency: fixed, uniform, exponential or lognormal around a mean
+- token rate: extra time per generated token, like a streaming model
+- error rate: a share of requests fails with HTTP 500 (or 429)
+
+Run it:
+
+    python stub_lm_server.py --port 8765 --latency lognormal --mean-ms 200
+
+and point DSPy at it:
+
+    lm = LM(model="openai/stub", api_base="http://127.0.0.1:8765/v1", api_key="stub")
+"""
+
+import re
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIELD_MARKER = re.compile(r"\[\[ ## (\w+) ## \]\]")
+
+
+class StubConfig:
+    """How the stub behaves; shared by all request threads"""
+
+    def __init__(self, latency="fixed", mean_ms=0.0, tokens_per_s=0.0, completion_tokens=20,
+                 error_rate=0.0, error_status=500, seed=None):
+        self.latency = latency
+        self.mean_ms = mean_ms
+        self.tokens_per_s = tokens_per_s
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def delay_s(self):
+        """Time to wait before answering one request"""
+        mean = self.mean_ms / 1000
+        with self.lock:
+            if self.latency == "uniform":
+                base = self.random.uniform(0, 2 * mean)
+            elif self.latency == "exponential":
+                base = self.random.expovariate(1 / mean) if mean else 0.0
+            elif self.latency == "lognormal":
+                # sigma 0.5, scaled so the mean is mean_ms
+                sigma = 0.5
+                base = self.random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean else 0.0
+            else:
+                base = mean
+        generation = self.completion_tokens / self.tokens_per_s if self.tokens_per_s else 0.0
+        return base + generation
+
+    def should_fail(self):
+        """Decide whether this request gets an error"""
+        with self.lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            self.errors += failed
+        return failed
+
+
+def output_fields(messages):
+    """Output field names DSPy asks for, e.g. ["answer"]"""
+    last = messages[-1].get("content", "") if messages else ""
+    if isinstance(last, list):  # content parts
+        last = " ".join(part.get("text", "") for part in last if isinstance(part, dict))
+    _, _, instructions = last.rpartition("Respond with")
+    fields = [f for f in FIELD_MARKER.findall(instructions) if f != "completed"]
+    return list(dict.fromkeys(fields)) or ["answer"]
+
+
+def completion_text(messages, config):
+    """A reply in DSPy's chat format with a filler value for every output field"""
+    words = " ".join(["stub"] * max(1, config.completion_tokens - 1))
+    parts = [f"[[ ## {field} ## ]]\nStub {field}: {words}" for field in output_fields(messages)]
+    return "\n\n".join(parts) + "\n\n[[ ## completed ## ]]"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handles /v1/chat/completions and /v1/models"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can pool connections
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        pass  # quiet; benchmarks send thousands of requests
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": "not found"}})
+            return
+
+        config = self.server.config
+        time.sleep(config.delay_s())
+        if config.should_fail():
+            self.send_json(config.error_status, {"error": {"message": "stub error", "type": "server_error"}})
+            return
+
+        messages = request.get("messages", [])
+        text = completion_text(messages, config)
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        completion_tokens = len(text.split())
+        self.send_json(200, {
+            "id": f"stub-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+
+class StubServer(ThreadingHTTPServer):
+    """One thread per connection"""
+
+    daemon_threads = True
+    request_queue_size = 256  # the default (5) drops connections under load
+
+
+def start_stub_server(host="127.0.0.1", port=0, **config):
+    """
+    Start the stub in a background thread.
+
+    Returns (server, base_url); port 0 picks a free port. Stop it with
+    server.shutdown().
+    """
+    server = StubServer((host, port), StubHandler)
+    server.config = StubConfig(**config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def add_stub_arguments(parser):
+    """Command line options for the stub's behavior"""
+    parser.add_argument("--latency", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed",
+                        help="latency distribution (default: fixed)")
+    parser.add_argument("--mean-ms", type=float, default=50.0, help="mean latency in ms (default: 50)")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0,
+                        help="generation speed; adds completion_tokens / rate seconds (default: off)")
+    parser.add_argument("--completion-tokens", type=int, default=20, help="tokens per answer (default: 20)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail (default: 0)")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of failures (default: 500)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for latency and errors")
+
+
+def stub_config(args):
+    """StubConfig keyword arguments from parsed options"""
+    return {
+        "latency": args.latency,
+        "mean_ms": args.mean_ms,
+        "tokens_per_s": args.tokens_per_s,
+        "completion_tokens": args.completion_tokens,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+        "seed": args.seed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.host, args.port, **stub_config(args))
+    print(f"🧪 Stub LM server on {url}")
+    print(f"   LM(model=\"openai/stub\", api_base=\"{url}\", api_key=\"stub\")")
+    print("   Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\n👋 Served {server.config.requests} requests ({server.config.errors} errors)")
@@ -0,0 +1,170 @@
+"""
+Test: Checkpointed, Resumable Compile Against the Stub LM Server
+
+Checks the Checkpoint file and RNG capture offline, then compiles a
+BootstrapFewShot program against stub_lm_server.py with
+resumable_compile(): once straight through, once with a simulated crash
+part-way and a resume. The resumed run must make only the calls the
+crashed one didn't, and resuming a finished run must make none. A
+compile in which every call fails must raise and stay resumable.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lazy_dspy import dspy
+from stub_lm_server import start_stub_server
+from checkpoint import Checkpoint, capture_rngs, restore_rngs, resumable_compile
+
+# Offline: litellm uses its bundled price list instead of fetching one in the background
+os.environ["LITELLM_LOCAL_MODEL_COST_MAP"] = "True"
+
+CRASH_AFTER = 3
+
+
+class Crash(BaseException):
+    """A simulated crash (not an Exception, so the optimizer can't swallow it)"""
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def test_checkpoint_file():
+    """State round-trips through the gzipped file; writes are throttled to the interval"""
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint = Checkpoint(os.path.join(directory, "state.ckpt"), interval=3600)
+        check(checkpoint.load() is None, "no checkpoint before the first save")
+        check(checkpoint.save({"calls": 1}, force=True), "a forced save writes")
+        check(not checkpoint.save({"calls": 2}), "a save within the interval is skipped")
+        check(checkpoint.load() == {"calls": 1}, "load() returns the last written state")
+        checkpoint.remove()
+        check(not checkpoint.exists(), "remove() deletes the checkpoint")
+
+
+def test_rng_restore():
+    """Restored generators replay the same draws"""
+    class Optimizer:
+        seed = 9
+        rng = random.Random(5)
+
+    optimizer = Optimizer()
+    states = capture_rngs(optimizer)
+    first = [random.random(), optimizer.rng.random()]
+    optimizer.seed = 0
+    restore_rngs(states, optimizer)
+    check([random.random(), optimizer.rng.random()] == first and optimizer.seed == 9,
+          "capture_rngs()/restore_rngs() replay random, the optimizer's rng and its seed")
+
+
+def trainset():
+    return [dspy.Example(question=f"What is topic {i}?", answer=f"Topic {i}").with_inputs("question")
+            for i in range(6)]
+
+
+def accept_all(crash_after=None):
+    """A metric that accepts every answer, optionally crashing on call `crash_after`"""
+    calls = []
+
+    def metric(example, pred, trace=None):
+        calls.append(example)
+        if crash_after is not None and len(calls) == crash_after:
+            raise Crash()
+        return True
+    return metric
+
+
+def compile_qa(metric, path, lm, resume=False):
+    """BootstrapFewShot on a QA predictor through resumable_compile()"""
+    optimizer = dspy.BootstrapFewShot(metric=metric, max_bootstrapped_demos=4, max_labeled_demos=0, max_rounds=1)
+    return resumable_compile(optimizer, dspy.Predict("question -> answer"), trainset(), path, resume=resume, lm=lm)
+
+
+def test_resume():
+    """A resumed compile makes only the calls the crashed run didn't"""
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the resume check")
+        return
+    directory = tempfile.mkdtemp()
+    server, url = start_stub_server()
+    lm = dspy.LM(model="openai/stub", api_base=url, api_key="stub", cache=False)
+    try:
+        full = compile_qa(accept_all(), os.path.join(directory, "full.ckpt"), lm)
+        full_calls = server.config.requests
+        check(full_calls > CRASH_AFTER and full.demos, f"uninterrupted compile: {full_calls} calls")
+
+        path = os.path.join(directory, "resumed.ckpt")
+        try:
+            compile_qa(accept_all(CRASH_AFTER), path, lm)
+            crashed = False
+        except Crash:
+            crashed = True
+        crashed_calls = server.config.requests - full_calls
+        check(crashed and crashed_calls == CRASH_AFTER, f"crashed after {crashed_calls} calls")
+
+        resumed = compile_qa(accept_all(), path, lm, resume=True)
+        resumed_calls = server.config.requests - full_calls - crashed_calls
+        check(crashed_calls + resumed_calls == full_calls,
+              f"resume made only the missing calls ({resumed_calls} of {full_calls})")
+        check(Checkpoint(path).load()["replayed"] == crashed_calls, "the crashed run's calls came from the journal")
+        check(len(resumed.demos) == len(full.demos), "resumed compile bootstraps the same demos")
+
+        before = server.config.requests
+        done = compile_qa(accept_all(), path, lm, resume=True)
+        check(server.config.requests == before and len(done.demos) == len(full.demos),
+              "resuming a finished run loads the program without a call")
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(directory)
+
+
+def test_all_failed():
+    """A compile where every call fails raises and isn't marked done"""
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the failed-compile check")
+        return
+    directory = tempfile.mkdtemp()
+    server, url = start_stub_server(error_rate=1.0)
+    lm = dspy.LM(model="openai/stub", api_base=url, api_key="stub", cache=False, num_retries=0)
+    path = os.path.join(directory, "failed.ckpt")
+    try:
+        try:
+            compile_qa(accept_all(), path, lm)
+            raised = False
+        except RuntimeError:
+            raised = True
+        done = Checkpoint(path).load()["done"]
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(directory)
+    check(raised, "a compile with only failed predictions raises RuntimeError")
+    check(not done, "and is left resumable")
+
+
+if __name__ == "__main__":
+    if dspy.available():
+        # Every call reaches the stub or the journal, never DSPy's own response cache
+        dspy.configure_cache(enable_disk_cache=False, enable_memory_cache=False)
+    test_checkpoint_file()
+    test_rng_restore()
+    test_resume()
+    test_all_failed()
+    print()
+    print("✅ Checkpointed compiles resume without repeating calls")
@@ -0,0 +1,125 @@
+"""
+Test: Early-Stopping Candidate Evaluation
+
+Scores synthetic candidates (a fixed right/wrong pattern per example,
+no LM) with EarlyStoppingEvaluator and checks that exact mode picks the
+same winner as scoring every candidate on every example while skipping
+calls, that the confidence bound stops earlier still, and that over
+shuffled devsets it stops a better candidate less often than its
+confidence level allows.
+
+Exits non-zero on the first failure.
+"""
+
+import sys
+import random
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from early_stopping import EarlyStoppingEvaluator
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def make_candidate(accuracy, calls):
+    """A program that is right on a fixed share of questions and counts its calls"""
+    def program(question):
+        calls.append(question)
+        return {"correct": random.Random(f"{accuracy}/{question}").random() < accuracy}
+    return program
+
+
+def metric(example, pred):
+    return pred["correct"]
+
+
+def full_scores(candidates, devset):
+    """Mean score of every candidate on every example"""
+    return {name: sum(metric(ex, program(**ex)) for ex in devset) / len(devset)
+            for name, program in candidates.items()}
+
+
+def test_exact_mode():
+    """Exact mode stops hopeless candidates without changing the winner"""
+    devset = [{"question": f"Q{i}"} for i in range(60)]
+    skipped = 0
+    for seed in range(20):
+        rng = random.Random(seed)
+        calls = []
+        candidates = {f"c{i}": make_candidate(round(rng.uniform(0.2, 0.9), 2), calls) for i in range(6)}
+        scores = full_scores(candidates, devset)
+        expected = max(scores, key=scores.get)
+        calls.clear()
+        evaluator = EarlyStoppingEvaluator(devset, metric)
+        best = evaluator.evaluate_all(candidates)
+        if best != expected:
+            check(False, f"seed {seed}: exact mode picks the full evaluation's winner",
+                  f"early stopping: {best}, full: {expected}, scores: {scores}")
+        if len(calls) != evaluator.calls or evaluator.calls + evaluator.skipped != len(devset) * len(candidates):
+            check(False, f"seed {seed}: every example is either called or skipped",
+                  f"calls {len(calls)}, counted {evaluator.calls}, skipped {evaluator.skipped}")
+        skipped += evaluator.skipped
+    check(True, "exact mode picks the full evaluation's winner (20 seeds)")
+    check(skipped > 0, f"exact mode skipped {skipped} calls across them")
+
+
+def test_skips_calls():
+    """A clearly worse candidate after a strong one is stopped"""
+    devset = [{"question": f"Q{i}"} for i in range(100)]
+    calls = []
+    candidates = {"strong": make_candidate(0.95, calls), "weak": make_candidate(0.1, calls)}
+    exact = EarlyStoppingEvaluator(devset, metric)
+    check(exact.evaluate_all(candidates) == "strong", "the strong candidate wins")
+    check(exact.stats["weak"].stopped and exact.skipped > 0, f"exact mode skipped {exact.skipped} calls")
+
+    confident = EarlyStoppingEvaluator(devset, metric, confidence=0.95)
+    check(confident.evaluate_all(candidates) == "strong", "confidence mode picks the same winner")
+    check(confident.skipped > exact.skipped,
+          f"confidence mode skips more ({confident.skipped} vs {exact.skipped})")
+
+
+def test_confidence_error_rate():
+    """Shuffled devsets: a candidate that would finish ahead is stopped at most 5% of the time"""
+    n = 200
+    best_right = set(range(120))                                 # finishes at 0.60
+    close_right = set(range(60)) | set(range(120, 190))          # finishes at 0.65
+    candidates = {
+        "best": lambda question: {"correct": question in best_right},
+        "close": lambda question: {"correct": question in close_right},
+    }
+    trials, stopped = 400, 0
+    for trial in range(trials):
+        order = list(range(n))
+        random.Random(trial).shuffle(order)
+        evaluator = EarlyStoppingEvaluator([{"question": q} for q in order], metric, confidence=0.95)
+        evaluator.evaluate_all(candidates)
+        stopped += evaluator.stats["close"].stopped
+    check(stopped / trials <= 0.05, f"the better candidate was stopped in {stopped} of {trials} runs")
+
+
+def test_bad_confidence():
+    try:
+        EarlyStoppingEvaluator([], metric, confidence=1.0)
+        raised = False
+    except ValueError:
+        raised = True
+    check(raised, "confidence outside (0, 1) raises ValueError")
+
+
+if __name__ == "__main__":
+    test_exact_mode()
+    test_skips_calls()
+    test_confidence_error_rate()
+    test_bad_confidence()
+    print()
+    print("✅ Early stopping works")
@@ -0,0 +1,127 @@
+"""
+Test: Evaluation Memo
+
+Checks that metric ids tell apart metrics that compute different things
+(closures over different values, default arguments, bound methods and
+callable objects with different settings) and stay the same for equal
+ones, and - with DSPy installed - that EvalMemo.evaluate() predicts with
+the LM its entry is keyed by, so an lm= override never caches another
+LM's answer.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lazy_dspy import dspy
+from eval_memo import EvalMemo, metric_id, metric_fingerprint
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def make_threshold(threshold):
+    def metric(example, pred, trace=None):
+        return len(pred.answer) > threshold
+    return metric
+
+
+def with_default(example, pred, trace=None, threshold=0):
+    return len(pred.answer) > threshold
+
+
+class Scorer:
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self._seen = {}  # a cache, not configuration
+
+    def __call__(self, example, pred, trace=None):
+        return len(pred.answer) > self.threshold
+
+    def score(self, example, pred, trace=None):
+        return len(pred.answer) > self.threshold
+
+
+def test_metric_ids():
+    """Metrics that compute different things never share an id"""
+    example = {"question": "What is AI?"}
+    check(metric_id(make_threshold(0), example) != metric_id(make_threshold(5), example),
+          "closures over different values get different ids")
+    check(metric_id(make_threshold(3), example) == metric_id(make_threshold(3), example),
+          "closures over equal values share an id")
+    with_other_default = type(with_default)(with_default.__code__, with_default.__globals__, "with_default", (None, 5))
+    check(metric_fingerprint(with_default) != metric_fingerprint(with_other_default),
+          "different default arguments get different ids")
+    check(metric_fingerprint(Scorer(0).score) != metric_fingerprint(Scorer(5).score),
+          "bound methods of differently configured objects get different ids")
+    check(metric_fingerprint(Scorer(0)) != metric_fingerprint(Scorer(5)),
+          "callable objects with different settings get different ids")
+    scorer = Scorer(2)
+    before = metric_fingerprint(scorer)
+    scorer._seen[id(scorer)] = True
+    check(metric_fingerprint(scorer) == before, "underscore attributes (caches) don't change the id")
+
+    lock = threading.Lock()
+
+    def locked(example, pred, trace=None):
+        with lock:
+            return True
+    try:
+        metric_fingerprint(locked)
+        raised = False
+    except TypeError:
+        raised = True
+    check(raised, "a metric closing over unhashable state raises TypeError")
+    check("@locked-v1:" in metric_id(locked, example, metric_key="locked-v1"), "metric_key names such a metric instead")
+
+
+def test_lm_override():
+    """evaluate(..., lm=B) predicts with B, and caches B's answer under B"""
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the EvalMemo.evaluate checks")
+        return
+    from dspy.utils import DummyLM
+
+    lm_a = DummyLM([{"answer": "from A"}] * 10)
+    lm_b = DummyLM([{"answer": "from model B"}] * 10)
+    lm_b.model = "dummy-b"
+    predictor = dspy.Predict("question -> answer")
+    predictor.lm = lm_a
+    example = dspy.Example(question="What is AI?", answer="AI").with_inputs("question")
+
+    def answered_by_b(example, pred, trace=None):
+        return pred.answer == "from model B"
+
+    with tempfile.TemporaryDirectory() as directory:
+        memo = EvalMemo(os.path.join(directory, "memo.sqlite"))
+        check(memo.evaluate(predictor, example, answered_by_b, lm=lm_b) is True,
+              "lm=B predicts with B, not the predictor's own LM")
+        check(memo.evaluate(predictor, example, answered_by_b) is False, "without lm= the predictor's LM answers")
+        calls = len(lm_b.history)
+        check(memo.evaluate(predictor, example, answered_by_b, lm=lm_b) is True and len(lm_b.history) == calls,
+              "B's answer is cached under B")
+
+        strict, lenient = make_threshold(100), make_threshold(0)
+        check(memo.evaluate(predictor, example, strict) is False and memo.evaluate(predictor, example, lenient) is True,
+              "closures over different thresholds are scored separately")
+
+
+if __name__ == "__main__":
+    test_metric_ids()
+    test_lm_override()
+    print()
+    print("✅ Evaluation memo keys are sound")
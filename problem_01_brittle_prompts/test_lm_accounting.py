@@ -0,0 +1,137 @@
+"""
+Test: LM Call Accounting Against the Stub LM Server
+
+Runs Predict calls through UsageTracker against stub_lm_server.py and
+checks the token counts against what the stub reports for the messages
+DSPy sent (prompt: words in the messages; completion: words in the
+reply), the module / signature / round tags, the price-table cost, a
+failed call, and the saved JSON.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lazy_dspy import dspy
+from stub_lm_server import start_stub_server, StubConfig, completion_text
+from lm_accounting import UsageTracker, estimate_cost
+
+# Offline: litellm uses its bundled price list instead of fetching one in the background
+os.environ["LITELLM_LOCAL_MODEL_COST_MAP"] = "True"
+
+# USD per 1M tokens for the stub, so costs are easy to check
+STUB_PRICES = {"stub": (1.0, 2.0)}
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def test_estimate_cost():
+    """The price table is per 1M tokens and keyed by the model without its provider"""
+    check(abs(estimate_cost("openai/gpt-4o-mini", 1_000_000, 1_000_000) - 0.75) < 1e-9,
+          "gpt-4o-mini: $0.15 + $0.60 per 1M prompt + completion tokens")
+    check(estimate_cost("openai/unknown-model", 1000, 1000) == 0.0, "unknown models cost 0")
+
+
+def stub_usage(messages):
+    """(prompt, completion) tokens as stub_lm_server.py counts them"""
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+    return prompt_tokens, len(completion_text(messages, StubConfig()).split())
+
+
+def test_usage_tracker():
+    """Calls against the stub are counted, tagged and priced"""
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the UsageTracker checks")
+        return
+
+    class QA(dspy.Signature):
+        """Answer questions accurately."""
+        question = dspy.InputField()
+        answer = dspy.OutputField()
+
+    server, url = start_stub_server()
+    lm = dspy.LM(model="openai/stub", api_base=url, api_key="stub", cache=False)
+    tracker = UsageTracker(prices=STUB_PRICES)
+    try:
+        with dspy.context(lm=lm, callbacks=[tracker]):
+            with tracker.round("first"):
+                dspy.Predict(QA)(question="What is AI?")
+                dspy.Predict(QA)(question="What is ML?")
+            with tracker.round("second"):
+                dspy.Predict(QA)(question="What is natural language processing?")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    totals = tracker.totals()
+    check(totals["calls"] == server.config.requests == 3, f"{totals['calls']} calls tracked, 3 sent")
+    expected = [stub_usage(entry["messages"]) for entry in lm.history]
+    prompt_tokens = sum(p for p, _ in expected)
+    completion_tokens = sum(c for _, c in expected)
+    check(totals["prompt_tokens"] == prompt_tokens, f"prompt tokens match the stub ({prompt_tokens})",
+          json.dumps(totals))
+    check(totals["completion_tokens"] == completion_tokens, f"completion tokens match the stub ({completion_tokens})",
+          json.dumps(totals))
+    cost = estimate_cost("stub", prompt_tokens, completion_tokens, STUB_PRICES)
+    check(abs(totals["cost"] - cost) < 1e-12, f"cost comes from the price table (${cost:.6f})", json.dumps(totals))
+
+    rounds = {group["round"]: group for group in tracker.summary()}
+    check(sorted(rounds) == ["first", "second"] and rounds["first"]["calls"] == 2 and rounds["second"]["calls"] == 1,
+          "calls are tagged with their round", json.dumps(tracker.summary(), default=str))
+    check(all(g["module"] == "Predict" and g["signature"] == "QA" for g in rounds.values()),
+          "calls are tagged with their module and signature", json.dumps(tracker.summary(), default=str))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "usage.json")
+        tracker.save(path)
+        with open(path) as f:
+            saved = json.load(f)
+    check(saved["totals"] == totals and len(saved["calls"]) == 3, "save() writes the calls and totals")
+
+
+def test_failed_call():
+    """A call that fails is still accounted for, as an error"""
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the failed-call check")
+        return
+    server, url = start_stub_server(error_rate=1.0)
+    lm = dspy.LM(model="openai/stub", api_base=url, api_key="stub", cache=False, num_retries=0)
+    tracker = UsageTracker(prices=STUB_PRICES)
+    try:
+        with dspy.context(lm=lm, callbacks=[tracker]):
+            try:
+                dspy.Predict("question -> answer")(question="What is AI?")
+            except Exception:
+                pass
+    finally:
+        server.shutdown()
+        server.server_close()
+    errors = sum(group["errors"] for group in tracker.summary())
+    check(tracker.totals()["calls"] >= 1 and errors == tracker.totals()["calls"],
+          "failed calls are recorded as errors", json.dumps(tracker.calls, default=str))
+
+
+if __name__ == "__main__":
+    if dspy.available():
+        # Every call reaches the stub, never DSPy's own response cache
+        dspy.configure_cache(enable_disk_cache=False, enable_memory_cache=False)
+    test_estimate_cost()
+    test_usage_tracker()
+    test_failed_call()
+    print()
+    print("✅ LM accounting matches the stub's usage")
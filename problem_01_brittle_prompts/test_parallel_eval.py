@@ -0,0 +1,122 @@
+"""
+Test: Parallel Candidate Evaluation
+
+Scores synthetic candidates (no LM) with ParallelEvaluator and checks
+that failed pairs count as 0 when ranking, so a candidate that fails
+most examples can't win on the few it answered, that failure rates are
+reported separately, and that only transient errors are retried -
+with DSPy installed, including a server error from stub_lm_server.py.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lazy_dspy import dspy
+from stub_lm_server import start_stub_server
+from parallel_eval import ParallelEvaluator
+
+# Offline: litellm uses its bundled price list instead of fetching one in the background
+os.environ["LITELLM_LOCAL_MODEL_COST_MAP"] = "True"
+
+DEVSET = [{"question": f"Q{i}"} for i in range(10)]
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def metric(example, pred):
+    return pred["score"]
+
+
+def steady(score):
+    def program(question):
+        return {"score": score}
+    return program
+
+
+def flaky(error):
+    """Perfect on Q0, raises `error` on every other question"""
+    def program(question):
+        if question != "Q0":
+            raise error
+        return {"score": 1.0}
+    return program
+
+
+def test_failures_rank_as_zero():
+    """A candidate failing 9/10 loses to a steady 0.5"""
+    evaluator = ParallelEvaluator(threads=4, retries=0)
+    result = evaluator.evaluate({"steady": steady(0.5), "flaky": flaky(ConnectionError("down"))}, DEVSET, metric)
+    check(result.best == "steady", f"the steady candidate wins (best: {result.best})")
+    check(result.mean("flaky") == 0.1 and result.mean("steady") == 0.5, "mean() counts failed pairs as 0")
+    check(result.failure_rate("flaky") == 0.9 and result.failure_rate("steady") == 0.0, "failure_rate() reports them")
+    check(len(result.errors) == 9 and result.scores["flaky"][1] is None, "failed pairs score None and are listed")
+
+
+def test_retry_on_transient_only():
+    """Connection errors are retried; a TypeError fails at once"""
+    calls = []
+
+    def program(question):
+        calls.append(question)
+        raise TypeError("bad argument")
+
+    evaluator = ParallelEvaluator(threads=1, retries=3, base_delay=0)
+    evaluator.evaluate({"buggy": program}, DEVSET[:1], metric)
+    check(len(calls) == 1, f"a TypeError is not retried ({len(calls)} calls)")
+
+    calls.clear()
+    attempts = iter([ConnectionError("reset"), TimeoutError("slow"), None])
+
+    def recovers(question):
+        calls.append(question)
+        error = next(attempts)
+        if error is not None:
+            raise error
+        return {"score": 1.0}
+
+    result = evaluator.evaluate({"recovers": recovers}, DEVSET[:1], metric)
+    check(len(calls) == 3 and result.scores["recovers"] == [1.0], "connection errors and timeouts are retried")
+
+
+def test_retry_lm_server_error():
+    """A failing LM call through DSPy is retried as transient"""
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the LM retry check")
+        return
+    server, url = start_stub_server(error_rate=1.0)
+    qa = dspy.Predict("question -> answer")
+    qa.lm = dspy.LM(model="openai/stub", api_base=url, api_key="stub", cache=False, num_retries=0)
+    try:
+        evaluator = ParallelEvaluator(threads=1, retries=2, base_delay=0)
+        result = evaluator.evaluate({"qa": qa}, [dspy.Example(question="What is AI?").with_inputs("question")],
+                                    lambda example, pred: 1.0)
+    finally:
+        server.shutdown()
+        server.server_close()
+    check(server.config.requests == 3 and len(result.errors) == 1,
+          f"a server error is retried ({server.config.requests} requests for retries=2)")
+
+
+if __name__ == "__main__":
+    if dspy.available():
+        # Every call reaches the stub, never DSPy's own response cache
+        dspy.configure_cache(enable_disk_cache=False, enable_memory_cache=False)
+    test_failures_rank_as_zero()
+    test_retry_on_transient_only()
+    test_retry_lm_server_error()
+    print()
+    print("✅ Parallel evaluation ranks and retries soundly")
@@ -0,0 +1,92 @@
+"""
+Test: Prediction Tracing
+
+Checks that OTLP attributes keep their types (booleans as boolValue,
+not intValue) and - with DSPy installed - that concurrent async `acall`
+predictions each get their own span tree: every format / lm_call /
+parse span sits under the module span of its own prediction.
+
+Exits non-zero on the first failure.
+"""
+
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lazy_dspy import dspy
+from predict_tracing import Tracer
+
+CONCURRENT = 8
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def test_otlp_attributes():
+    """Attribute values are exported with their OTLP types"""
+    tracer = Tracer()
+    tracer._start("lm", 1, None, {"cached": True, "retries": 2, "temperature": 0.5, "model": "stub"})
+    tracer._end(1, None)
+    span = tracer.otlp_trace()["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    values = {a["key"]: a["value"] for a in span["attributes"]}
+    check(values["dspy.cached"] == {"boolValue": True}, "True exports as boolValue", json.dumps(values))
+    check(values["dspy.retries"] == {"intValue": "2"}, "ints export as intValue strings")
+    check(values["dspy.temperature"] == {"doubleValue": 0.5}, "floats export as doubleValue")
+    check(values["dspy.model"] == {"stringValue": "stub"}, "strings export as stringValue")
+
+
+def test_async_nesting():
+    """Concurrent acall predictions don't nest under each other"""
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the async nesting check")
+        return
+    from dspy.utils import DummyLM
+
+    class SlowLM(DummyLM):
+        """Yields to the event loop mid-call, so the predictions interleave"""
+
+        async def acall(self, *args, **kwargs):
+            await asyncio.sleep(0.01)
+            return self(*args, **kwargs)
+
+    tracer = Tracer()
+    qa = dspy.Predict("question -> answer")
+
+    async def ask_all():
+        with dspy.context(lm=SlowLM([{"answer": "AI"}] * CONCURRENT), callbacks=[tracer]):
+            await asyncio.gather(*(qa.acall(question=f"What is topic {i}?") for i in range(CONCURRENT)))
+
+    asyncio.run(ask_all())
+    spans = {span.span_id: span for span in tracer.spans}
+    modules = [span for span in spans.values() if span.name == "module"]
+    check(len(modules) == CONCURRENT and all(span.parent_id is None for span in modules),
+          f"{CONCURRENT} root module spans, none nested in another prediction")
+    steps = [span for span in spans.values() if span.name != "module"]
+    check(steps and all(spans[span.parent_id].name == "module" for span in steps),
+          "every format / lm_call / parse span's parent is a module span")
+    per_module = {span.span_id: 0 for span in modules}
+    for span in steps:
+        per_module[span.parent_id] += 1
+    check(len(set(per_module.values())) == 1, "each prediction has the same steps under it", repr(per_module))
+    check(all(span.trace_id == spans[span.parent_id].trace_id for span in steps),
+          "steps share their prediction's trace id")
+
+
+if __name__ == "__main__":
+    if dspy.available():
+        dspy.configure_cache(enable_disk_cache=False, enable_memory_cache=False)
+    test_otlp_attributes()
+    test_async_nesting()
+    print()
+    print("✅ Prediction tracing works")
@@ -0,0 +1,137 @@
+"""
+Test: Record Against the Stub LM Server, Replay Offline
+
+Records real DSPy calls (sync and async) against stub_lm_server.py with
+RecordingLM, shuts the server down, and replays them. Then records every
+problem's dspy_solution.py the same way and checks that each replays
+offline, with no API key, to the same output. The scripts run in this
+process (script_worker.run_in_process), so litellm is imported once.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lazy_dspy import dspy
+from stub_lm_server import start_stub_server
+from script_worker import run_in_process
+
+PROVIDER_KEYS = ("OPENAI_API_KEY", "ANTHROPIC_API_KEY")
+
+# Offline: litellm uses its bundled price list instead of fetching one in the background
+os.environ["LITELLM_LOCAL_MODEL_COST_MAP"] = "True"
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def model_output(stdout):
+    """The lines of a script's output that come from the model"""
+    return [line for line in stdout.splitlines()
+            if line.strip().startswith(("Answer", "Examples selected", "Unoptimized", "Baseline accuracy", "Bandit", "Search"))]
+
+
+def test_record_then_replay(log_path):
+    """Predict calls recorded against the stub come back from the log once it is gone"""
+    from recording_lm import RecordingLM, ReplayMiss
+
+    class QA(dspy.Signature):
+        """Answer questions accurately."""
+        question = dspy.InputField()
+        answer = dspy.OutputField()
+
+    server, url = start_stub_server()
+    model = dspy.LM(model="openai/stub", api_base=url, api_key="stub", cache=False)
+    recorder = RecordingLM(log_path, model, mode="record")
+    with dspy.context(lm=recorder):
+        recorded = dspy.Predict(QA)(question="What is AI?").answer
+        recorded_async = asyncio.run(dspy.Predict(QA).acall(question="What is ML?")).answer
+        dspy.Predict(QA)(question="What is DL?")
+        recorder.copy(temperature=1.0)(messages=[{"role": "user", "content": "What is NLP?"}])
+    server.shutdown()
+    server.server_close()
+    check(server.config.requests == 4 and recorder.recorded == 4, "4 calls recorded (sync, async and through copy())")
+
+    replayer = RecordingLM(log_path, mode="replay")
+    with dspy.context(lm=replayer):
+        check(dspy.Predict(QA)(question="What is AI?").answer == recorded, "sync call replayed offline")
+        replayed_async = asyncio.run(dspy.Predict(QA).acall(question="What is ML?")).answer
+        check(replayed_async == recorded_async, "async call replayed offline")
+        check(replayer.history[-1]["usage"].get("completion_tokens", 0) > 0, "replayed calls keep their token usage")
+        try:
+            dspy.Predict(QA)(question="What is NLP?")
+            missed = False
+        except ReplayMiss:
+            missed = True
+        check(missed, "an unrecorded call raises ReplayMiss")
+    copy = replayer.copy(temperature=1.0)
+    copy(messages=[{"role": "user", "content": "What is NLP?"}])
+    check(replayer.hits == 3, "copies replay from (and count into) the same log")
+
+
+def run_scripts(scripts, env, log_dir):
+    """Run scripts as __main__ in this process, one log each; {script: (returncode, output)}"""
+    results = {}
+    saved_environ = dict(os.environ)
+    for script in scripts:
+        os.environ.update(env, DSPY_LM_RECORDING=os.path.join(log_dir, f"{script.parent.name}.lmlog"))
+        try:
+            returncode, stdout, stderr = run_in_process(script)
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_environ)
+        results[script] = (returncode, stdout + stderr)
+    return results
+
+
+def test_solution_scripts(log_dir):
+    """Every dspy_solution.py, recorded against the stub, replays offline to the same output"""
+    scripts = sorted(ROOT.glob("problem_*/dspy_solution.py"))
+    server, url = start_stub_server()
+    try:
+        recorded = run_scripts(scripts, {"OPENAI_API_KEY": "stub", "OPENAI_API_BASE": url, "OPENAI_BASE_URL": url,
+                                         "DSPY_LM_RECORDING_MODE": "record"}, log_dir)
+    finally:
+        server.shutdown()
+        server.server_close()
+    for script in scripts:
+        returncode, output = recorded[script]
+        check(returncode == 0 and model_output(output), f"{script.parent.name}: recorded", output)
+
+    replayed = run_scripts(scripts, {}, log_dir)
+    for script in scripts:
+        returncode, output = replayed[script]
+        check(returncode == 0 and "⚠️  Error" not in output, f"{script.parent.name}: replayed offline", output)
+        check(model_output(output) == model_output(recorded[script][1]), f"{script.parent.name}: same model output",
+              output)
+
+
+if __name__ == "__main__":
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the record/replay test")
+        sys.exit(0)
+    for key in PROVIDER_KEYS:
+        os.environ.pop(key, None)
+    # Every call reaches the stub or the log, never DSPy's own response cache
+    dspy.configure_cache(enable_disk_cache=False, enable_memory_cache=False)
+    # Loaded once here, not by (and dropped after) every script
+    import litellm  # noqa: F401
+    with tempfile.TemporaryDirectory() as directory:
+        test_record_then_replay(os.path.join(directory, "calls.lmlog"))
+        test_solution_scripts(directory)
+    print()
+    print("✅ Record → replay works offline")
@@ -4,11 +4,18 @@ Problem 2: DSPy Solution - Automatic Example Selection
 DSPy automatically finds best few-shot examples through optimization.
 """
 
-try:
-    import dspy
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# dspy is only imported once a Signature, Predict, ... is actually built
+from lazy_dspy import dspy, DSPY_AVAILABLE
+from recording_lm import configured_lm
+from answer_metric import AnswerMetric
+
+if not DSPY_AVAILABLE:
     print("⚠️  DSPy not installed. Install with: pip install dspy-ai")
 
 
@@ -20,6 +27,7 @@ def dspy_few_shot_solution():
     print("=" * 70)
     print()
     
+    # dspy itself is only imported below, once there is a model to run it on
     if not DSPY_AVAILABLE:
         print("✅ Code structure (would work with DSPy):")
         print()
@@ -52,40 +60,30 @@ optimized_qa = optimizer.compile(student=QA, trainset=trainset)
         """)
         return
     
-    # Step 1: Define signature
-    class QA(dspy.Signature):
-        """Answer questions accurately."""
-        question = dspy.InputField()
-        answer = dspy.OutputField()
-    
+    # Step 1: Define signature (built with the trainset below, once there is a model)
     print("✅ Step 1: Define signature")
     print()
     
-    # Step 2: Define metric
-    def validate_answer(example, pred, trace=None):
-        """Metric: answer should contain expected answer"""
-        expected = example.answer.lower()
-        actual = pred.answer.lower()
-        return expected in actual or actual in expected
-    
-    print("✅ Step 2: Define metric")
-    print("   - Framework uses this to measure quality")
-    print("   - Automatically selects examples that improve metric")
-    print()
-    
-    # Step 3: Prepare examples
-    trainset = [
-        dspy.Example(question="What is AI?", answer="AI is Artificial Intelligence"),
-        dspy.Example(question="What is ML?", answer="ML is Machine Learning"),
-        dspy.Example(question="What is NLP?", answer="NLP is Natural Language Processing"),
-        dspy.Example(question="What is DL?", answer="DL is Deep Learning"),
+    # Step 2: Prepare examples
+    pairs = [
+        ("What is AI?", "AI is Artificial Intelligence"),
+        ("What is ML?", "ML is Machine Learning"),
+        ("What is NLP?", "NLP is Natural Language Processing"),
+        ("What is DL?", "DL is Deep Learning"),
     ]
     
-    print("✅ Step 3: Provide training examples")
-    print(f"   - {len(trainset)} examples available")
+    print("✅ Step 2: Provide training examples")
+    print(f"   - {len(pairs)} examples available")
     print("   - Framework will automatically select best ones")
     print()
     
+    # Step 3: Define metric (validate_answer, with the trainset's answers lowercased once)
+    print("✅ Step 3: Define metric")
+    print("   - Framework uses this to measure quality")
+    print("   - Automatically selects examples that improve metric")
+    print("   - validate_answer.score_batch(predictions) scores a whole round at once")
+    print()
+    
     # Step 4: Automatic optimization (demo)
     print("✅ Step 4: Automatic optimization")
     print("-" * 70)
@@ -102,6 +100,35 @@ optimized_qa = optimizer.compile(student=QA, trainset=trainset)
     print("  → Select [2, 3, 4] (best score)")
     print()
     
+    # Step 5: The real thing, only in a recorded run (DSPY_LM_RECORDING)
+    lm = configured_lm()
+    if lm is None:
+        print("💡 Set DSPY_LM_RECORDING=<log> (with OPENAI_API_KEY to record, without to")
+        print("   replay) to see BootstrapFewShot pick the examples for real.")
+        print()
+    else:
+        class QA(dspy.Signature):
+            """Answer questions accurately."""
+            question = dspy.InputField()
+            answer = dspy.OutputField()
+        
+        trainset = [dspy.Example(question=question, answer=answer) for question, answer in pairs]
+        validate_answer = AnswerMetric(trainset)
+        
+        print("✅ Step 5: BootstrapFewShot on the model")
+        print("-" * 70)
+        try:
+            with dspy.context(lm=lm):
+                optimizer = dspy.BootstrapFewShot(metric=validate_answer, max_bootstrapped_demos=2)
+                optimized_qa = optimizer.compile(student=dspy.Predict(QA), trainset=trainset)
+                result = optimized_qa(question="What is NLP?")
+            print(f"  Examples selected: {len(optimized_qa.demos)}")
+            print(f"  Question: What is NLP?")
+            print(f"  Answer: {result.answer}")
+        except Exception as e:
+            print("⚠️  Error running the optimizer:", str(e))
+        print()
+    
     print("✅ Benefits:")
     print("  - Automatic: No manual selection needed")
     print("  - Metric-driven: Optimizes what you care about")
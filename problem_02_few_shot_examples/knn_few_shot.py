@@ -0,0 +1,385 @@
+"""
+Nearest-Neighbor Few-Shot Retrieval
+
+Instead of the same static demos for every question (all_examples[:3]),
+pick the trainset examples most similar to each incoming question:
+
+    index = KNNIndex.build(trainset)             # at compile time
+    index.save("qa_demos")                       # qa_demos.json / .vec / .jsonl
+
+    index = KNNIndex.load("qa_demos")            # memory-mapped, loads instantly
+    qa.demos = index.demos(question, k=3)        # per query
+    index.add(dspy.Example(question=..., answer=...))   # appended to the files too
+
+Questions are embedded with HashingEmbedder: words and character
+trigrams hashed into a fixed-size vector. No model and no network, so
+the index builds and works offline, and two runs embed identically.
+
+NumPy (optional, `pip install numpy`) is what makes search fast. With
+it, save() also clusters an index of IVF_MIN_ROWS examples or more
+(an IVF index: spherical k-means, about sqrt(n) clusters, stored in
+path.ivf), and a query scans only the `nprobe` clusters nearest to it:
+about 0.5 ms for 100k examples on one core, against about 7 ms for the
+exact float32 matrix-vector product (search(..., nprobe=None)). Rows
+added after the last save(), and smaller or unsaved indexes, are
+always searched exactly.
+
+Without NumPy, search falls back to plain Python over the query's
+nonzero dimensions. That is exact but slow: about 0.5 s per query for
+100k examples, about 25 ms for the 5k a large trainset has.
+"""
+
+import os
+import sys
+import json
+import math
+import mmap
+import zlib
+import heapq
+from array import array
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lazy_dspy import dspy
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_DIM = 128
+IVF_MIN_ROWS = 10_000   # smaller indexes are searched exactly
+DEFAULT_NPROBE = 8      # clusters scanned per query
+
+
+class HashingEmbedder:
+    """
+    Text -> unit vector, by hashing words and character trigrams.
+
+    Similar questions share words and trigrams, so their vectors point
+    in similar directions. crc32 keeps hashes stable across processes.
+    """
+
+    def __init__(self, dim=DEFAULT_DIM):
+        self.dim = dim
+
+    def features(self, text):
+        words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+        feats = list(words)
+        for word in words:
+            padded = f"#{word}#"
+            feats.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return feats
+
+    def sparse(self, text):
+        """{dimension: weight} with unit length"""
+        vector = {}
+        for feat in self.features(text):
+            h = zlib.crc32(feat.encode("utf-8"))
+            d = h % self.dim
+            vector[d] = vector.get(d, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {d: w / norm for d, w in vector.items() if w} if norm else {}
+
+    def dense(self, text):
+        """Unit vector as array('f')"""
+        vector = array("f", bytes(4 * self.dim))
+        for d, w in self.sparse(text).items():
+            vector[d] = w
+        return vector
+
+
+class KNNIndex:
+    """
+    k-nearest-neighbor index over trainset examples, keyed by one field.
+
+    Examples are stored as dicts (one JSON line each); vectors as rows
+    of a float32 matrix. Both files are memory-mapped on load and only
+    appended to by add().
+    """
+
+    def __init__(self, embedder=None, key="question"):
+        self.embedder = embedder or HashingEmbedder()
+        self.key = key
+        self.path = None
+        self._vectors = None        # mapped rows (numpy array or memoryview of floats)
+        self._map_vec = None
+        self._map_lines = None
+        self._line_offsets = array("q")
+        self._tail_vectors = []     # rows added since the files were mapped
+        self._tail_examples = []
+        self._stacked = None
+        self._map_ivf = None
+        self._centroids = None      # IVF: unit centroid per cluster (NumPy only)
+        self._list_bounds = None    # IVF: cluster c is rows bounds[c]:bounds[c + 1] of the two below
+        self._list_rows = None      # IVF: mapped row positions, in cluster order
+        self._list_vectors = None   # IVF: their vectors, in cluster order
+
+    @classmethod
+    def build(cls, examples, key="question", dim=DEFAULT_DIM):
+        """Index dspy.Example objects (or dicts) by their `key` field"""
+        index = cls(HashingEmbedder(dim), key)
+        for example in examples:
+            index.add(example)
+        return index
+
+    def __len__(self):
+        return len(self._line_offsets) + len(self._tail_examples)
+
+    # -- storage --------------------------------------------------------
+
+    def _files(self, path):
+        return path + ".json", path + ".vec", path + ".jsonl"
+
+    def _ivf_path(self, path):
+        return path + ".ivf"
+
+    def save(self, path):
+        """Write the index to path.json / .vec / .jsonl (and .ivf, see above); later add()s are appended"""
+        meta_path, vec_path, lines_path = self._files(path)
+        examples = [self.example_dict(i) for i in range(len(self))]
+        vectors = [self.vector(i) for i in range(len(self))]
+        self.close()  # the files may be the ones mapped now
+        with open(vec_path, "wb") as f:
+            for vector in vectors:
+                f.write(vector.tobytes())
+        with open(lines_path, "w", encoding="utf-8") as f:
+            for example in examples:
+                f.write(json.dumps(example, ensure_ascii=False) + "\n")
+        with open(meta_path, "w") as f:
+            json.dump({"dim": self.embedder.dim, "key": self.key, "embedder": "hashing"}, f)
+        ivf_path = self._ivf_path(path)
+        if os.path.exists(ivf_path):
+            os.remove(ivf_path)
+        self._open(path)
+        if NUMPY_AVAILABLE and len(self) >= IVF_MIN_ROWS:
+            self._build_ivf(ivf_path)
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved index (memory-mapped)"""
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        index = cls(HashingEmbedder(meta["dim"]), meta["key"])
+        index._open(path)
+        return index
+
+    def _open(self, path):
+        """Map the files at path, dropping any in-memory rows (they're in the files)"""
+        self.close()
+        self.path = path
+        _, vec_path, lines_path = self._files(path)
+        dim = self.embedder.dim
+        self._line_offsets = array("q")
+        if os.path.getsize(lines_path):
+            with open(lines_path, "rb") as f:
+                self._map_lines = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            position = 0
+            while True:
+                end = self._map_lines.find(b"\n", position)
+                if end == -1:
+                    break
+                self._line_offsets.append(position)
+                position = end + 1
+        rows = len(self._line_offsets)
+        if rows:
+            with open(vec_path, "rb") as f:
+                self._map_vec = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if NUMPY_AVAILABLE:
+                self._vectors = np.frombuffer(self._map_vec, dtype=np.float32, count=rows * dim).reshape(rows, dim)
+            else:
+                self._vectors = memoryview(self._map_vec)[:rows * dim * 4].cast("f")
+        self._tail_vectors = []
+        self._tail_examples = []
+        self._stacked = None
+        if NUMPY_AVAILABLE and rows and os.path.exists(self._ivf_path(path)):
+            self._load_ivf(self._ivf_path(path))
+
+    # -- IVF (NumPy only) ---------------------------------------------
+
+    def _build_ivf(self, ivf_path, iterations=10, seed=0):
+        """
+        Cluster the mapped rows with spherical k-means and write path.ivf:
+        nlist, the centroids, each cluster's bounds, the row positions in
+        cluster order, and the vectors in that order (so a cluster is one
+        contiguous slice instead of a gather from the whole matrix).
+        """
+        rows = len(self._vectors)
+        nlist = max(1, int(math.sqrt(rows)))
+        rng = np.random.default_rng(seed)
+        sample = self._vectors[np.sort(rng.choice(rows, min(rows, 64 * nlist), replace=False))]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+        assignment = np.concatenate([np.argmax(self._vectors[i:i + 16384] @ centroids.T, axis=1)
+                                     for i in range(0, rows, 16384)])
+        order = np.argsort(assignment, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(assignment[order], np.arange(nlist + 1)).astype(np.int64)
+        with open(ivf_path, "wb") as f:
+            f.write(np.array([nlist, rows], dtype=np.int64).tobytes())
+            f.write(centroids.tobytes())
+            f.write(bounds.tobytes())
+            f.write(order.tobytes())
+            for i in range(0, rows, 16384):
+                f.write(self._vectors[order[i:i + 16384]].tobytes())
+        self._load_ivf(ivf_path)
+
+    def _load_ivf(self, ivf_path):
+        """Map path.ivf; rows add() appended after it was written are scanned exactly"""
+        dim = self.embedder.dim
+        with open(ivf_path, "rb") as f:
+            self._map_ivf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        nlist, rows = (int(n) for n in np.frombuffer(self._map_ivf, dtype=np.int64, count=2))
+        offset = 16
+        self._centroids = np.frombuffer(self._map_ivf, np.float32, nlist * dim, offset).reshape(nlist, dim)
+        offset += 4 * nlist * dim
+        self._list_bounds = np.frombuffer(self._map_ivf, np.int64, nlist + 1, offset)
+        offset += 8 * (nlist + 1)
+        self._list_rows = np.frombuffer(self._map_ivf, np.int32, rows, offset)
+        offset += 4 * rows
+        self._list_vectors = np.frombuffer(self._map_ivf, np.float32, rows * dim, offset).reshape(rows, dim)
+
+    def _scores_ivf(self, query, nprobe):
+        """(positions, scores) of the clustered rows in the `nprobe` clusters nearest to the query"""
+        lists = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        bounds = self._list_bounds
+        positions = [self._list_rows[bounds[c]:bounds[c + 1]] for c in lists]
+        scores = [self._list_vectors[bounds[c]:bounds[c + 1]] @ query for c in lists]
+        return np.concatenate(positions), np.concatenate(scores)
+
+    def close(self):
+        """Release the mapped files"""
+        self._vectors = None
+        self._centroids = self._list_bounds = self._list_rows = self._list_vectors = None
+        for name in ("_map_vec", "_map_lines", "_map_ivf"):
+            mapped = getattr(self, name)
+            if mapped is not None:
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass  # a NumPy view still points at it; freed with the view
+                setattr(self, name, None)
+
+    # -- inserts ------------------------------------------------------
+
+    def add(self, example):
+        """Add one example (dspy.Example or dict); persisted right away if the index is saved"""
+        data = dict(example.toDict() if hasattr(example, "toDict") else example)
+        vector = self.embedder.dense(data[self.key])
+        if self.path is not None:
+            _, vec_path, lines_path = self._files(self.path)
+            with open(vec_path, "ab") as f:
+                f.write(vector.tobytes())
+            with open(lines_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self._tail_vectors.append(vector)
+        self._tail_examples.append(data)
+        self._stacked = None
+
+    # -- lookups ------------------------------------------------------
+
+    def example_dict(self, position):
+        mapped = len(self._line_offsets)
+        if position >= mapped:
+            return self._tail_examples[position - mapped]
+        start = self._line_offsets[position]
+        end = self._map_lines.find(b"\n", start)
+        return json.loads(self._map_lines[start:end])
+
+    def vector(self, position):
+        mapped = len(self._line_offsets)
+        if position >= mapped:
+            return self._tail_vectors[position - mapped]
+        dim = self.embedder.dim
+        if NUMPY_AVAILABLE:
+            return array("f", self._vectors[position].tobytes())
+        return array("f", self._vectors[position * dim:(position + 1) * dim])
+
+    def _scores_numpy(self, text, nprobe):
+        """(positions, scores) of the rows to rank; positions None means every row in order"""
+        query = np.frombuffer(self.embedder.dense(text), dtype=np.float32)
+        positions, parts = [], []
+        if self._vectors is not None:
+            clustered = 0
+            if nprobe and self._centroids is not None and nprobe < len(self._centroids):
+                rows, scores = self._scores_ivf(query, nprobe)
+                positions.append(rows)
+                parts.append(scores)
+                clustered = len(self._list_rows)
+            if clustered < len(self._vectors):
+                positions.append(np.arange(clustered, len(self._vectors)))
+                parts.append(self._vectors[clustered:] @ query)
+        if self._tail_vectors:
+            if self._stacked is None:
+                self._stacked = np.frombuffer(b"".join(v.tobytes() for v in self._tail_vectors),
+                                              dtype=np.float32).reshape(-1, self.embedder.dim)
+            positions.append(np.arange(len(self._line_offsets), len(self)))
+            parts.append(self._stacked @ query)
+        return np.concatenate(positions), np.concatenate(parts)
+
+    def search(self, text, k=3, nprobe=DEFAULT_NPROBE):
+        """
+        [(similarity, position), ...] of the k nearest examples, best first.
+
+        With an IVF index, only the `nprobe` nearest clusters (plus rows
+        added since it was built) are scanned; nprobe=None scans every row.
+        """
+        if not len(self):
+            return []
+        k = min(k, len(self))
+        if NUMPY_AVAILABLE:
+            positions, scores = self._scores_numpy(text, nprobe)
+            if len(scores) < k:
+                positions, scores = self._scores_numpy(text, None)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(float(scores[i]), int(positions[i])) for i in top]
+
+        query = self.embedder.sparse(text).items()
+        dim = self.embedder.dim
+        mapped = len(self._line_offsets)
+        vectors = self._vectors
+
+        def score(position):
+            if position < mapped:
+                base = position * dim
+                return sum(vectors[base + d] * w for d, w in query)
+            row = self._tail_vectors[position - mapped]
+            return sum(row[d] * w for d, w in query)
+
+        return heapq.nlargest(k, ((score(i), i) for i in range(len(self))))
+
+    def nearest(self, text, k=3, nprobe=DEFAULT_NPROBE):
+        """The k most similar examples, as dicts"""
+        return [self.example_dict(position) for _, position in self.search(text, k, nprobe)]
+
+    def demos(self, text, k=3, nprobe=DEFAULT_NPROBE):
+        """The k most similar examples as dspy.Example demos for a predictor"""
+        return [dspy.Example(**example).with_inputs(self.key) for example in self.nearest(text, k, nprobe)]
+
+
+if __name__ == "__main__":
+    import time
+
+    all_examples = [
+        ("What is AI?", "AI is Artificial Intelligence"),
+        ("What is ML?", "ML is Machine Learning"),
+        ("What is NLP?", "NLP is Natural Language Processing"),
+        ("What is DL?", "DL is Deep Learning"),
+        ("What is RL?", "RL is Reinforcement Learning"),
+        ("What is CV?", "CV is Computer Vision"),
+        ("What is GAN?", "GAN is Generative Adversarial Network"),
+        ("What is BERT?", "BERT is Bidirectional Encoder Representations"),
+    ]
+    index = KNNIndex.build({"question": q, "answer": a} for q, a in all_examples)
+    for question in ["What does NLP stand for?", "Explain BERT"]:
+        start = time.perf_counter()
+        found = index.nearest(question, k=2)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{question!r} -> {[example['question'] for example in found]} ({elapsed:.2f}ms)")
@@ -0,0 +1,96 @@
+"""
+Test: Pruned Few-Shot Subset Search
+
+Scores made-up subsets (no LM) with scores that have diminishing
+returns - each example covers some weighted "skills", and a skill
+counts once however many examples cover it - and checks that
+FewShotSearch with beam_width=None, expand=None finds the same best
+score as trying every subset, in fewer evaluations - even where the
+best single example leads a narrow beam astray. The default beam
+search is only checked to stay within its budget.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+import random
+from itertools import combinations
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from few_shot_search import FewShotSearch
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def coverage_scorer(seed, pool_size, skills=12):
+    """A score with diminishing returns: base + weight of the skills the subset covers, minus a cost per example"""
+    rng = random.Random(seed)
+    weight = [rng.random() for _ in range(skills)]
+    covers = [set(rng.sample(range(skills), rng.randint(1, 4))) for _ in range(pool_size)]
+    cost = rng.uniform(0, 0.5)
+
+    def score(positions):
+        covered = set().union(*(covers[i] for i in positions)) if positions else set()
+        return 0.3 + sum(weight[s] for s in covered) / skills - cost * len(positions) / pool_size
+    return score
+
+
+def exhaustive_best(score, pool_size, k):
+    return max(score(subset) for size in range(k + 1) for subset in combinations(range(pool_size), size))
+
+
+def test_exact_mode():
+    """beam_width=None, expand=None never prunes the best subset when gains diminish"""
+    calls = exhaustive = 0
+    for seed in range(30):
+        pool_size, k = 10 + seed % 3, 3 + seed % 2
+        score = coverage_scorer(seed, pool_size)
+        result = FewShotSearch(score, pool_size, k=k, beam_width=None, expand=None).run()
+        expected = exhaustive_best(score, pool_size, k)
+        if abs(result.score - expected) > 1e-9:
+            check(False, f"seed {seed}: exact mode finds the exhaustive best score",
+                  f"search: {result.score} {result.best}, exhaustive: {expected}")
+        calls += result.calls
+        exhaustive += result.exhaustive_calls
+    check(True, "exact mode finds the exhaustive best score (30 seeds)")
+    check(calls < exhaustive, f"with {calls} evaluations instead of {exhaustive}")
+
+
+def test_greedy_trap():
+    """The best single example leads away from the best triple; exact mode still finds it"""
+    # Example 0 covers two skills of example 1 and one each of 2 and 3, so it
+    # scores highest alone, but 1 + 2 + 3 (nine skills) beats any triple with it
+    covers = [{"1a", "1b", "2a", "3a"}, {"1a", "1b", "1c"}, {"2a", "2b", "2c"}, {"3a", "3b", "3c"}, {"x"}]
+
+    def score(positions):
+        return len(set().union(*(covers[i] for i in positions))) if positions else 0
+
+    greedy = FewShotSearch(score, len(covers), k=3, beam_width=1, expand=1).run()
+    exact = FewShotSearch(score, len(covers), k=3, beam_width=None, expand=None).run()
+    check(greedy.best != (1, 2, 3), f"a narrow beam misses it (finds {greedy.best}, score {greedy.score})")
+    check(exact.best == (1, 2, 3) and exact.score == 9, f"exact mode finds {exact.best}, score {exact.score}")
+
+
+def test_budget():
+    """The default beam search never scores more subsets than its budget"""
+    score = coverage_scorer(0, 20)
+    result = FewShotSearch(score, 20, k=4, budget=40).run()
+    check(result.calls <= 40 and result.best is not None, f"{result.calls} evaluations within a budget of 40")
+
+
+if __name__ == "__main__":
+    test_exact_mode()
+    test_greedy_trap()
+    test_budget()
+    print()
+    print("✅ Few-shot subset search works")
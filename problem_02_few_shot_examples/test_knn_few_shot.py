@@ -0,0 +1,108 @@
+"""
+Test: Nearest-Neighbor Few-Shot Retrieval
+
+Checks that KNNIndex finds the most similar questions, that a saved
+index loads back with the same answers and keeps add()ed examples, and
+- with NumPy installed - that the IVF index save() builds for large
+indexes finds the same neighbors as the exact search.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+import random
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knn_few_shot import KNNIndex, NUMPY_AVAILABLE, IVF_MIN_ROWS
+
+PAIRS = [
+    ("What is AI?", "AI is Artificial Intelligence"),
+    ("What is ML?", "ML is Machine Learning"),
+    ("What is NLP?", "NLP is Natural Language Processing"),
+    ("What does natural language processing mean?", "NLP"),
+    ("What is DL?", "DL is Deep Learning"),
+]
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def build():
+    return KNNIndex.build({"question": q, "answer": a} for q, a in PAIRS)
+
+
+def test_search():
+    """The closest question comes first, and k is capped at the index size"""
+    index = build()
+    found = index.nearest("What does NLP mean in natural language processing?", k=2)
+    check({e["question"] for e in found} == {PAIRS[2][0], PAIRS[3][0]}, "the two NLP questions are nearest",
+          repr(found))
+    results = index.search("What is ML?", k=10)
+    check(len(results) == len(PAIRS) and results[0][1] == 1, "k is capped; an exact match ranks first")
+    check(all(a[0] >= b[0] for a, b in zip(results, results[1:])), "results are sorted best first")
+    check(KNNIndex().search("anything") == [], "an empty index finds nothing")
+
+
+def test_save_load_add():
+    """A saved index loads with the same results; add() after saving persists"""
+    index = build()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "demos")
+        index.save(path)
+        loaded = KNNIndex.load(path)
+        check(loaded.search("What is DL?") == index.search("What is DL?"), "loaded index gives the same results")
+        loaded.add({"question": "What is RL?", "answer": "RL is Reinforcement Learning"})
+        check(loaded.nearest("What is RL?", k=1)[0]["answer"] == "RL is Reinforcement Learning",
+              "an added example is searchable right away")
+        reloaded = KNNIndex.load(path)
+        check(len(reloaded) == len(PAIRS) + 1 and reloaded.nearest("What is RL?", k=1)[0]["question"] == "What is RL?",
+              "and is in the files after reloading")
+        loaded.close()
+        reloaded.close()
+
+
+def test_ivf():
+    """The IVF index finds the exact search's neighbors for questions that have some"""
+    if not NUMPY_AVAILABLE:
+        print("⚠️  NumPy not installed; skipping the IVF checks")
+        return
+    rng = random.Random(0)
+    topics = [[f"t{t}w{i}" for i in range(12)] for t in range(IVF_MIN_ROWS // 50)]
+
+    def question():
+        return "What is " + " ".join(rng.sample(rng.choice(topics), rng.randint(3, 6))) + "?"
+
+    index = KNNIndex.build({"question": question(), "answer": str(i)} for i in range(IVF_MIN_ROWS))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "demos")
+        index.save(path)
+        check(os.path.exists(path + ".ivf"), f"save() builds an IVF index for {IVF_MIN_ROWS} examples")
+        loaded = KNNIndex.load(path)
+        queries = [question() for _ in range(50)]
+        hits = 0
+        for q in queries:
+            exact = loaded.search(q, k=3, nprobe=None)
+            hits += sum(1 for score, _ in loaded.search(q, k=3) if score >= exact[-1][0] - 1e-6)
+        check(hits >= 0.95 * 3 * len(queries), f"IVF recall@3 vs exact: {hits / (3 * len(queries)):.2f}")
+        loaded.add({"question": "What is brand new?", "answer": "new"})
+        check(loaded.nearest("What is brand new?", k=1)[0]["answer"] == "new",
+              "rows added after the IVF index was built are still found")
+        loaded.close()
+
+
+if __name__ == "__main__":
+    test_search()
+    test_save_load_add()
+    test_ivf()
+    print()
+    print("✅ Nearest-neighbor retrieval works")
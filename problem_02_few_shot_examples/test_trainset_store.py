@@ -0,0 +1,96 @@
+"""
+Test: Columnar Trainset Store
+
+Builds a TrainsetStore from (question, answer) pairs and checks that it
+reads back the same text, that slices and take() are views over the
+same buffer, that repeated strings are stored once, and - with DSPy
+installed - that rows turn back into dspy.Example objects.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lazy_dspy import dspy
+from trainset_store import TrainsetStore
+
+PAIRS = [
+    ("What is AI?", "AI is Artificial Intelligence"),
+    ("What is ML?", "ML is Machine Learning"),
+    ("What is NLP?", "NLP is Natural Language Processing"),
+    ("What is DL?", "DL is Deep Learning"),
+    ("Qu'est-ce que l'IA ? 🤖", "L'intelligence artificielle"),
+]
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def test_round_trip():
+    """Every field reads back as it went in, unicode included"""
+    store = TrainsetStore.from_pairs(PAIRS)
+    check(len(store) == len(PAIRS), "one row per pair")
+    check(store.pairs() == PAIRS, "pairs() gives back the input", repr(store.pairs()))
+    check(store[4].question == PAIRS[4][0] and store[4]["answer"] == PAIRS[4][1], "rows read by attribute and key")
+    check(store.column("answer") == [a for _, a in PAIRS], "column() reads one field")
+    check([row.to_dict() for row in store] == [{"question": q, "answer": a} for q, a in PAIRS], "iterating gives rows")
+    try:
+        TrainsetStore.from_pairs([("only a question",)])
+        raised = False
+    except ValueError:
+        raised = True
+    check(raised, "a row with the wrong number of fields raises ValueError")
+
+
+def test_views():
+    """Slices and take() share the buffer and keep their positions in the full store"""
+    store = TrainsetStore.from_pairs(PAIRS)
+    subset = store.take([1, 3, 4])
+    check(subset.pairs() == [PAIRS[1], PAIRS[3], PAIRS[4]], "take() picks the rows at the given positions")
+    check(list(subset.positions) == [1, 3, 4], "take() keeps positions in the full store")
+    nested = subset[1:]
+    check(nested.pairs() == [PAIRS[3], PAIRS[4]] and nested[0].index == 3, "a slice of a view is a view")
+    check(store._base is subset._base is nested._base, "views share one buffer")
+    check(subset[0] == store[1] and len({subset[0], store[1]}) == 1, "the same row compares and hashes equal")
+
+
+def test_interning():
+    """A pool with many repeats stores each distinct string once"""
+    rows = [PAIRS[i % len(PAIRS)] for i in range(1000)]
+    store = TrainsetStore.from_pairs(rows)
+    distinct = sum(len(text.encode("utf-8")) for pair in PAIRS for text in pair)
+    check(len(store._base.buffer) == distinct, f"buffer holds {distinct} bytes for 1000 rows")
+    check(store.nbytes == distinct + 1000 * 2 * 2 * 8, f"nbytes is the buffer plus 32 bytes per row ({store.nbytes})")
+    check(store.pairs() == rows, "repeated rows still read back in order")
+
+
+def test_examples():
+    """Rows become dspy.Example objects with the first field as input"""
+    if not dspy.available():
+        print("⚠️  DSPy not installed; skipping the dspy.Example checks")
+        return
+    store = TrainsetStore.from_pairs(PAIRS)
+    examples = store.take([0, 2]).to_examples()
+    check([(e.question, e.answer) for e in examples] == [PAIRS[0], PAIRS[2]], "to_examples() keeps the fields")
+    check(set(examples[0].inputs().keys()) == {"question"}, "question is the input field")
+    back = TrainsetStore.from_examples(examples)
+    check(back.pairs() == [PAIRS[0], PAIRS[2]], "from_examples() reads them back")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_views()
+    test_interning()
+    test_examples()
+    print()
+    print("✅ Trainset store works")
@@ -0,0 +1,190 @@
+"""
+Columnar Trainset Store
+
+A list of dspy.Example objects (or (question, answer) tuples) costs a
+Python object, a dict and two strings per example, and every scoring
+pass walks all of them. TrainsetStore keeps a trainset as columns:
+
+- all text lives in one UTF-8 buffer; repeated strings are stored once
+- each field is two offset arrays (start, end) into that buffer
+- rows are small __slots__ views, created only when you index
+- slices and candidate subsets are views over the same buffer - nothing
+  is copied
+
+    store = TrainsetStore.from_pairs(all_examples)          # or .from_examples(trainset)
+    store[0].question                                        # "What is AI?"
+    candidates = store.take([1, 3, 4])                       # view, no copy
+    candidates.column("answer")                              # ["ML is ...", ...]
+    demos = candidates.to_examples()                         # dspy.Example list for a demo set
+
+Memory is one buffer plus 16 bytes per field per row, however large the pool.
+"""
+
+import os
+import sys
+from array import array
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lazy_dspy import dspy
+
+DEFAULT_FIELDS = ("question", "answer")
+
+
+class Row:
+    """One example of a TrainsetStore, read straight from its buffer"""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._store._text(name, self._index)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        return self._store._text(name, self._index)
+
+    def __eq__(self, other):
+        return isinstance(other, Row) and self._store._base is other._store._base and self._index == other._index
+
+    def __hash__(self):
+        return hash((id(self._store._base), self._index))
+
+    def __repr__(self):
+        return f"Row({self.to_dict()!r})"
+
+    @property
+    def index(self):
+        """Position of this row in the full store"""
+        return self._index
+
+    def to_dict(self):
+        return {field: self._store._text(field, self._index) for field in self._store.fields}
+
+    def to_example(self, input_keys=None):
+        """This row as a dspy.Example (inputs: the first field, unless given)"""
+        example = dspy.Example(**self.to_dict())
+        return example.with_inputs(*(input_keys or self._store.fields[:1]))
+
+
+class _Columns:
+    """The shared storage behind a store and all of its views"""
+
+    __slots__ = ("fields", "buffer", "starts", "ends")
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.buffer = b""
+        self.starts = {field: array("q") for field in self.fields}
+        self.ends = {field: array("q") for field in self.fields}
+
+
+class TrainsetStore:
+    """
+    A trainset stored column-wise, or a view of some of its rows.
+
+    Build one with from_pairs() / from_examples(). Indexing gives a Row;
+    slicing and take() give another TrainsetStore over the same buffer.
+    """
+
+    __slots__ = ("_base", "_rows")
+
+    def __init__(self, columns, rows=None):
+        self._base = columns
+        self._rows = range(len(columns.starts[columns.fields[0]])) if rows is None else rows
+
+    @classmethod
+    def from_rows(cls, rows, fields=DEFAULT_FIELDS):
+        """Build from an iterable of sequences of strings, one per field"""
+        columns = _Columns(fields)
+        chunks = []
+        interned = {}
+        size = 0
+        for row in rows:
+            if len(row) != len(columns.fields):
+                raise ValueError(f"expected {len(columns.fields)} fields {columns.fields}, got {len(row)}")
+            for field, text in zip(columns.fields, row):
+                span = interned.get(text)
+                if span is None:
+                    data = str(text).encode("utf-8")
+                    span = (size, size + len(data))
+                    interned[text] = span
+                    chunks.append(data)
+                    size += len(data)
+                columns.starts[field].append(span[0])
+                columns.ends[field].append(span[1])
+        columns.buffer = b"".join(chunks)
+        return cls(columns)
+
+    @classmethod
+    def from_pairs(cls, pairs, fields=DEFAULT_FIELDS):
+        """Build from (question, answer) tuples"""
+        return cls.from_rows(pairs, fields)
+
+    @classmethod
+    def from_examples(cls, examples, fields=DEFAULT_FIELDS):
+        """Build from dspy.Example objects (or anything with the fields as attributes)"""
+        return cls.from_rows(([getattr(example, field) for field in fields] for example in examples), fields)
+
+    @property
+    def fields(self):
+        return self._base.fields
+
+    @property
+    def positions(self):
+        """Row numbers of this view in the full store"""
+        return self._rows
+
+    @property
+    def nbytes(self):
+        """Bytes used by the shared buffer and offset arrays"""
+        base = self._base
+        offsets = sum(a.itemsize * len(a) for a in (*base.starts.values(), *base.ends.values()))
+        return len(base.buffer) + offsets
+
+    def _text(self, field, index):
+        start = self._base.starts[field][index]
+        return self._base.buffer[start:self._base.ends[field][index]].decode("utf-8")
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        for index in self._rows:
+            yield Row(self, index)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return TrainsetStore(self._base, self._rows[key])
+        return Row(self, self._rows[key])
+
+    def take(self, positions):
+        """View of the rows at `positions` (relative to this view)"""
+        rows = array("q", (self._rows[i] for i in positions))
+        return TrainsetStore(self._base, memoryview(rows))
+
+    def column(self, field):
+        """One field of every row, as a list of strings"""
+        buffer = self._base.buffer
+        starts = self._base.starts[field]
+        ends = self._base.ends[field]
+        return [buffer[starts[i]:ends[i]].decode("utf-8") for i in self._rows]
+
+    def pairs(self):
+        """Rows as tuples of strings, e.g. (question, answer)"""
+        return list(zip(*(self.column(field) for field in self.fields)))
+
+    def to_examples(self, input_keys=None):
+        """Rows as dspy.Example objects, e.g. for a demo set or optimizer trainset"""
+        return [row.to_example(input_keys) for row in self]
+
+    def __repr__(self):
+        return f"TrainsetStore({len(self)} rows, fields={self.fields})"
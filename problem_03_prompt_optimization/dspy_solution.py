@@ -4,11 +4,18 @@ Problem 3: DSPy Solution - Automatic Prompt Optimization
 DSPy provides systematic optimization strategies (MIPRO, COPRO, etc.)
 """
 
-try:
-    import dspy
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# dspy is only imported once a Signature, Predict, ... is actually built
+from lazy_dspy import dspy, DSPY_AVAILABLE
+from recording_lm import configured_lm
+from answer_metric import validate_answer
+
+if not DSPY_AVAILABLE:
     print("⚠️  DSPy not installed. Install with: pip install dspy-ai")
 
 
@@ -20,6 +27,7 @@ def dspy_optimization_solution():
     print("=" * 70)
     print()
     
+    # dspy itself is only imported below, once there is a model to run it on
     if not DSPY_AVAILABLE:
         print("✅ Code structure (would work with DSPy):")
         print()
@@ -98,6 +106,42 @@ optimized = optimizer.compile(student=QA, trainset=examples)
     print("  5. Returns optimized module")
     print()
     
+    # The score MIPRO starts from, only in a recorded run (DSPY_LM_RECORDING)
+    lm = configured_lm()
+    if lm is not None:
+        print("✅ Baseline before optimizing")
+        print("-" * 70)
+        devset = [
+            dspy.Example(question="What is AI?", answer="Artificial Intelligence").with_inputs("question"),
+            dspy.Example(question="What is ML?", answer="Machine Learning").with_inputs("question"),
+            dspy.Example(question="What is NLP?", answer="Natural Language Processing").with_inputs("question"),
+        ]
+        try:
+            qa = dspy.Predict("question -> answer")
+            with dspy.context(lm=lm):
+                correct = [validate_answer(example, qa(**example.inputs())) for example in devset]
+            print(f"  Unoptimized Predict: {sum(correct)}/{len(devset)} correct")
+        except Exception as e:
+            print("⚠️  Error scoring the baseline:", str(e))
+        print()
+        
+        # Raw templates, searched with successive halving instead of scoring them all
+        from prompt_bandit import PromptBandit, make_template_evaluator
+        print("✅ Bandit search over hand-written templates")
+        print("-" * 70)
+        templates = ["Answer: {question}", "Question: {question}\nAnswer:", "Q: {question}\nA:"]
+        try:
+            bandit = PromptBandit(templates, make_template_evaluator(lm), devset)
+            result = bandit.successive_halving(min_batch=1)
+            print(f"  Bandit pick: {result.best!r} after {result.calls} of {result.exhaustive_calls} calls")
+        except Exception as e:
+            print("⚠️  Error searching templates:", str(e))
+        print()
+    else:
+        print("💡 Searching hand-written templates instead: prompt_bandit.py finds the best")
+        print("   one without scoring every template on every example.")
+        print()
+    
     print("✅ Benefits:")
     print("  - Automatic: No manual iteration")
     print("  - Systematic: Explores search space efficiently")
@@ -0,0 +1,201 @@
+"""
+Bandit Search over Prompt Templates
+
+Scoring every prompt variation on the whole dev set costs
+templates x examples LM calls, most of them spent on templates that are
+clearly worse after a handful of examples. Two searches that spend
+calls on the promising templates instead:
+
+- successive_halving(): score every template on a small random
+  minibatch, keep the best 1/eta, double the minibatch, repeat. Only
+  the finalists see the full dev set.
+- ucb(): under a fixed call budget, always score the template with the
+  highest upper confidence bound next (UCB1).
+
+    bandit = PromptBandit(prompt_variations, evaluate, devset)
+    result = bandit.successive_halving()
+    result.best, result.calls, result.exhaustive_calls, result.saved
+
+evaluate(template, example) makes one LM call and returns a score in
+[0, 1]; make_template_evaluator() builds one from a DSPy LM and a metric.
+No (template, example) pair is scored twice - not even across restarts
+when a checkpoint.Checkpoint is passed:
+
+    bandit = PromptBandit(prompt_variations, evaluate, devset, checkpoint=Checkpoint("bandit.ckpt"))
+"""
+
+import os
+import sys
+import math
+import random
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_metric import validate_answer
+
+
+class BanditResult:
+    """Best template found and what it cost"""
+
+    def __init__(self, best, means, counts, calls, exhaustive_calls):
+        self.best = best
+        self.means = means
+        self.counts = counts
+        self.calls = calls
+        self.exhaustive_calls = exhaustive_calls
+
+    @property
+    def saved(self):
+        """Share of the exhaustive calls that were not needed"""
+        return 1 - self.calls / self.exhaustive_calls if self.exhaustive_calls else 0.0
+
+    def __repr__(self):
+        return (f"BanditResult(best={self.best!r}, mean={self.means[self.best]:.3f}, "
+                f"calls={self.calls}/{self.exhaustive_calls})")
+
+
+class PromptBandit:
+    """
+    Searches for the template with the best mean score over examples.
+
+    Examples are visited in one shuffled order (seed), so every template
+    sees the same minibatches and comparisons stay fair. With a
+    checkpoint, each score is saved as soon as it comes in (the
+    checkpoint's interval doesn't apply) and restored on the next run
+    with the same templates.
+    """
+
+    def __init__(self, templates, evaluate, examples, seed=0, checkpoint=None):
+        if not templates:
+            raise ValueError("no templates to search")
+        self.templates = list(templates)
+        self.evaluate = evaluate
+        self.examples = list(examples)
+        self.order = list(range(len(self.examples)))
+        random.Random(seed).shuffle(self.order)
+        self.scores = {t: [] for t in range(len(self.templates))}
+        self.calls = 0
+        self.checkpoint = checkpoint
+        if checkpoint is not None:
+            self._restore(checkpoint.load())
+
+    def _state(self):
+        return {"templates": self.templates, "order": self.order, "calls": self.calls,
+                "scores": [self.scores[arm] for arm in range(len(self.templates))]}
+
+    def _restore(self, state):
+        if not state or state["templates"] != self.templates or len(state["order"]) != len(self.examples):
+            return
+        self.order = state["order"]
+        self.calls = state["calls"]
+        self.scores = dict(enumerate(state["scores"]))
+
+    def _score_until(self, arm, n):
+        """Score template `arm` on the first n examples of the shuffled order"""
+        seen = self.scores[arm]
+        for position in self.order[len(seen):n]:
+            seen.append(float(self.evaluate(self.templates[arm], self.examples[position])))
+            self.calls += 1
+            if self.checkpoint is not None:
+                # Every score is written as it comes in: one small file write per (much slower) LM call
+                self.checkpoint.save(self._state(), force=True)
+
+    def _mean(self, arm, n=None):
+        seen = self.scores[arm][:n]
+        return sum(seen) / len(seen) if seen else 0.0
+
+    def _result(self, best):
+        means = {self.templates[a]: self._mean(a) for a in self.scores}
+        counts = {self.templates[a]: len(self.scores[a]) for a in self.scores}
+        return BanditResult(self.templates[best], means, counts, self.calls,
+                            len(self.templates) * len(self.examples))
+
+    def _finish(self, best):
+        if self.checkpoint is not None:
+            self.checkpoint.save(self._state(), force=True)
+        return self._result(best)
+
+    def successive_halving(self, min_batch=4, eta=2, finalists=1):
+        """
+        Keep the best 1/eta templates after each round; each round scores
+        the survivors on eta times as many examples. The last `finalists`
+        templates are scored on every example.
+        """
+        alive = list(range(len(self.templates)))
+        n = min(min_batch, len(self.examples))
+        while len(alive) > finalists and n < len(self.examples):
+            for arm in alive:
+                self._score_until(arm, n)
+            # Rank on exactly n examples, even if a restored run scored some arms further
+            alive.sort(key=lambda arm: self._mean(arm, n), reverse=True)
+            alive = alive[:max(finalists, math.ceil(len(alive) / eta))]
+            n = min(n * eta, len(self.examples))
+        for arm in alive:
+            self._score_until(arm, len(self.examples))
+        return self._finish(max(alive, key=self._mean))
+
+    def ucb(self, budget, c=1.0, min_batch=2):
+        """
+        UCB1 under a budget of `budget` calls: score every template on
+        min_batch examples, then keep scoring the one with the highest
+        mean + c * sqrt(2 ln(calls) / count). The best template is the
+        highest mean among those scored at least half as often as the
+        most-scored one, so a lucky short streak can't win.
+        """
+        arms = range(len(self.templates))
+        for arm in arms:
+            self._score_until(arm, min_batch)
+        while self.calls < budget:
+            open_arms = [a for a in arms if len(self.scores[a]) < len(self.examples)]
+            if not open_arms:
+                break
+            total = math.log(max(self.calls, 2))
+            arm = max(open_arms, key=lambda a: self._mean(a) + c * math.sqrt(2 * total / len(self.scores[a])))
+            self._score_until(arm, len(self.scores[arm]) + 1)
+        most = max(len(self.scores[a]) for a in arms)
+        trusted = [a for a in arms if len(self.scores[a]) * 2 >= most]
+        return self._finish(max(trusted, key=self._mean))
+
+
+def make_template_evaluator(lm, metric=validate_answer, field="question"):
+    """
+    evaluate(template, example) for PromptBandit: fill the template with
+    the example's `field`, send it to a DSPy LM, and score the reply
+    with metric(example, pred).
+    """
+    def evaluate(template, example):
+        outputs = lm(template.format(**{field: getattr(example, field)}))
+        return float(metric(example, SimpleNamespace(answer=outputs[0] if outputs else "")))
+
+    return evaluate
+
+
+if __name__ == "__main__":
+    # Offline demo: each template has a hidden accuracy; an evaluation is one coin flip
+    import zlib
+
+    prompt_variations = [
+        "Answer: {question}",
+        "Please answer: {question}",
+        "Question: {question}\nAnswer:",
+        "Answer the following question: {question}",
+        "Q: {question}\nA:",
+        "Please provide an answer to: {question}",
+    ] + [f"Variation {i}: {{question}}" for i in range(26)]
+    rng = random.Random(1)
+    accuracy = {t: rng.uniform(0.5, 0.85) for t in prompt_variations}
+    accuracy["Question: {question}\nAnswer:"] = 0.95
+
+    def simulated(template, example):
+        return float(random.Random(zlib.crc32(f"{template}|{example}".encode())).random() < accuracy[template])
+
+    devset = list(range(100))
+    true_best = max(accuracy, key=accuracy.get)
+    print(f"{len(prompt_variations)} templates x {len(devset)} examples; best is {true_best!r}")
+    for name, run in [("Successive halving", lambda b: b.successive_halving()),
+                      ("UCB, 800 calls", lambda b: b.ucb(budget=800))]:
+        result = run(PromptBandit(prompt_variations, simulated, devset))
+        print(f"{name}: {result.best!r} in {result.calls} calls "
+              f"instead of {result.exhaustive_calls} ({result.saved:.0%} saved)")
@@ -0,0 +1,126 @@
+"""
+Test: Bandit Search over Prompt Templates
+
+Searches simulated templates (each with a hidden accuracy; one
+evaluation is one deterministic coin flip, no LM) and checks that
+successive halving and UCB find the best template in fewer calls than
+scoring every pair, that no (template, example) pair is scored twice,
+that a checkpoint makes a rerun free, and that make_template_evaluator()
+fills the template and scores the LM's reply.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+import zlib
+import random
+import tempfile
+from collections import Counter
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import Checkpoint
+from prompt_bandit import PromptBandit, make_template_evaluator
+
+TEMPLATES = [f"Template {i}: {{question}}" for i in range(16)]
+BEST = TEMPLATES[5]
+DEVSET = list(range(120))
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def simulated(accuracy, calls):
+    """evaluate(template, example): right with the template's accuracy, the same way every time"""
+    def evaluate(template, example):
+        calls[(template, example)] += 1
+        return float(random.Random(zlib.crc32(f"{template}|{example}".encode())).random() < accuracy[template])
+    return evaluate
+
+
+def accuracies(seed):
+    rng = random.Random(seed)
+    accuracy = {t: rng.uniform(0.3, 0.7) for t in TEMPLATES}
+    accuracy[BEST] = 0.95
+    return accuracy
+
+
+def test_successive_halving():
+    """Finds the clearly best template, scores each pair once, and only finalists see every example"""
+    for seed in range(5):
+        calls = Counter()
+        result = PromptBandit(TEMPLATES, simulated(accuracies(seed), calls), DEVSET, seed=seed).successive_halving()
+        if result.best != BEST:
+            check(False, f"seed {seed}: successive halving finds the best template", repr(result))
+        if max(calls.values()) != 1 or sum(calls.values()) != result.calls:
+            check(False, f"seed {seed}: every (template, example) pair is scored once", repr(calls.most_common(3)))
+    check(True, "successive halving finds the best template, each pair scored once (5 seeds)")
+    check(result.saved > 0.5, f"and saves {result.saved:.0%} of the {result.exhaustive_calls} calls")
+    check(result.counts[BEST] == len(DEVSET) and min(result.counts.values()) < len(DEVSET),
+          "the winner is scored on every example, the losers on fewer")
+
+
+def test_ucb():
+    """UCB stays within its budget and finds the best template"""
+    calls = Counter()
+    result = PromptBandit(TEMPLATES, simulated(accuracies(0), calls), DEVSET).ucb(budget=600)
+    check(result.calls <= 600 and sum(calls.values()) == result.calls, f"UCB made {result.calls} calls of 600")
+    check(result.best == BEST, f"UCB finds the best template ({result.best!r})")
+    check(max(calls.values()) == 1, "UCB scores each pair once")
+
+
+def test_checkpoint():
+    """A rerun with the same checkpoint restores every score instead of calling again"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bandit.ckpt")
+        calls = Counter()
+        first = PromptBandit(TEMPLATES, simulated(accuracies(0), calls), DEVSET,
+                             checkpoint=Checkpoint(path)).successive_halving()
+        made = sum(calls.values())
+        second = PromptBandit(TEMPLATES, simulated(accuracies(0), calls), DEVSET,
+                              checkpoint=Checkpoint(path)).successive_halving()
+        check(sum(calls.values()) == made and second.best == first.best, "a rerun makes no calls and picks the same")
+        other = PromptBandit(TEMPLATES[:4], simulated(accuracies(0), calls), DEVSET, checkpoint=Checkpoint(path))
+        check(other.calls == 0, "a checkpoint for other templates is ignored")
+
+
+def test_template_evaluator():
+    """The template is filled with the question and the reply scored by the metric"""
+    class Example:
+        question = "What is AI?"
+        answer = "Artificial Intelligence"
+
+    prompts = []
+
+    def lm(prompt):
+        prompts.append(prompt)
+        return ["AI stands for Artificial Intelligence."]
+
+    evaluate = make_template_evaluator(lm)
+    check(evaluate("Q: {question}\nA:", Example()) == 1.0 and prompts == ["Q: What is AI?\nA:"],
+          "make_template_evaluator() fills the template and scores the reply")
+    check(make_template_evaluator(lambda prompt: ["No idea."])("Q: {question}", Example()) == 0.0,
+          "a wrong reply scores 0")
+    try:
+        PromptBandit([], evaluate, DEVSET)
+        raised = False
+    except ValueError:
+        raised = True
+    check(raised, "no templates raises ValueError")
+
+
+if __name__ == "__main__":
+    test_successive_halving()
+    test_ucb()
+    test_checkpoint()
+    test_template_evaluator()
+    print()
+    print("✅ Prompt bandit works")
@@ -4,11 +4,17 @@ Problem 4: DSPy Solution - Model-Agnostic Code
 DSPy provides model-agnostic interface - same code works with any model.
 """
 
-try:
-    import dspy
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# dspy is only imported once a Signature, Predict, ... is actually built
+from lazy_dspy import dspy, DSPY_AVAILABLE
+from recording_lm import configured_lm
+
+if not DSPY_AVAILABLE:
     print("⚠️  DSPy not installed. Install with: pip install dspy-ai")
 
 
@@ -20,6 +26,7 @@ def dspy_model_agnostic_solution():
     print("=" * 70)
     print()
     
+    # dspy itself is only imported below, once there is a model to run it on
     if not DSPY_AVAILABLE:
         print("✅ Code structure (would work with DSPy):")
         print()
@@ -54,12 +61,7 @@ qa = dspy.Predict(QA)  # Same code!
         """)
         return
     
-    # Step 1: Define signature (model-agnostic)
-    class QA(dspy.Signature):
-        """Answer questions accurately."""
-        question = dspy.InputField()
-        answer = dspy.OutputField()
-    
+    # Step 1: Define signature (model-agnostic; built below, once there is a model)
     print("✅ Step 1: Define signature (model-agnostic)")
     print("   - Same signature works with any model")
     print()
@@ -83,6 +85,25 @@ qa = dspy.Predict(QA)  # Same code!
         print(f"    qa = dspy.Predict(QA)  # Same code!")
         print()
     
+    # The recorded run's model (DSPY_LM_RECORDING: recorded with a key, replayed without)
+    lm = configured_lm()
+    if lm is not None:
+        class QA(dspy.Signature):
+            """Answer questions accurately."""
+            question = dspy.InputField()
+            answer = dspy.OutputField()
+        
+        print(f"✅ Step 3: The same Predict(QA) on {lm.model}")
+        print("-" * 70)
+        try:
+            with dspy.context(lm=lm):
+                result = dspy.Predict(QA)(question="What is AI?")
+            print(f"  Question: What is AI?")
+            print(f"  Answer: {result.answer}")
+        except Exception as e:
+            print("⚠️  Error calling the model:", str(e))
+        print()
+    
     print("✅ Benefits:")
     print("  - Model-agnostic: Same code, any model")
     print("  - Easy switching: Change model with one line")
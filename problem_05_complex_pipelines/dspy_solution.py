@@ -4,11 +4,17 @@ Problem 5: DSPy Solution - Modular, Composable Pipelines
 DSPy provides modular building blocks that can be composed and optimized.
 """
 
-try:
-    import dspy
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# dspy is only imported once a Signature, Predict, ... is actually built
+from lazy_dspy import dspy, DSPY_AVAILABLE
+from recording_lm import configured_lm
+
+if not DSPY_AVAILABLE:
     print("⚠️  DSPy not installed. Install with: pip install dspy-ai")
 
 
@@ -20,6 +26,7 @@ def dspy_pipeline_solution():
     print("=" * 70)
     print()
     
+    # dspy itself is only imported below, once there is a model to run it on
     if not DSPY_AVAILABLE:
         print("✅ Code structure (would work with DSPy):")
         print()
@@ -96,6 +103,37 @@ optimized_pipeline = optimizer.compile(
     print("  - All together: End-to-end optimization")
     print()
     
+    # Run a small pipeline end to end, only in a recorded run (DSPY_LM_RECORDING)
+    lm = configured_lm()
+    if lm is not None:
+        print("✅ Step 3: Run a pipeline")
+        print("-" * 70)
+        passages = [
+            "AI (artificial intelligence) is the simulation of human intelligence by machines.",
+            "ML (machine learning) lets systems learn from data instead of explicit rules.",
+            "NLP (natural language processing) is how computers work with human language.",
+        ]
+        
+        class KeywordRAG(dspy.Module):
+            """RAGPipeline with a keyword match instead of a configured retriever"""
+            def __init__(self):
+                super().__init__()
+                self.generate = dspy.ChainOfThought("context, question -> answer")
+            
+            def forward(self, question):
+                words = {w.strip("?.,").lower() for w in question.split()}
+                context = [p for p in passages if words & {w.strip("().,").lower() for w in p.split()}]
+                return self.generate(context=context, question=question)
+        
+        try:
+            with dspy.context(lm=lm):
+                result = KeywordRAG()(question="What is NLP?")
+            print(f"  Question: What is NLP?")
+            print(f"  Answer: {result.answer}")
+        except Exception as e:
+            print("⚠️  Error running the pipeline:", str(e))
+        print()
+    
     print("✅ Benefits:")
     print("  - Modular: Compose building blocks")
     print("  - Optimizable: Optimize entire pipeline")
@@ -4,11 +4,17 @@ Problem 6: DSPy Solution - Systematic Performance Improvement
 DSPy provides systematic optimization with metrics and automatic search.
 """
 
-try:
-    import dspy
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# dspy is only imported once a Signature, Predict, ... is actually built
+from lazy_dspy import dspy, DSPY_AVAILABLE
+from recording_lm import configured_lm
+
+if not DSPY_AVAILABLE:
     print("⚠️  DSPy not installed. Install with: pip install dspy-ai")
 
 
@@ -20,6 +26,7 @@ def dspy_systematic_improvement_solution():
     print("=" * 70)
     print()
     
+    # dspy itself is only imported below, once there is a model to run it on
     if not DSPY_AVAILABLE:
         print("✅ Code structure (would work with DSPy):")
         print()
@@ -65,6 +72,8 @@ def validate_answer(example, pred, trace=None):
     print("  - Define what 'good' means for your task")
     print("  - Framework uses this to guide optimization")
     print("  - Can be any function (accuracy, F1, custom)")
+    print("  - answer_metric.AnswerMetric(trainset) is the same metric, with the")
+    print("    expected answers lowercased once and a score_batch() for whole rounds")
     print()
     
     print("✅ Step 2: Systematic optimization")
@@ -88,6 +97,54 @@ optimized = optimizer.compile(student=QA, trainset=examples)
     print("  5. Returns optimized module")
     print()
     
+    # Measure before improving, only in a recorded run (DSPY_LM_RECORDING)
+    lm = configured_lm()
+    if lm is not None:
+        from answer_metric import AnswerMetric
+        print("✅ Step 3: Measure the starting point")
+        print("-" * 70)
+        devset = [
+            dspy.Example(question="What is AI?", answer="Artificial Intelligence").with_inputs("question"),
+            dspy.Example(question="What is ML?", answer="Machine Learning").with_inputs("question"),
+            dspy.Example(question="What is NLP?", answer="Natural Language Processing").with_inputs("question"),
+        ]
+        metric = AnswerMetric(devset)
+        try:
+            qa = dspy.Predict("question -> answer")
+            with dspy.context(lm=lm):
+                predictions = [qa(**example.inputs()) for example in devset]
+            print(f"  Baseline accuracy: {metric.accuracy(predictions):.0%} on {len(devset)} questions")
+        except Exception as e:
+            print("⚠️  Error measuring the baseline:", str(e))
+        print()
+        
+        # A small grid searched the way search_space.py searches the 3,000-combination one
+        from search_space import SearchSpace, search
+        print("✅ Step 4: Search instructions x demos")
+        print("-" * 70)
+        space = SearchSpace(
+            instructions=["Answer questions accurately.", "Expand the abbreviation in the question."],
+            demos=[[], [dspy.Example(question="What is DL?", answer="Deep Learning")]],
+        )
+        
+        def objective(values):
+            qa = dspy.Predict(dspy.Signature("question -> answer", values["instructions"]))
+            qa.demos = values["demos"]
+            with dspy.context(lm=lm):
+                return metric.accuracy([qa(**example.inputs()) for example in devset])
+        
+        try:
+            report = search(space, objective, budget=3, seed=0)
+            print(f"  Search pick: {report.best['instructions']!r} with {len(report.best['demos'])} demo(s), "
+                  f"{report.best_score:.0%} after {report.evaluations} of {space.size} combinations")
+        except Exception as e:
+            print("⚠️  Error searching the grid:", str(e))
+        print()
+    else:
+        print("💡 Searching the full grid: search_space.py finds a strong combination of")
+        print("   prompt x examples x model x retrieval without evaluating all 3,000.")
+        print()
+    
     print("✅ Benefits:")
     print("  - Systematic: Explores search space efficiently")
     print("  - Metric-driven: Optimizes what you care about")
@@ -0,0 +1,251 @@
+"""
+Searching the 3,000-Combination Improvement Grid
+
+10 prompts x 20 example sets x 5 models x 3 retrieval strategies is
+3,000 combinations - far too many to evaluate one by one. The factors
+are mostly independent, though: a good prompt tends to stay good with
+other example sets. TPESampler (Tree-structured Parzen Estimator, for
+categorical factors) uses that:
+
+1. evaluate a few random combinations
+2. split the results into the best quarter and the rest
+3. for each factor, prefer values that show up more often in the best
+   quarter than in the rest, and propose the most promising untried
+   combination
+4. repeat until the budget is spent
+
+Evaluating a combination is usually a pipeline, and its early stages
+only depend on some factors - retrieval only on the strategy, for
+example. StagedObjective caches each stage by its own factors, so those
+results are shared between every combination that agrees on them.
+
+    space = SearchSpace(prompt=prompts, examples=example_sets, model=models, retrieval=strategies)
+    report = search(space, objective, budget=100)
+    report.best, report.best_score, report.evaluations, report.fraction
+
+Run `python search_space.py` for an offline demo on a synthetic grid.
+"""
+
+import math
+import random
+
+
+class SearchSpace:
+    """Named categorical factors and their choices"""
+
+    def __init__(self, **factors):
+        if not factors:
+            raise ValueError("a search space needs at least one factor")
+        self.factors = {name: list(choices) for name, choices in factors.items()}
+
+    @property
+    def names(self):
+        return list(self.factors)
+
+    @property
+    def size(self):
+        return math.prod(len(choices) for choices in self.factors.values())
+
+    def sample(self, rng):
+        """A uniformly random configuration, as {factor: choice index}"""
+        return {name: rng.randrange(len(choices)) for name, choices in self.factors.items()}
+
+    def key(self, config):
+        return tuple(config[name] for name in self.factors)
+
+    def values(self, config):
+        """{factor: choice} for a configuration of choice indices"""
+        return {name: self.factors[name][config[name]] for name in self.factors}
+
+
+class TPESampler:
+    """
+    Proposes configurations with a categorical TPE.
+
+    gamma: share of results that count as good
+    startup: random configurations before the model is used
+    candidates: draws from the good-value distribution per proposal
+    prior: pseudo-count per choice, so unseen values keep some chance
+    """
+
+    def __init__(self, space, gamma=0.25, startup=20, candidates=32, prior=1.0, seed=None):
+        self.space = space
+        self.gamma = gamma
+        self.startup = startup
+        self.candidates = candidates
+        self.prior = prior
+        self.rng = random.Random(seed)
+
+    def _densities(self, configs, name):
+        size = len(self.space.factors[name])
+        counts = [self.prior] * size
+        for config in configs:
+            counts[config[name]] += 1
+        total = sum(counts)
+        return [c / total for c in counts]
+
+    def propose(self, history, tried):
+        """Next untried configuration, given [(config, score), ...] so far"""
+        if len(tried) >= self.space.size:
+            return None
+        if len(history) < self.startup:
+            return self._random_untried(tried)
+
+        ranked = sorted(history, key=lambda item: item[1], reverse=True)
+        cut = max(1, int(math.ceil(self.gamma * len(ranked))))
+        good = [config for config, _ in ranked[:cut]]
+        bad = [config for config, _ in ranked[cut:]]
+        good_density = {name: self._densities(good, name) for name in self.space.names}
+        bad_density = {name: self._densities(bad, name) for name in self.space.names}
+
+        best, best_ratio = None, -math.inf
+        for _ in range(self.candidates):
+            config = {name: self.rng.choices(range(len(p)), weights=p)[0] for name, p in good_density.items()}
+            if self.space.key(config) in tried:
+                continue
+            ratio = sum(math.log(good_density[n][config[n]] / bad_density[n][config[n]]) for n in self.space.names)
+            if ratio > best_ratio:
+                best, best_ratio = config, ratio
+        return best if best is not None else self._random_untried(tried)
+
+    def _random_untried(self, tried):
+        while True:
+            config = self.space.sample(self.rng)
+            if self.space.key(config) not in tried:
+                return config
+
+
+class StagedObjective:
+    """
+    An objective built from stages, each cached by the factors it depends on.
+
+    stages: [(name, factors, fn), ...] in pipeline order. fn(values, upstream)
+    gets {factor: choice} for the whole configuration and the previous
+    stage's result; the last stage returns the score. A stage's cache key
+    is its own factors plus those of every earlier stage.
+
+    Called with the configuration's choice indices as well (search() does),
+    the cache is keyed on those, so choices needn't be hashable - example
+    sets are lists. Without them the choices themselves are the key.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.cache = {name: {} for name, _, _ in stages}
+        self.hits = {name: 0 for name, _, _ in stages}
+        self.misses = {name: 0 for name, _, _ in stages}
+
+    def __call__(self, values, config=None):
+        result = None
+        depends_on = []
+        choices = values if config is None else config
+        for name, factors, fn in self.stages:
+            depends_on.extend(f for f in factors if f not in depends_on)
+            key = tuple(choices[f] for f in depends_on)
+            cache = self.cache[name]
+            if key in cache:
+                self.hits[name] += 1
+            else:
+                self.misses[name] += 1
+                cache[key] = fn(values, result)
+            result = cache[key]
+        return result
+
+    def stage_stats(self):
+        return {name: {"computed": self.misses[name], "reused": self.hits[name]} for name in self.cache}
+
+
+class SearchReport:
+    """Outcome of search(): best configuration and what the search cost (best is None if nothing ran)"""
+
+    def __init__(self, space, history, objective):
+        self.space = space
+        self.history = history
+        self.best, self.best_score = None, None
+        if history:
+            best_config, self.best_score = max(history, key=lambda item: item[1])
+            self.best = space.values(best_config)
+        self.stages = objective.stage_stats() if isinstance(objective, StagedObjective) else None
+
+    @property
+    def evaluations(self):
+        return len(self.history)
+
+    @property
+    def fraction(self):
+        """Share of the full grid that was evaluated"""
+        return self.evaluations / self.space.size
+
+    def print_report(self):
+        if self.best is None:
+            print("No combinations evaluated")
+        else:
+            print(f"Best score: {self.best_score:.3f}")
+            for name, value in self.best.items():
+                print(f"  {name}: {value}")
+        print(f"Evaluated {self.evaluations} of {self.space.size} combinations "
+              f"({self.fraction:.1%}; {self.space.size - self.evaluations} evaluations saved)")
+        if self.stages:
+            for name, counts in self.stages.items():
+                print(f"  stage {name}: computed {counts['computed']}, reused {counts['reused']}")
+
+
+def search(space, objective, budget=100, sampler=None, seed=None):
+    """
+    Evaluate up to `budget` configurations chosen by a TPESampler.
+
+    objective(values) gets {factor: choice} and returns a score (higher
+    is better); use a StagedObjective to share work between configurations
+    (it is also given the choice indices, to key its caches on).
+    """
+    sampler = sampler or TPESampler(space, seed=seed)
+    history = []
+    tried = set()
+    while len(history) < budget:
+        config = sampler.propose(history, tried)
+        if config is None:
+            break
+        tried.add(space.key(config))
+        values = space.values(config)
+        score = objective(values, config) if isinstance(objective, StagedObjective) else objective(values)
+        history.append((config, score))
+    return SearchReport(space, history, objective)
+
+
+if __name__ == "__main__":
+    # Offline demo: a synthetic grid where each factor adds its own effect,
+    # plus a prompt x model interaction
+    rng = random.Random(7)
+    space = SearchSpace(
+        prompt=[f"prompt-{i}" for i in range(10)],
+        examples=[f"examples-{i}" for i in range(20)],
+        model=[f"model-{i}" for i in range(5)],
+        retrieval=["bm25", "dense", "hybrid"],
+    )
+    effect = {name: {c: rng.gauss(0, 0.05) for c in choices} for name, choices in space.factors.items()}
+    interaction = {(p, m): rng.gauss(0, 0.02) for p in space.factors["prompt"] for m in space.factors["model"]}
+
+    def retrieve(values, _):
+        return effect["retrieval"][values["retrieval"]]
+
+    def render(values, retrieval_quality):
+        return retrieval_quality + effect["prompt"][values["prompt"]] + effect["examples"][values["examples"]]
+
+    def score(values, prompt_quality):
+        return 0.6 + prompt_quality + effect["model"][values["model"]] + interaction[values["prompt"], values["model"]]
+
+    exhaustive = max(
+        score(v, render(v, retrieve(v, None)))
+        for v in (space.values(dict(zip(space.names, idx)))
+                  for idx in ((p, e, m, r) for p in range(10) for e in range(20) for m in range(5) for r in range(3)))
+    )
+    objective = StagedObjective([
+        ("retrieve", ["retrieval"], retrieve),
+        ("render", ["prompt", "examples"], render),
+        ("score", ["model"], score),
+    ])
+    report = search(space, objective, budget=90, seed=1)
+    report.print_report()
+    random_search = search(space, objective, budget=90, sampler=TPESampler(space, startup=90, seed=1))
+    print(f"Random search, same budget: {random_search.best_score:.3f}")
+    print(f"Best of all {space.size}: {exhaustive:.3f}")
@@ -0,0 +1,123 @@
+"""
+Test: Searching the Improvement Grid
+
+Searches synthetic grids (no LM) and checks that search() never
+evaluates a combination twice, keeps to its budget and stops when the
+grid runs out, that TPE beats random search on a grid whose factors
+add up, and that StagedObjective computes each stage once per distinct
+set of the factors it depends on, even for unhashable choices.
+
+Exits non-zero on the first failure.
+"""
+
+import os
+import sys
+import random
+from collections import Counter
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_space import SearchSpace, TPESampler, StagedObjective, search
+
+
+def check(condition, message, details=""):
+    if not condition:
+        print(f"❌ {message}")
+        if details:
+            print(details[-2000:])
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def additive_grid(seed):
+    """A 10 x 20 x 5 x 3 grid where every factor adds its own effect"""
+    rng = random.Random(seed)
+    space = SearchSpace(
+        prompt=[f"prompt-{i}" for i in range(10)],
+        examples=[f"examples-{i}" for i in range(20)],
+        model=[f"model-{i}" for i in range(5)],
+        retrieval=["bm25", "dense", "hybrid"],
+    )
+    effect = {name: {c: rng.gauss(0, 0.05) for c in choices} for name, choices in space.factors.items()}
+
+    def objective(values):
+        return 0.6 + sum(effect[name][value] for name, value in values.items())
+
+    best = 0.6 + sum(max(choices.values()) for choices in effect.values())
+    return space, objective, best
+
+
+def test_space():
+    space = SearchSpace(a=[1, 2, 3], b=["x", "y"])
+    check(space.size == 6 and space.names == ["a", "b"], "size and names")
+    check(space.values({"a": 2, "b": 0}) == {"a": 3, "b": "x"}, "values() maps choice indices to choices")
+    try:
+        SearchSpace()
+        raised = False
+    except ValueError:
+        raised = True
+    check(raised, "a space without factors raises ValueError")
+
+
+def test_budget_and_uniqueness():
+    """Each combination is evaluated at most once, within the budget, until the grid runs out"""
+    space, objective, _ = additive_grid(0)
+    seen = Counter()
+
+    def counting(values):
+        seen[tuple(values.values())] += 1
+        return objective(values)
+
+    report = search(space, counting, budget=90, seed=1)
+    check(report.evaluations == 90 == sum(seen.values()) and max(seen.values()) == 1,
+          "90 distinct combinations for a budget of 90")
+    small = SearchSpace(a=[1, 2], b=[1, 2, 3])
+    report = search(small, lambda values: values["a"] * values["b"], budget=50, seed=0)
+    check(report.evaluations == small.size and report.best == {"a": 2, "b": 3}, "a small grid is exhausted, not repeated")
+    empty = search(small, lambda values: 0, budget=0)
+    check(empty.best is None and empty.evaluations == 0, "a zero budget reports no best")
+
+
+def test_tpe_beats_random():
+    """On additive grids, TPE's best beats random search's at the same budget"""
+    tpe_total = random_total = 0.0
+    for seed in range(8):
+        space, objective, best = additive_grid(seed)
+        tpe = search(space, objective, budget=90, seed=seed)
+        rand = search(space, objective, budget=90, sampler=TPESampler(space, startup=90, seed=seed))
+        tpe_total += best - tpe.best_score
+        random_total += best - rand.best_score
+    check(tpe_total < random_total,
+          f"mean gap to the grid's best: TPE {tpe_total / 8:.4f}, random {random_total / 8:.4f}")
+
+
+def test_staged_objective():
+    """Stages are computed once per distinct value of their factors; list choices work"""
+    space = SearchSpace(retrieval=["bm25", "dense"], demos=[[], ["ex1"], ["ex1", "ex2"]], model=["a", "b"])
+    computed = Counter()
+
+    def retrieve(values, _):
+        computed["retrieve"] += 1
+        return len(values["retrieval"])
+
+    def score(values, upstream):
+        computed["score"] += 1
+        return upstream + len(values["demos"]) + (values["model"] == "b")
+
+    objective = StagedObjective([("retrieve", ["retrieval"], retrieve), ("score", ["demos", "model"], score)])
+    report = search(space, objective, budget=space.size, seed=0)
+    check(report.evaluations == space.size and report.best_score == 5 + 2 + 1, "every combination scored, best found")
+    check(computed["retrieve"] == 2 and computed["score"] == space.size,
+          f"retrieval computed once per strategy ({computed['retrieve']}), scores once per combination")
+    stats = report.stages
+    check(stats["retrieve"] == {"computed": 2, "reused": space.size - 2}, "the report counts reused stages", repr(stats))
+
+
+if __name__ == "__main__":
+    test_space()
+    test_budget_and_uniqueness()
+    test_tpe_beats_random()
+    test_staged_objective()
+    print()
+    print("✅ Search space works")
@@ -4,11 +4,17 @@ Problem 7: DSPy Solution - Version-Controlled, Reproducible Modules
 DSPy provides version control and reproducibility for prompts.
 """
 
-try:
-    import dspy
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# dspy is only imported once a Signature, Predict, ... is actually built
+from lazy_dspy import dspy, DSPY_AVAILABLE
+from recording_lm import configured_lm
+
+if not DSPY_AVAILABLE:
     print("⚠️  DSPy not installed. Install with: pip install dspy-ai")
 
 
@@ -20,6 +26,7 @@ def dspy_versioning_solution():
     print("=" * 70)
     print()
     
+    # dspy itself is only imported below, once there is a model to run it on
     if not DSPY_AVAILABLE:
         print("✅ Code structure (would work with DSPy):")
         print()
@@ -91,6 +98,30 @@ result = qa_v1(question="What is AI?")
     print("  - Compare versions")
     print()
     
+    # Save, reload and compare, only in a recorded run (DSPY_LM_RECORDING)
+    lm = configured_lm()
+    if lm is not None:
+        import tempfile
+        print("✅ Save and reload a module")
+        print("-" * 70)
+        try:
+            qa = dspy.Predict("question -> answer")
+            qa.demos = [dspy.Example(question="What is ML?", answer="Machine Learning")]
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "qa_v1.0.json")
+                qa.save(path)
+                reloaded = dspy.Predict("question -> answer")
+                reloaded.load(path)
+            with dspy.context(lm=lm):
+                before = qa(question="What is AI?").answer
+                after = reloaded(question="What is AI?").answer
+            print(f"  Answer before saving: {before}")
+            print(f"  Answer after loading: {after}")
+            print(f"  Same prompt, same demos: {qa.dump_state() == reloaded.dump_state()}")
+        except Exception as e:
+            print("⚠️  Error saving or loading the module:", str(e))
+        print()
+    
     print("✅ Step 4: Version control workflow")
     print("-" * 70)
     print("""
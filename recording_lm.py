@@ -0,0 +1,292 @@
+"""
+Recording LM: Record Real Model Outputs Once, Replay Them Offline
+
+RecordingLM wraps any DSPy LM. In record mode every call goes to the
+real model and the (request, response) pair is appended to a log file.
+In replay mode calls are answered from that log, with no API key, no
+network and no cost - and with real model outputs, unlike a mock.
+
+    lm = RecordingLM("qa.lmlog", LM(model="openai/gpt-3.5-turbo"), mode="record")
+    dspy.configure(lm=lm)            # run once with an API key
+
+    lm = RecordingLM("qa.lmlog", mode="replay")
+    dspy.configure(lm=lm)            # run anywhere, in milliseconds
+
+It is a dspy.BaseLM (DSPy 2.6+): recording and replay happen in
+forward()/aforward(), so DSPy's callbacks, history and usage tracking
+see replayed calls like real ones. The class is built (and dspy
+imported) the first time it is used, so importing this module is cheap.
+
+Scripts pick this up from the environment through lm_from_env():
+
+    DSPY_LM_RECORDING=qa.lmlog               log file
+    DSPY_LM_RECORDING_MODE=record|replay|auto (default: auto - replay what's
+                                              recorded, record the rest)
+
+The recorded sections of problems 2-7 get their LM from configured_lm(),
+which returns one only when DSPY_LM_RECORDING is set, so a plain run with
+an API key makes no extra paid calls.
+
+Log format: one line per call, `<sha256 of request>\t<JSON response>`,
+where the response is the provider's OpenAI-style reply (choices and
+usage). The file is memory-mapped and indexed by hash when opened, so a
+lookup reads only the one matching line. The model isn't part of the
+hash (a replay has no model to ask), so keep one log per model.
+"""
+
+import os
+import json
+import mmap
+import hashlib
+import threading
+
+from lazy_dspy import dspy
+
+KEY_LENGTH = 64  # hex sha256
+
+MODES = ("record", "replay", "auto")
+
+
+class ReplayMiss(KeyError):
+    """A replayed call that was never recorded"""
+
+
+class RecordedResponse(dict):
+    """A replayed response: a dict that also reads like the provider's object (response.choices[0].message)"""
+
+    def __getattr__(self, name):
+        try:
+            return _wrap(self[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _wrap(value):
+    if isinstance(value, dict) and not isinstance(value, RecordedResponse):
+        return RecordedResponse(value)
+    if isinstance(value, list):
+        return [_wrap(item) for item in value]
+    return value
+
+
+def response_json(response):
+    """A provider response (litellm ModelResponse, pydantic model, dict) as plain JSON data"""
+    if hasattr(response, "model_dump"):
+        response = response.model_dump()
+    if isinstance(response, dict):
+        return {str(k): response_json(v) for k, v in response.items() if not str(k).startswith("_")}
+    if isinstance(response, (list, tuple)):
+        return [response_json(item) for item in response]
+    if response is None or isinstance(response, (str, int, float, bool)):
+        return response
+    if hasattr(response, "__dict__"):
+        return response_json(vars(response))
+    return str(response)
+
+
+def request_key(prompt, messages, kwargs):
+    """Hash of everything in a call that decides the response"""
+    payload = json.dumps(
+        {"prompt": prompt, "messages": messages, "kwargs": kwargs},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+_recording_lm_class = None
+
+
+def recording_lm_class():
+    """
+    The RecordingLM class, built on first use.
+
+    It subclasses dspy.BaseLM, so building it imports dspy; scripts that
+    only import this module (and never record or replay) stay fast.
+    Raises ImportError without DSPy 2.6+.
+    """
+    global _recording_lm_class
+    if _recording_lm_class is None:
+        try:
+            BaseLM = dspy.BaseLM
+        except (ImportError, AttributeError) as e:  # dspy not installed, or older than 2.6
+            raise ImportError("RecordingLM needs DSPy 2.6+ (dspy.BaseLM)") from e
+        _recording_lm_class = _build_recording_lm(BaseLM)
+    return _recording_lm_class
+
+
+def _build_recording_lm(BaseLM):
+    class RecordingLM(BaseLM):
+        """
+        Drop-in LM that records calls to a log, or replays them from it.
+
+        mode is "record" (always call the wrapped LM and log the result),
+        "replay" (only answer from the log; unknown calls raise ReplayMiss)
+        or "auto" (replay when recorded, otherwise record).
+
+        copy() (used by optimizers, e.g. lm.copy(temperature=1.0)) returns a
+        RecordingLM over a copy of the wrapped LM that shares this log; the
+        copy's settings are part of the request hash.
+        """
+
+        def __init__(self, path, lm=None, mode="auto", model=None):
+            if mode not in MODES:
+                raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+            if mode == "record" and lm is None:
+                raise ValueError("record mode needs an LM to record")
+            super().__init__(model or getattr(lm, "model", "recorded"),
+                             model_type=getattr(lm, "model_type", "chat"), cache=False)
+            self.kwargs = dict(getattr(lm, "kwargs", {}) or {})
+            self.path = path
+            self.lm = lm
+            self.mode = mode
+            self.overrides = {}  # settings given to copy(); they change the response, so they are hashed
+            self._counts = {"hits": 0, "misses": 0}
+            self._lock = threading.Lock()
+            self._index = {}     # key -> (offset, length) in the mapped log
+            self._recent = {}    # key -> response recorded since the log was mapped
+            self._map = None
+            self._load_index()
+
+        def _load_index(self):
+            """Map the log and index every line by its key"""
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                return
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            position = 0
+            size = len(self._map)
+            while position < size:
+                end = self._map.find(b"\n", position)
+                if end == -1:
+                    break  # torn last line from an interrupted write
+                if end - position > KEY_LENGTH:
+                    key = self._map[position:position + KEY_LENGTH].decode()
+                    self._index[key] = (position + KEY_LENGTH + 1, end - position - KEY_LENGTH - 1)
+                position = end + 1
+
+        @property
+        def hits(self):
+            """Calls answered from the log (this LM and its copies)"""
+            return self._counts["hits"]
+
+        @property
+        def misses(self):
+            """Calls that went to the wrapped LM (this LM and its copies)"""
+            return self._counts["misses"]
+
+        def lookup(self, key):
+            """Recorded response for a request key, or None"""
+            if key in self._recent:
+                return self._recent[key]
+            location = self._index.get(key)
+            if location is None:
+                return None
+            offset, length = location
+            return json.loads(self._map[offset:offset + length])
+
+        def _append(self, key, response):
+            line = f"{key}\t{json.dumps(response, separators=(',', ':'))}\n"
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._recent[key] = response
+
+        def _key(self, prompt, messages, kwargs):
+            return request_key(prompt, messages, {**self.overrides, **kwargs})
+
+        def _replay(self, key):
+            """Recorded response, None if this call must go to the model"""
+            if self.mode != "record":
+                with self._lock:
+                    response = self.lookup(key)
+                    if response is not None:
+                        self._counts["hits"] += 1
+                if response is not None:
+                    return RecordedResponse(response)
+            if self.mode == "replay" or self.lm is None:
+                raise ReplayMiss(f"No recorded response for this call in {self.path}")
+            with self._lock:
+                self._counts["misses"] += 1
+            return None
+
+        def _record(self, key, response):
+            with self._lock:
+                self._append(key, response)
+
+        def forward(self, prompt=None, messages=None, **kwargs):
+            key = self._key(prompt, messages, kwargs)
+            response = self._replay(key)
+            if response is None:
+                response = self.lm.forward(prompt=prompt, messages=messages, **kwargs)
+                self._record(key, response_json(response))
+            return response
+
+        async def aforward(self, prompt=None, messages=None, **kwargs):
+            key = self._key(prompt, messages, kwargs)
+            response = self._replay(key)
+            if response is None:
+                response = await self.lm.aforward(prompt=prompt, messages=messages, **kwargs)
+                self._record(key, response_json(response))
+            return response
+
+        def copy(self, **kwargs):
+            """A RecordingLM over lm.copy(**kwargs), writing to the same log"""
+            new = super().copy(**kwargs)
+            if self.lm is not None:
+                new.lm = self.lm.copy(**kwargs)
+            new.overrides = {k: v for k, v in {**self.overrides, **kwargs}.items() if v is not None}
+            return new
+
+        @property
+        def recorded(self):
+            """Number of distinct calls in the log"""
+            return len(self._index.keys() | self._recent.keys())
+
+    RecordingLM.__module__ = __name__
+    return RecordingLM
+
+
+def __getattr__(name):
+    # `from recording_lm import RecordingLM` builds the class (and imports dspy) only then
+    if name == "RecordingLM":
+        return recording_lm_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def lm_from_env(lm=None):
+    """
+    Wrap lm in a RecordingLM if DSPY_LM_RECORDING is set, else return it.
+
+    Without an LM (no API key), a RecordingLM is only returned when there
+    is a recording to replay; otherwise the result is None.
+    """
+    path = os.getenv("DSPY_LM_RECORDING")
+    if not path:
+        return lm
+    mode = os.getenv("DSPY_LM_RECORDING_MODE", "auto")
+    if lm is None:
+        if not os.path.exists(path):
+            return None
+        mode = "replay"
+    return recording_lm_class()(path, lm, mode=mode)
+
+
+def configured_lm():
+    """
+    The LM for a script's recorded section, or None.
+
+    Only with DSPY_LM_RECORDING set: OPENAI_API_KEY / ANTHROPIC_API_KEY
+    record the real model, no key replays the recording. None without it
+    (even with a key), and when dspy can't be imported.
+    """
+    if not os.getenv("DSPY_LM_RECORDING"):
+        return None
+    try:
+        recording_lm_class()
+    except ImportError:
+        return None
+    if os.getenv("OPENAI_API_KEY"):
+        return lm_from_env(dspy.LM(model="openai/gpt-3.5-turbo"))
+    if os.getenv("ANTHROPIC_API_KEY"):
+        return lm_from_env(dspy.LM(model="anthropic/claude-3-haiku-20240307"))
+    return lm_from_env()
@@ -0,0 +1,99 @@
+"""
+Machine-readable Test Results
+
+Used by `run_all_tests.py --report results.json --junit results.xml`.
+Each script run becomes one record with its status, exit code, wall
+time, peak RSS and output sizes, so CI can track them across runs
+without scraping the colored console output.
+"""
+
+import sys
+import json
+import platform
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+# Characters of a failing script's output kept in the reports
+OUTPUT_EXCERPT = 2000
+
+
+def make_record(problem, name, script_name, status, output, stats):
+    """One script run, as stored in the reports"""
+    record = {
+        "problem": problem,
+        "name": name,
+        "script": script_name,
+        "status": status,
+        "returncode": stats.get("returncode"),
+        "timed_out": stats.get("timed_out", False),
+        "wall_s": round(stats.get("wall_us", 0) / 1_000_000, 6),
+        "peak_rss_kb": stats.get("peak_rss_kb"),
+        "stdout_bytes": stats.get("stdout_bytes"),
+        "stderr_bytes": stats.get("stderr_bytes"),
+    }
+    if status != "passed":
+        record["output"] = output[:OUTPUT_EXCERPT]
+    return record
+
+
+def build_report(records, dspy_installed, runner):
+    """The JSON report: run metadata, per-script records and totals"""
+    statuses = [r["status"] for r in records]
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "dspy_installed": dspy_installed,
+        "runner": runner,
+        "summary": {
+            "scripts": len(records),
+            "passed": statuses.count("passed"),
+            "warning": statuses.count("warning"),
+            "failed": statuses.count("failed"),
+            "skipped": statuses.count("skipped"),
+            "total_wall_s": round(sum(r["wall_s"] for r in records), 6),
+        },
+        "scripts": records,
+    }
+
+
+def write_json_report(report, path):
+    """Write the JSON report"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def write_junit(records, path):
+    """
+    Write a JUnit XML file: one testsuite per problem, one testcase per script.
+
+    Failures become <failure>; warnings (scripts that need API keys or
+    the framework) and scripts skipped over the time budget become
+    <skipped>, since they don't fail the run.
+    """
+    suites = ET.Element("testsuites")
+    for problem in dict.fromkeys(r["problem"] for r in records):
+        cases = [r for r in records if r["problem"] == problem]
+        suite = ET.SubElement(suites, "testsuite", {
+            "name": problem,
+            "tests": str(len(cases)),
+            "failures": str(sum(1 for r in cases if r["status"] == "failed")),
+            "skipped": str(sum(1 for r in cases if r["status"] in ("warning", "skipped"))),
+            "time": f"{sum(r['wall_s'] for r in cases):.3f}",
+        })
+        for record in cases:
+            case = ET.SubElement(suite, "testcase", {
+                "classname": problem,
+                "name": record["script"],
+                "time": f"{record['wall_s']:.3f}",
+            })
+            properties = ET.SubElement(case, "properties")
+            for key in ("returncode", "peak_rss_kb", "stdout_bytes", "stderr_bytes"):
+                ET.SubElement(properties, "property", {"name": key, "value": str(record[key])})
+            if record["status"] == "failed":
+                failure = ET.SubElement(case, "failure", {"message": record["output"][:200]})
+                failure.text = record["output"]
+            elif record["status"] in ("warning", "skipped"):
+                ET.SubElement(case, "skipped", {"message": record["output"][:200]})
+
+    ET.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
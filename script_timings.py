@@ -0,0 +1,93 @@
+"""
+Script Timing History for the Test Runner
+
+run_all_tests.py records how long every script took in a small JSON
+file (default: .test_timings.json) and uses it on the next run:
+
+- each script's timeout is its baseline runtime × a multiplier, kept
+  between MIN_TIMEOUT (so a tenth-of-a-second script isn't killed by a
+  scheduling hiccup) and MAX_TIMEOUT
+- with a time budget, the slowest scripts are started first
+- scripts that took much longer than their baseline are listed at the end
+
+Only runs that finished are recorded. A run that timed out says nothing
+about how long the script takes, and recording it would raise the next
+timeout every time a hung script hits it.
+
+The baseline is the median of the last HISTORY_RUNS runs, so one odd run
+doesn't move it much.
+"""
+
+import json
+import statistics
+
+HISTORY_RUNS = 5
+
+# Bounds on an adaptive timeout, in seconds
+MIN_TIMEOUT = 5.0
+MAX_TIMEOUT = 600.0
+
+# Scripts are only listed as slow if they took at least this many seconds
+SLOW_MIN_SECONDS = 1.0
+
+
+def load_timings(path):
+    """Read the timing history ({script key: [wall seconds, ...]})"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_timings(history, path):
+    """Write the timing history"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+
+
+def record_timing(history, key, wall_s):
+    """Add one run, keeping only the last HISTORY_RUNS"""
+    runs = history.setdefault(key, [])
+    runs.append(round(wall_s, 4))
+    del runs[:-HISTORY_RUNS]
+
+
+def baseline(history, key):
+    """Typical runtime of a script in seconds, or None if it never ran"""
+    runs = history.get(key)
+    return statistics.median(runs) if runs else None
+
+
+def adaptive_timeout(history, key, multiplier, default, minimum=MIN_TIMEOUT, cap=MAX_TIMEOUT):
+    """Timeout for one script: baseline × multiplier within [minimum, cap]; `default` without history"""
+    runtime = baseline(history, key)
+    if runtime is None:
+        return default
+    return min(cap, max(minimum, runtime * multiplier))
+
+
+def slowest_first(keys, history):
+    """Order scripts for scheduling: never-seen ones first, then by baseline, slowest first"""
+    def sort_key(key):
+        runtime = baseline(history, key)
+        return (runtime is not None, -(runtime or 0))
+    return sorted(keys, key=sort_key)
+
+
+def find_slow(history, timings, factor, min_seconds=SLOW_MIN_SECONDS):
+    """
+    Scripts that took more than `factor` × their baseline this run.
+
+    Runs shorter than min_seconds are never slow: at a tenth of a second,
+    a 2× swing is scheduling noise.
+
+    timings is {key: wall seconds} for this run; returns
+    [(key, baseline_s, wall_s)], worst first.
+    """
+    slow = []
+    for key, wall_s in timings.items():
+        runtime = baseline(history, key)
+        if runtime and wall_s > runtime * factor and wall_s >= min_seconds:
+            slow.append((key, runtime, wall_s))
+    return sorted(slow, key=lambda s: s[2] / s[1], reverse=True)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Pre-warmed Script Worker for the Test Runner
+
+Used by `run_all_tests.py --in-process`. Each worker is one long-lived
+Python process that imports the heavy modules (dspy, openai, anthropic)
+once, then runs every problem script's `__main__` with runpy instead of
+starting a fresh interpreter per script.
+
+Between scripts the worker puts back sys.modules, sys.path, sys.argv, the
+working directory, the environment and the global dspy settings (LM,
+callbacks, ...), so one script can't leak state into the next. Results
+carry the same returncode, stdout and stderr as subprocess.run, so the
+runner's pass/fail/warning logic doesn't change.
+
+A worker killed after a timeout or crash is replaced at once, and the
+replacement imports the heavy modules again before it runs anything, so
+no script is ever timed on a cold worker.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import queue
+import runpy
+import threading
+import traceback
+import subprocess
+from contextlib import redirect_stdout, redirect_stderr
+from importlib import import_module
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Imported once per worker, before any script runs
+PRELOAD = ["dspy", "openai", "anthropic"]
+
+
+def preload_modules():
+    """Import the heavy modules so every script finds them in sys.modules"""
+    for name in PRELOAD:
+        try:
+            import_module(name)
+        except ImportError:
+            pass
+
+
+def exit_status(code):
+    """Turn a SystemExit code into a process return code (like the interpreter)"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def print_script_traceback(error, script_path):
+    """Print a traceback starting at the script, hiding the runpy frames"""
+    tb = error.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != str(script_path):
+        tb = tb.tb_next
+    traceback.print_exception(type(error), error, tb or error.__traceback__)
+
+
+def dspy_settings_snapshot():
+    """
+    (config, copy) of dspy's global settings, or None if dspy isn't imported.
+
+    dspy.configure() writes into one module-level dict; a preloaded dspy
+    keeps it across scripts unless it is put back.
+    """
+    settings_module = sys.modules.get("dspy.dsp.utils.settings")
+    config = getattr(settings_module, "main_thread_config", None)
+    if not isinstance(config, dict):
+        return None
+    return config, dict(config)
+
+
+def restore_dspy_settings(snapshot):
+    """Put back settings saved by dspy_settings_snapshot()"""
+    if snapshot is not None:
+        config, saved = snapshot
+        config.clear()
+        config.update(saved)
+
+
+def run_in_process(script_path):
+    """
+    Run a script as __main__ in this process.
+
+    Returns (returncode, stdout, stderr). Modules the script imported are
+    dropped afterwards; the preloaded ones stay warm.
+    """
+    script_path = Path(script_path).resolve()
+    saved_modules = set(sys.modules)
+    saved_path = list(sys.path)
+    saved_argv = sys.argv
+    saved_cwd = os.getcwd()
+    saved_environ = dict(os.environ)
+    saved_dspy_settings = dspy_settings_snapshot()
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+
+    # Same view of the world as `python script.py`
+    sys.argv = [str(script_path)]
+    sys.path.insert(0, str(script_path.parent))
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                runpy.run_path(str(script_path), run_name="__main__")
+            except SystemExit as e:
+                returncode = exit_status(e.code)
+            except Exception as e:
+                print_script_traceback(e, script_path)
+                returncode = 1
+    finally:
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        restore_dspy_settings(saved_dspy_settings)
+        for name in set(sys.modules) - saved_modules:
+            del sys.modules[name]
+
+    return returncode, stdout.getvalue(), stderr.getvalue()
+
+
+def worker_peak_rss_kb():
+    """Peak RSS of this worker so far (shared by every script it ran)"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+def serve():
+    """
+    Worker loop: read one JSON request per line, answer with one JSON line.
+
+    Replies go to a private copy of the original stdout. File descriptor 1
+    is pointed at stderr, so anything a script writes straight to the fd
+    (os.system, child processes) can't corrupt the protocol.
+    """
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+
+    preload_modules()
+    replies.write(json.dumps({"ready": True}) + "\n")
+    replies.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        start = time.perf_counter()
+        returncode, stdout, stderr = run_in_process(request["script"])
+        replies.write(json.dumps({
+            "returncode": returncode,
+            "stdout": stdout,
+            "stderr": stderr,
+            "peak_rss_kb": worker_peak_rss_kb(),
+            "wall_us": int((time.perf_counter() - start) * 1_000_000),
+        }) + "\n")
+        replies.flush()
+
+
+class WarmWorker:
+    """One pre-warmed worker process, started on first use"""
+
+    def __init__(self):
+        self.process = None
+        self.replies = None
+        self.ready = False
+
+    def start(self, wait=True):
+        """
+        Start the worker and a thread that collects its replies.
+
+        Waits until the heavy imports are done (unless wait is false; then
+        call wait_ready()), so they don't count against the first script's
+        timeout.
+        """
+        self.process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve())],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        self.replies = queue.Queue()
+        self.ready = False
+        reader = threading.Thread(target=self._read_replies, args=(self.process, self.replies), daemon=True)
+        reader.start()
+        if wait:
+            self.wait_ready()
+
+    def wait_ready(self):
+        """Block until the worker has imported the heavy modules; False if it died instead"""
+        self.ready = self.replies.get() is not None  # {"ready": true}, or None if the worker died
+        return self.ready
+
+    def restart(self):
+        """Replace the worker with a fresh one that warms up in the background"""
+        self.stop()
+        self.start(wait=False)
+
+    @staticmethod
+    def _read_replies(process, replies):
+        for line in process.stdout:
+            replies.put(json.loads(line))
+        replies.put(None)  # worker exited
+
+    def run(self, script_path, timeout):
+        """
+        Run one script in the worker.
+
+        Returns (returncode, stdout, stderr, peak_rss_kb, wall_us); the RSS
+        is the worker's peak so far, not just this script's, and wall_us is
+        the script's own run time, without any wait for the worker to warm
+        up. Raises subprocess.TimeoutExpired if the script takes too long;
+        the worker is then killed and replaced by one that warms up while
+        the runner moves on.
+        """
+        if self.process is None or self.process.poll() is not None:
+            self.start(wait=False)
+        if not self.ready and not self.wait_ready():
+            self.stop()
+            return 1, "", "Worker process failed to start", None, None
+
+        self.process.stdin.write(json.dumps({"script": str(script_path)}) + "\n")
+        self.process.stdin.flush()
+        try:
+            reply = self.replies.get(timeout=timeout)
+        except queue.Empty:
+            self.restart()
+            raise subprocess.TimeoutExpired(str(script_path), timeout)
+
+        if reply is None:
+            self.restart()
+            return 1, "", "Worker process exited unexpectedly", None, None
+        return reply["returncode"], reply["stdout"], reply["stderr"], reply["peak_rss_kb"], reply["wall_us"]
+
+    def stop(self):
+        """Stop the worker process"""
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+            self.ready = False
+
+
+class WorkerPool:
+    """A fixed number of warm workers shared by the runner's threads"""
+
+    def __init__(self, size):
+        self.workers = [WarmWorker() for _ in range(max(1, size))]
+        self.idle = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+
+    def start(self):
+        """
+        Start every worker and wait until all are warm.
+
+        Call this before timing scripts: otherwise the preload (seconds,
+        for dspy) is charged to whichever script each worker runs first.
+        """
+        for worker in self.workers:
+            worker.start(wait=False)
+        for worker in self.workers:
+            worker.wait_ready()
+
+    def run(self, script_path, timeout):
+        """Run a script on the next idle worker (see WarmWorker.run)"""
+        worker = self.idle.get()
+        try:
+            return worker.run(script_path, timeout)
+        finally:
+            self.idle.put(worker)
+
+    def close(self):
+        """Stop all workers"""
+        for worker in self.workers:
+            worker.stop()
+
+
+if __name__ == "__main__":
+    serve()
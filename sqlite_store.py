@@ -0,0 +1,163 @@
+"""
+SQLite Store: Size-Bounded, LRU-Evicted, TTL-Expiring JSON Values
+
+The on-disk caches in this repository - the LM response cache
+(problem_01_brittle_prompts/lm_cache.py) and the evaluation memo
+(eval_memo.py) - are both this store with their own defaults:
+
+    store = SQLiteStore("answers.sqlite", ttl=3600, max_items=1000)
+    store.put(key, {"answer": "..."})
+    store.get(key)        # the value, or None (missing or expired)
+    store.stats()         # entries, bytes, hits, misses
+
+Entries past max_items / max_bytes are evicted least-recently-used.
+A ttl of 0 keeps entries until they are evicted. One file can be
+shared by several threads and processes (WAL mode).
+
+from_env() reads a store's location and limits from environment
+variables with a common prefix, and main() is the `stats` / `clear`
+command line of a store's module.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    JSON values by string key in one SQLite table, bounded by entry count and size.
+
+    Safe to share between threads; several processes can share one file.
+    """
+
+    def __init__(self, path, ttl=0, max_items=10_000, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+    @classmethod
+    def from_env(cls, prefix, path, ttl=0, max_items=10_000, max_mb=50):
+        """
+        A store configured from <prefix>_PATH, <prefix>_TTL, <prefix>_MAX_ITEMS
+        and <prefix>_MAX_MB, with the arguments as defaults.
+        """
+        return cls(
+            path=os.getenv(f"{prefix}_PATH", path),
+            ttl=float(os.getenv(f"{prefix}_TTL", ttl)),
+            max_items=int(os.getenv(f"{prefix}_MAX_ITEMS", max_items)),
+            max_bytes=int(float(os.getenv(f"{prefix}_MAX_MB", max_mb)) * 1024 * 1024),
+        )
+
+    def _fetch(self, key, now):
+        """Stored JSON text for key, dropping it if expired (call with the lock held)"""
+        row = self._db.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None and self.ttl and now - row[1] > self.ttl:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            row = None
+        return None if row is None else row[0]
+
+    def get(self, key):
+        """Stored value for key, or None (missing or expired)"""
+        now = time.time()
+        with self._lock:
+            data = self._fetch(key, now)
+            if data is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(data)
+
+    def put(self, key, value):
+        """Store a value (replacing any earlier one), then evict least-recently-used entries over the limits"""
+        data = json.dumps(value, default=str)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict()
+
+    def update(self, key, change):
+        """
+        Replace a stored value with change(value), atomically within this
+        process. Returns False (and changes nothing) if key isn't stored.
+        """
+        with self._lock:
+            data = self._fetch(key, time.time())
+            if data is None:
+                return False
+            data = json.dumps(change(json.loads(data)), default=str)
+            self._db.execute("UPDATE entries SET value = ?, size = ? WHERE key = ?", (data, len(data), key))
+            self._evict()
+        return True
+
+    def _evict(self):
+        count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_items and size <= self.max_bytes:
+            return
+        # Walk from least to most recently used until both limits hold
+        doomed = []
+        for key, entry_size in self._db.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if count <= self.max_items and size <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            size -= entry_size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def stats(self):
+        """Entry count, total size and this process's hit/miss counts"""
+        with self._lock:
+            count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+
+    def close(self):
+        """Close the database"""
+        self._db.close()
+
+
+def main(store, argv=None):
+    """`python <module>.py [stats|clear]` for a store; returns the exit code"""
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "stats"
+    if command == "clear":
+        store.clear()
+        print(f"✅ Cleared {store.path}")
+    elif command == "stats":
+        stats = store.stats()
+        print(f"📦 {store.path}")
+        print(f"   Entries: {stats['entries']}")
+        print(f"   Size: {stats['bytes'] / 1024:.1f} KB")
+    else:
+        print(f"Usage: python {os.path.basename(sys.argv[0])} [stats|clear]")
+        return 2
+    return 0
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Startup Profiler for the Problem Scripts
+
+Used by `run_all_tests.py --profile-startup`. Every script is run with
+`python -X importtime`, and the per-module import times are collected
+next to the script's total wall time. That shows how much of a run is
+import cost (dspy, openai, ...) and how much is actual work.
+
+The profile is saved as JSON. Compare two runs to catch regressions:
+
+    python startup_profile.py baseline.json startup_profile.json
+"""
+
+import sys
+import json
+import platform
+
+IMPORTTIME_PREFIX = "import time:"
+
+# Import time must grow by this much (fraction and microseconds) to count as a regression
+REGRESSION_RATIO = 0.2
+REGRESSION_MIN_US = 5000
+
+
+def split_importtime(stderr):
+    """
+    Separate `-X importtime` lines from a script's real stderr.
+
+    Returns (modules, stderr) where modules maps module name to
+    {"self_us", "cumulative_us", "top_level"}.
+    """
+    modules = {}
+    other_lines = []
+    for line in stderr.splitlines(keepends=True):
+        if not line.startswith(IMPORTTIME_PREFIX):
+            other_lines.append(line)
+            continue
+        fields = line[len(IMPORTTIME_PREFIX):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        name = fields[2].rstrip("\n")
+        # Nested imports are indented two spaces per level after "| "
+        indent = len(name) - len(name.lstrip(" "))
+        modules[name.strip()] = {
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+            "top_level": indent <= 1,
+        }
+    return modules, "".join(other_lines)
+
+
+def import_total_us(modules):
+    """Total import time: the sum of all top-level imports"""
+    return sum(m["cumulative_us"] for m in modules.values() if m["top_level"])
+
+
+def build_profile(scripts):
+    """
+    Build the JSON profile from {script name: (wall_us, modules)}.
+    """
+    profile = {
+        "python": platform.python_version(),
+        "scripts": {},
+    }
+    for name, (wall_us, modules) in scripts.items():
+        profile["scripts"][name] = {
+            "wall_us": wall_us,
+            "import_us": import_total_us(modules),
+            "modules": modules,
+        }
+    return profile
+
+
+def print_report(profile, top=5):
+    """Print scripts sorted by import time, with their slowest imports"""
+    scripts = sorted(profile["scripts"].items(), key=lambda item: item[1]["import_us"], reverse=True)
+    print(f"{'Script':<55} {'Imports':>10} {'Wall':>10} {'Share':>6}")
+    print("-" * 84)
+    for name, entry in scripts:
+        share = entry["import_us"] / entry["wall_us"] if entry["wall_us"] else 0
+        print(f"{name:<55} {entry['import_us'] / 1000:>8.1f}ms {entry['wall_us'] / 1000:>8.1f}ms {share:>6.0%}")
+        slowest = sorted(
+            ((m, t) for m, t in entry["modules"].items() if t["top_level"]),
+            key=lambda item: item[1]["cumulative_us"],
+            reverse=True,
+        )[:top]
+        for module, times in slowest:
+            print(f"    {module:<51} {times['cumulative_us'] / 1000:>8.1f}ms")
+
+
+def save_profile(profile, path):
+    """Write the profile as JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2, sort_keys=True)
+
+
+def load_profile(path):
+    """Read a profile written by save_profile()"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_profiles(baseline, current, ratio=REGRESSION_RATIO, min_us=REGRESSION_MIN_US):
+    """
+    Find scripts whose import time grew since the baseline.
+
+    Returns [(script, baseline_us, current_us)], worst first.
+    """
+    regressions = []
+    for name, entry in current["scripts"].items():
+        before = baseline["scripts"].get(name)
+        if before is None:
+            continue
+        growth = entry["import_us"] - before["import_us"]
+        if growth >= min_us and growth >= before["import_us"] * ratio:
+            regressions.append((name, before["import_us"], entry["import_us"]))
+    return sorted(regressions, key=lambda r: r[2] - r[1], reverse=True)
+
+
+def main(argv=None):
+    """Compare two saved profiles; exit 1 if any script regressed"""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python startup_profile.py BASELINE.json CURRENT.json")
+        return 2
+
+    regressions = compare_profiles(load_profile(argv[0]), load_profile(argv[1]))
+    if not regressions:
+        print("✅ No startup regressions")
+        return 0
+
+    print("❌ Startup regressions:")
+    for name, before, after in regressions:
+        print(f"  {name}: {before / 1000:.1f}ms → {after / 1000:.1f}ms")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())